@@ -11,25 +11,193 @@ dictionary by default. The 'suppress' argument should be either
 'Y' or 'N' to indicate whether you would like wordle-solver to
 supress most of its output. This can be useful if you are testing
 many words. If no suppress argument is given, 'Y' is assumed.
+
+Many words can be solved by one process in streaming mode, which
+reads one word per line from a file, or from stdin if the file is '-',
+and writes one JSON object per line for each word:
+
+    >>> python3 batch.py --stream words.txt --strategy flagship
+
+Each record holds the word, the number of attempts, the guesses and
+the time taken, and is flushed as soon as it is written. With
+--workers, the words are solved by a pool of processes and the records
+are still written in input order. At most --max-pending words are
+read ahead of the output, so a slow reader slows down the input.
+
+Suggestions are cached by game state, since many words reach the same
+state. With --cache, the cache is loaded from a file before solving and,
+when there is one worker, saved to it afterwards so later runs start
+warm.
 '''
 
-import userfunctions
+import argparse
+import collections
+import json
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import opening
+import solver
+import suggestion_cache
+import userfunctions
+
+
+def solve_record(word, strategy='flagship'):
+    '''
+    Solves one word and returns a record of the game.
+
+    Parameters
+    ----------
+    word: str
+        the true word.
+    strategy: str
+        the strategy used to choose guesses, as for
+        WordleSolver.suggest_guess.
+
+    Returns
+    ----------
+    dict
+        the word, the number of attempts, the guesses and the elapsed
+        time in seconds, or the word and an error message if the word is
+        not valid.
+    '''
+    start = time.perf_counter()
+    solver_instance = solver.WordleSolver(
+        suppress_info=True,
+        suggestion_cache=suggestion_cache.shared_suggestion_cache(),
+        opening_book=opening.load_opening_book(strategy))
+    try:
+        true_word = solver_instance.sanitise_word(word)
+    except ValueError as error:
+        return {'word': word, 'error': str(error)}
+    solver_instance.set_true_word(true_word)
+
+    success = False
+    while not success:
+        success = solver_instance.process_guess(
+            solver_instance.suggest_guess(strategy))
+
+    return {'word': true_word,
+            'attempts': solver_instance.num_attempts,
+            'guesses': [guess for guess, pattern
+                        in solver_instance.guess_history],
+            'elapsed': time.perf_counter() - start}
+
+
+def _init_worker(cache_path):
+    '''
+    Loads the saved suggestion cache when a worker process starts.
+    '''
+    if cache_path is not None:
+        suggestion_cache.shared_suggestion_cache().load(cache_path)
+
+
+def stream_solve(lines, output, strategy='flagship', workers=1,
+                 max_pending=None, cache_path=None):
+    '''
+    Solves the word on each line and writes each record to the output as
+    a line of JSON, in input order.
+
+    Parameters
+    ----------
+    lines: iterable of str
+        the words to solve, one per line. blank lines are skipped.
+    output: file
+        the file the records are written to.
+    strategy: str
+        the strategy used to choose guesses.
+    workers: int
+        the number of worker processes. if 1, the words are solved in the
+        current process.
+    max_pending: int
+        the number of words which may be waiting to be written. defaults
+        to twice the number of workers.
+    cache_path: str
+        the path of a saved suggestion cache to load before solving. it is
+        saved again afterwards if there is only one worker.
+    '''
+    def write(record):
+        output.write(json.dumps(record) + '\n')
+        output.flush()
+
+    words = (line.strip() for line in lines if line.strip())
+
+    if workers == 1:
+        _init_worker(cache_path)
+        for word in words:
+            write(solve_record(word, strategy))
+        if cache_path is not None:
+            suggestion_cache.shared_suggestion_cache().save(cache_path)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * workers
+
+    # The opening book is built once, before the workers need it.
+    opening.load_opening_book(strategy)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache_path,)) as executor:
+        pending = collections.deque()
+        for word in words:
+            pending.append(executor.submit(solve_record, word, strategy))
+            if len(pending) >= max_pending:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Batch solve Wordle for one word, or stream many words.')
+    parser.add_argument('word', nargs='?', default=None,
+                        help='the word to solve.')
+    parser.add_argument('suppress', nargs='?', default='y',
+                        help='Y or N to suppress most of the output.')
+    parser.add_argument('--stream', metavar='FILE', default=None,
+                        help='solve each word in FILE, or stdin if FILE is '
+                             '-, and write JSON lines.')
+    parser.add_argument('--strategy', default='flagship',
+                        choices=['flagship', 'eliminator', 'entropy',
+                                 'random'],
+                        help='the strategy used in streaming mode.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes in streaming '
+                             'mode.')
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help='the number of words which may be read ahead '
+                             'of the output in streaming mode.')
+    parser.add_argument('--cache', metavar='FILE', default=None,
+                        help='load the suggestion cache from FILE in '
+                             'streaming mode, and save it there when there '
+                             'is one worker.')
+    args = parser.parse_args(argv)
+
+    if args.stream is None:
+        if args.word is None:
+            parser.error('a word or --stream is required.')
+        suppress_info = args.suppress.lower() != 'n'
+
+        final_guess, num_attempts = \
+            userfunctions.flagship_batch_solve(true_word=args.word,
+                                               suppress_info=suppress_info)
 
-true_word = sys.argv[1]
+        print(f'Word: {final_guess}')
+        print(f'Number of Attempts: {num_attempts}')
+        return
 
-try:
-    suppress_info = sys.argv[2]
-    if suppress_info.lower() == 'n':
-        suppress_info = False
-    else:
-        suppress_info = True
-except IndexError:
-    suppress_info = True
+    try:
+        if args.stream == '-':
+            stream_solve(sys.stdin, sys.stdout, args.strategy, args.workers,
+                         args.max_pending, args.cache)
+        else:
+            with open(args.stream, 'r') as file:
+                stream_solve(file, sys.stdout, args.strategy, args.workers,
+                             args.max_pending, args.cache)
+    except BrokenPipeError:
+        # The reader has stopped, e.g. when piped into head.
+        sys.stderr.close()
 
-final_guess, num_attempts = \
-    userfunctions.flagship_batch_solve(true_word=true_word,
-                                       suppress_info=suppress_info)
 
-print(f'Word: {final_guess}')
-print(f'Number of Attempts: {num_attempts}')
+if __name__ == '__main__':
+    main()
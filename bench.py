@@ -0,0 +1,330 @@
+'''
+This script can be executed from the command line with Python3 in
+order to benchmark the hot paths of the solver.
+
+    >>> python3 bench.py --games 200 --output bench.json
+
+The same answers are used on every run with the same --seed and
+--games, so the results of different runs can be compared. The
+latency of each phase is reported as percentiles, along with the
+number of full flagship games solved per second and the peak resident
+memory. If --baseline is given, the run is compared to an earlier
+JSON output and the script exits with status 1 if any phase is slower
+by more than --threshold.
+
+The memory kept by each game is also measured with tracemalloc: the
+arrays of the dictionary are shared by every game, so a game only keeps
+its viable word indices, its letter constraints and its history. The
+largest game must fit in GAME_MEMORY_BUDGET, and the script exits with
+status 1 if it does not.
+
+Contains:
+----------------------------------------
+    summarise
+        Summarises a list of timings as percentiles.
+    measure_game_memory
+        Measures the memory kept by each game while it is played.
+    run_benchmarks
+        Times each phase of the solver and returns the results.
+    find_regressions
+        Compares results to a baseline and lists the regressions.
+'''
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import dictionary
+import opening
+import solver
+import userfunctions
+
+# The most memory, in bytes, which one game in progress may keep,
+# excluding the dictionary and the opening book shared by every game.
+GAME_MEMORY_BUDGET = 10 * 1024
+
+
+def summarise(samples):
+    '''
+    Summarises a list of timings.
+
+    Parameters
+    ----------
+    samples: list of float
+        the timings in seconds.
+
+    Returns
+    ----------
+    dict
+        the number of samples, and the mean and the 50th, 95th and 99th
+        percentile latencies in milliseconds.
+    '''
+    milliseconds = np.array(samples) * 1000
+    return {
+        'count': len(samples),
+        'mean_ms': float(np.mean(milliseconds)),
+        'p50_ms': float(np.percentile(milliseconds, 50)),
+        'p95_ms': float(np.percentile(milliseconds, 95)),
+        'p99_ms': float(np.percentile(milliseconds, 99)),
+    }
+
+
+def peak_rss_kb():
+    '''
+    Returns the peak resident memory of the process in kilobytes.
+    '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return int(peak)
+
+
+def _timed(function, *args, **kwargs):
+    '''
+    Calls a function and returns its result and the time it took.
+    '''
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def measure_game_memory(answers, strategy='flagship'):
+    '''
+    Plays a game for each answer and measures the memory kept by the
+    solver after each guess, when the temporary arrays of the guess have
+    been freed.
+
+    Parameters
+    ----------
+    answers: list of str
+        the true words of the games.
+    strategy: str
+        the strategy used to play the games.
+
+    Returns
+    ----------
+    dict
+        the mean and the largest memory kept by a game in bytes, and the
+        budget.
+    '''
+    book = opening.load_opening_book(strategy)
+    # Play one game first, so that caches filled on first use are not
+    # counted against the games.
+    userfunctions.flagship_batch_solve(answers[0], True)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    game_bytes = []
+    try:
+        for answer in answers:
+            before = tracemalloc.get_traced_memory()[0]
+            solver_instance = solver.WordleSolver(true_word=answer,
+                                                  suppress_info=True,
+                                                  opening_book=book)
+            kept = tracemalloc.get_traced_memory()[0] - before
+            success = False
+            while not success:
+                success = solver_instance.process_guess(
+                    solver_instance.suggest_guess(strategy))
+                kept = max(kept, tracemalloc.get_traced_memory()[0] - before)
+            game_bytes.append(kept)
+            del solver_instance
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    return {
+        'mean_bytes': float(np.mean(game_bytes)),
+        'max_bytes': int(np.max(game_bytes)),
+        'budget_bytes': GAME_MEMORY_BUDGET,
+    }
+
+
+def run_benchmarks(num_games=200, seed=0, load_repeats=5,
+                   wordlist_path=r'all_words.txt'):
+    '''
+    Times each phase of the solver.
+
+    Parameters
+    ----------
+    num_games: int
+        the number of answers used for the game benchmarks.
+    seed: int
+        the seed used to choose the answers.
+    load_repeats: int
+        the number of times the wordlist is loaded.
+    wordlist_path: str
+        the path for the wordlist.
+
+    Returns
+    ----------
+    dict
+        the settings, a summary of each phase, the number of flagship
+        games solved per second, the peak resident memory and the memory
+        kept by each game.
+    '''
+    timings = {'fetch_word_list': [], 'load_binary': [],
+               'process_guess': [],
+               'eliminate_nonviable_words': [],
+               'suggest_eliminator_guess': [], 'flagship_batch_solve': []}
+
+    for repeat in range(load_repeats):
+        word_dictionary, elapsed = _timed(dictionary.Dictionary.from_file,
+                                          wordlist_path)
+        timings['fetch_word_list'].append(elapsed)
+
+    # The first load may build the binary file, so it is not timed.
+    dictionary.load_binary(wordlist_path)
+    for repeat in range(load_repeats):
+        _, elapsed = _timed(dictionary.load_binary, wordlist_path)
+        timings['load_binary'].append(elapsed)
+
+    rng = np.random.default_rng(seed)
+    answer_indices = np.sort(rng.choice(len(word_dictionary), num_games,
+                                        replace=False))
+    answers = [word_dictionary.words[i] for i in answer_indices]
+
+    for answer in answers:
+        solver_instance = solver.WordleSolver(true_word=answer,
+                                              suppress_info=True)
+        success = False
+        while not success:
+            if solver_instance.num_attempts == 0:
+                guess = solver_instance.suggest_default_first_guess()
+            else:
+                force_viable = len(solver_instance.viable_indices) <= 3
+                guess, elapsed = _timed(
+                    solver_instance.suggest_eliminator_guess, force_viable)
+                timings['suggest_eliminator_guess'].append(elapsed)
+
+            previous_state = solver_instance.copy()
+            success, elapsed = _timed(solver_instance.process_guess, guess)
+            timings['process_guess'].append(elapsed)
+
+            if not success:
+                # Repeat the elimination alone from the previous viable
+                # words with the new knowledge.
+                previous_state.known_letters = solver_instance.known_letters
+                previous_state.known_falseletters = \
+                    solver_instance.known_falseletters
+                previous_state.minnum_letters = solver_instance.minnum_letters
+                previous_state.maxnum_letters = solver_instance.maxnum_letters
+                _, elapsed = _timed(previous_state.eliminate_nonviable_words)
+                timings['eliminate_nonviable_words'].append(elapsed)
+
+    for answer in answers:
+        _, elapsed = _timed(userfunctions.flagship_batch_solve, answer, True)
+        timings['flagship_batch_solve'].append(elapsed)
+
+    return {
+        'settings': {
+            'num_games': num_games,
+            'seed': seed,
+            'wordlist_size': len(word_dictionary),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+        },
+        'phases': {name: summarise(samples)
+                   for name, samples in timings.items()},
+        'games_per_second': num_games / sum(timings['flagship_batch_solve']),
+        'peak_rss_kb': peak_rss_kb(),
+        'game_memory': measure_game_memory(answers),
+    }
+
+
+def find_regressions(results, baseline, threshold=0.1):
+    '''
+    Compares benchmark results to a baseline.
+
+    Parameters
+    ----------
+    results: dict
+        the results from run_benchmarks.
+    baseline: dict
+        earlier results from run_benchmarks.
+    threshold: float
+        the fraction by which a result may be worse than the baseline.
+
+    Returns
+    ----------
+    list of str
+        a description of each phase which has regressed.
+    '''
+    regressions = []
+    for name, summary in results['phases'].items():
+        if name not in baseline['phases']:
+            continue
+        old_p50 = baseline['phases'][name]['p50_ms']
+        new_p50 = summary['p50_ms']
+        if new_p50 > old_p50 * (1 + threshold):
+            regressions.append(f'{name}: p50 {old_p50:.3f} ms -> '
+                               f'{new_p50:.3f} ms')
+
+    old_rate = baseline['games_per_second']
+    new_rate = results['games_per_second']
+    if new_rate * (1 + threshold) < old_rate:
+        regressions.append(f'games_per_second: {old_rate:.1f} -> '
+                           f'{new_rate:.1f}')
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the hot paths of the solver.')
+    parser.add_argument('--games', type=int, default=200,
+                        help='the number of answers used for the games.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed used to choose the answers.')
+    parser.add_argument('--output', default=None,
+                        help='the path for the JSON results.')
+    parser.add_argument('--baseline', default=None,
+                        help='the path of earlier JSON results to compare.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='the allowed fractional slowdown of each phase.')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.games, args.seed)
+
+    for name, summary in results['phases'].items():
+        print(f'{name:<28} p50 {summary["p50_ms"]:9.3f} ms  '
+              f'p95 {summary["p95_ms"]:9.3f} ms  '
+              f'p99 {summary["p99_ms"]:9.3f} ms  (n={summary["count"]})')
+    print(f'{"games per second":<28} {results["games_per_second"]:.1f}')
+    print(f'{"peak RSS":<28} {results["peak_rss_kb"]} kB')
+    game_memory = results['game_memory']
+    print(f'{"memory per game":<28} mean {game_memory["mean_bytes"]:.0f} B  '
+          f'max {game_memory["max_bytes"]} B  '
+          f'(budget {game_memory["budget_bytes"]} B)')
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    status = 0
+    if game_memory['max_bytes'] > game_memory['budget_bytes']:
+        print(f'OVER BUDGET memory per game: {game_memory["max_bytes"]} B')
+        status = 1
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            status = 1
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
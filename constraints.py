@@ -0,0 +1,157 @@
+'''
+This module contains a compact, bit-parallel representation of the
+knowledge a WordleSolver has gained from its guesses. Each position
+has a bit mask of the letters of the alphabet still allowed there, and
+the minimum and maximum number of each letter are packed into one byte
+per letter.
+
+Words are encoded by the Dictionary as one-hot letter bits for each
+position, so checking every word against the allowed letters is a
+bitwise AND over a uint32 array.
+
+The viable words of a solver are the words which satisfy its
+constraints, so the constraints are also the key of the game state in
+the suggestion cache.
+
+Contains:
+----------------------------------------
+    ConstraintState
+        An immutable, hashable set of constraints which can be made from
+        and applied to a WordleSolver, used to filter a dictionary, and
+        written as a compact key.
+'''
+
+import collections
+
+import numpy as np
+
+# The mask allowing every letter of the default alphabet, a to z.
+ALL_LETTERS = (1 << 26) - 1
+
+
+class ConstraintState(collections.namedtuple('ConstraintState',
+                                             ['allowed', 'counts'])):
+    '''
+    Constraints on the true word.
+
+    allowed: tuple of int
+        a mask of the letters allowed at each position, with one bit for
+        each letter of the alphabet.
+    counts: bytes
+        for each letter, the minimum number of the letter in the low
+        four bits and the maximum number in the high four bits.
+    '''
+    __slots__ = ()
+
+    @classmethod
+    def from_solver(cls, solver_instance):
+        '''
+        Makes the constraints from the known_letters, known_falseletters,
+        minnum_letters and maxnum_letters attributes of a solver.
+        '''
+        letter_index = solver_instance.letter_index
+        all_letters = (1 << len(letter_index)) - 1
+        allowed = []
+        for known_letter, false_letters in zip(
+                solver_instance.known_letters,
+                solver_instance.known_falseletters):
+            if known_letter != '*':
+                allowed.append(1 << letter_index[known_letter])
+            else:
+                mask = all_letters
+                for letter in false_letters:
+                    mask &= ~(1 << letter_index[letter])
+                allowed.append(mask)
+
+        counts = bytes(int(minimum) | int(maximum) << 4 for minimum, maximum
+                       in zip(solver_instance.minnum_letters,
+                              solver_instance.maxnum_letters))
+        return cls(tuple(allowed), counts)
+
+    def key(self):
+        '''
+        Returns the constraints as a short string, e.g. for a cache key
+        which is saved to a JSON file: the allowed letter masks of each
+        position in hexadecimal, followed by the packed letter counts.
+        '''
+        return '.'.join(f'{mask:x}' for mask in self.allowed) + \
+            ':' + self.counts.hex()
+
+    @property
+    def minnum_letters(self):
+        '''
+        The minimum number of each letter in the true word.
+        '''
+        return np.frombuffer(self.counts, dtype=np.uint8) & 0xF
+
+    @property
+    def maxnum_letters(self):
+        '''
+        The maximum number of each letter in the true word.
+        '''
+        return np.frombuffer(self.counts, dtype=np.uint8) >> 4
+
+    def apply_to(self, solver_instance):
+        '''
+        Sets the known_letters, known_falseletters, minnum_letters and
+        maxnum_letters attributes of a solver to match the constraints.
+        The attributes give the same viable words as the constraints,
+        although letters which are known to be false at a position whose
+        letter is also known are not kept.
+        '''
+        letters = solver_instance.dictionary.alphabet
+        known_letters = []
+        known_falseletters = []
+        for mask in self.allowed:
+            allowed_letters = [letter for i, letter in enumerate(letters)
+                               if mask & 1 << i]
+            if len(allowed_letters) == 1:
+                known_letters.append(allowed_letters[0])
+                known_falseletters.append([])
+            else:
+                known_letters.append('*')
+                known_falseletters.append(
+                    [letter for i, letter in enumerate(letters)
+                     if not mask & 1 << i])
+
+        solver_instance.known_letters = known_letters
+        solver_instance.known_falseletters = known_falseletters
+        solver_instance.minnum_letters = self.minnum_letters.astype(np.uint8)
+        solver_instance.maxnum_letters = self.maxnum_letters.astype(np.uint8)
+
+    def filter(self, word_dictionary, indices=None):
+        '''
+        Finds the words which satisfy the constraints.
+
+        Parameters
+        ----------
+        word_dictionary: dictionary.Dictionary
+            the dictionary of words.
+        indices: numpy.ndarray
+            the indices of the words to check. if None, every word in the
+            dictionary is checked.
+
+        Returns
+        ----------
+        numpy.ndarray
+            the indices of the words which satisfy the constraints.
+        '''
+        if indices is None:
+            indices = word_dictionary.all_indices
+
+        allowed = np.array(self.allowed,
+                           dtype=word_dictionary.letter_bits.dtype)
+        letter_bits = word_dictionary.letter_bits[indices]
+        mask = np.all(letter_bits & allowed, axis=1)
+
+        # Only the letters with a known count need to be checked.
+        minnum_letters = self.minnum_letters
+        maxnum_letters = self.maxnum_letters
+        checked = np.flatnonzero((minnum_letters > 0)
+                                 | (maxnum_letters < len(self.allowed)))
+        if len(checked) > 0:
+            num_letters = word_dictionary.num_letters[indices][:, checked]
+            mask &= np.all(num_letters >= minnum_letters[checked], axis=1)
+            mask &= np.all(num_letters <= maxnum_letters[checked], axis=1)
+
+        return indices[mask]
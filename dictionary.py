@@ -0,0 +1,523 @@
+'''
+This module contains the Dictionary class, which holds a wordlist and
+the arrays derived from it. A Dictionary is immutable, so one instance
+can be shared by every WordleSolver in a process.
+
+The word length and the alphabet are found from the words, so a
+Dictionary can hold words of any length in any alphabet of up to 64
+letters, although the pattern codes of words longer than five letters
+need uint16.
+
+The words which may be the true word can be restricted to an
+AnswerList, such as the few thousand common words used as Wordle
+answers, while every word in the Dictionary may still be guessed. The
+answers can be given prior weights, e.g. from a word frequency list.
+
+The text wordlist is the source of the words, but parsing it and
+counting the letters of every word is slow, so each wordlist is also
+kept as a compact binary file in the .wordle_cache directory next to
+it. The binary file is memory mapped when it is loaded, and is rebuilt
+whenever the size or modification time of the text file changes. Its
+name includes a digest of the text file's absolute path, so wordlists
+with the same name in different directories can share a cache
+directory. The binary files can also be built in
+advance by executing this module with Python3:
+
+    >>> python3 dictionary.py all_words.txt
+
+Contains:
+----------------------------------------
+    Dictionary
+        An immutable wordlist with its letter code, letter count, letter
+        presence and letter bit matrices.
+    AnswerList
+        The words which may be the true word, which may be fewer than
+        the words which may be guessed, and their prior weights.
+    source_stamp
+        Returns the size and modification time of a wordlist.
+    binary_path
+        Returns the path of the binary file for a wordlist.
+    load_binary
+        Loads the Dictionary for a wordlist from its binary file,
+        building the file first if necessary.
+    load_dictionary
+        Loads the Dictionary for a wordlist file, reading the file only
+        the first time it is requested in a process.
+    load_answers
+        Loads the AnswerList for an answers file, reading the file only
+        the first time it is requested in a process.
+'''
+
+import argparse
+import functools
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+import patterns
+
+BINARY_MAGIC = b'WDIC'
+# Increment whenever the layout of the binary file changes.
+BINARY_VERSION = 2
+# The header ends with the size and modification time in nanoseconds of
+# the text file the binary file was built from.
+BINARY_HEADER_FORMAT = '<4sIIIIII40sQq'
+BINARY_HEADER_SIZE = struct.calcsize(BINARY_HEADER_FORMAT)
+
+
+class Dictionary():
+
+    def __init__(self, words, alphabet=None):
+        '''
+        Initialise the dictionary from a list of words. All of the
+        derived arrays are computed here and made read-only.
+
+        Parameters
+        ----------
+        words: list of str
+            the lowercase words in the dictionary. every word must have
+            the same number of letters.
+        alphabet: str
+            the letters which may appear in the words. if None, the
+            letters a to z are used if they cover every word, otherwise
+            the letters found in the words.
+        '''
+        self.words = tuple(words)
+        if len(self.words) == 0:
+            raise ValueError('A dictionary must have at least one word.')
+        self.index = dict(zip(self.words, range(len(self.words))))
+        self.hash = patterns.wordlist_hash(self.words)
+
+        if alphabet is None:
+            # Try the letters a to z first, which is the common case and
+            # avoids scanning the words for their letters.
+            try:
+                self.codes = patterns.encode_words(self.words)
+                alphabet = patterns.ALPHABET
+            except ValueError:
+                alphabet = patterns.infer_alphabet(self.words)
+        if len(alphabet) > 64:
+            raise ValueError('The alphabet must have at most 64 letters.')
+        if alphabet is not patterns.ALPHABET:
+            self.codes = patterns.encode_words(self.words, alphabet)
+        self.alphabet = alphabet
+        self.letter_index = {letter: i for i, letter in enumerate(alphabet)}
+
+        num_words = len(self.words)
+        self.num_letters = np.zeros((num_words, len(alphabet)),
+                                    dtype=np.uint8)
+        rows = np.arange(num_words)
+        for j in range(self.codes.shape[1]):
+            self.num_letters[rows, self.codes[:, j]] += 1
+        self.presence = self.num_letters > 0
+
+        self._derive_arrays()
+
+    def _derive_arrays(self):
+        '''
+        Sets the attributes which are derived from the words, the codes
+        and the letter counts, and makes every array read-only.
+        '''
+        self.word_length = len(self.words[0])
+        self.all_correct = patterns.all_correct(self.word_length)
+        self.num_patterns = self.all_correct + 1
+        self.pattern_dtype = patterns.pattern_dtype(self.word_length)
+
+        # The presence matrix as float32 for scoring with matrix products,
+        # and the number of words containing each letter.
+        self.presence_matrix = self.presence.astype(np.float32)
+        self.letter_counts = self.presence_matrix.sum(axis=0)
+        self._letter_bits = None
+
+        # Word indices take two bytes for wordlists of up to 65,536
+        # words, which keeps the viable words of each game small.
+        self.index_dtype = np.dtype(np.uint16 if len(self.words) <= 1 << 16
+                                    else np.uint32)
+        # Every word is viable at the start of a game, so solvers can
+        # share this array until their first guess is processed.
+        self.all_indices = np.arange(len(self.words), dtype=self.index_dtype)
+
+        for array in (self.codes, self.num_letters, self.presence,
+                      self.presence_matrix, self.letter_counts,
+                      self.all_indices):
+            array.flags.writeable = False
+
+    @property
+    def letter_bits(self):
+        '''
+        One-hot letter bits for each position, used by the constraints
+        module to check allowed letters with bitwise operations. They are
+        only computed the first time they are used.
+        '''
+        if self._letter_bits is None:
+            bits_dtype = np.uint32 if len(self.alphabet) <= 32 else np.uint64
+            letter_bits = np.left_shift(1, self.codes, dtype=bits_dtype)
+            letter_bits.flags.writeable = False
+            self._letter_bits = letter_bits
+        return self._letter_bits
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.index
+
+    @classmethod
+    def from_file(cls, wordlist_path):
+        '''
+        Reads a dictionary from a file with one word per line.
+
+        Parameters
+        ----------
+        wordlist_path: str
+            the path for the wordlist.
+        '''
+        with open(wordlist_path, 'r', encoding='utf-8') as file:
+            return cls([line.rstrip() for line in file])
+
+    def save_binary(self, path, source=None):
+        '''
+        Writes the dictionary to a compact binary file which can be loaded
+        with from_binary. The file holds a header, the alphabet and the
+        words as UTF-8 text, followed by the letter code, letter count and
+        letter presence matrices as uint8.
+
+        Parameters
+        ----------
+        path: str
+            the path for the binary file.
+        source: tuple of int
+            the size and modification time of the text file the words
+            were read from, as returned by source_stamp. defaults to zeros.
+        '''
+        source_size, source_mtime = (0, 0) if source is None else source
+        alphabet_bytes = self.alphabet.encode('utf-8')
+        words_bytes = '\n'.join(self.words).encode('utf-8')
+        header = struct.pack(BINARY_HEADER_FORMAT, BINARY_MAGIC,
+                             BINARY_VERSION, len(self.words),
+                             self.word_length, len(self.alphabet),
+                             len(alphabet_bytes), len(words_bytes),
+                             self.hash.encode('ascii'), source_size,
+                             source_mtime)
+        text = alphabet_bytes + words_bytes
+        # Pad the text so that the matrices start on an 8 byte boundary.
+        padding = b'\0' * (-(len(header) + len(text)) % 8)
+
+        with patterns.atomic_open(path) as file:
+            file.write(header)
+            file.write(text)
+            file.write(padding)
+            file.write(np.ascontiguousarray(self.codes).tobytes())
+            file.write(np.ascontiguousarray(self.num_letters).tobytes())
+            file.write(np.ascontiguousarray(self.presence).tobytes())
+
+    @classmethod
+    def from_binary(cls, path, source=None):
+        '''
+        Loads a dictionary written by save_binary. The matrices are memory
+        mapped rather than read, and the file is checked against its
+        header before it is used.
+
+        Parameters
+        ----------
+        path: str
+            the path for the binary file.
+        source: tuple of int
+            if given, the size and modification time of the text file,
+            which must match the ones the binary file was built from.
+        '''
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        if len(buffer) < BINARY_HEADER_SIZE:
+            raise ValueError(f'\'{path}\' is not a binary wordlist.')
+        (magic, version, num_words, word_length, alphabet_size,
+         alphabet_nbytes, words_nbytes, word_hash, source_size,
+         source_mtime) = struct.unpack(
+             BINARY_HEADER_FORMAT, buffer[:BINARY_HEADER_SIZE].tobytes())
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f'\'{path}\' is not a version {BINARY_VERSION} '
+                             f'binary wordlist.')
+        if source is not None and (source_size, source_mtime) != source:
+            raise ValueError(f'\'{path}\' was built from a different '
+                             f'wordlist.')
+
+        offset = BINARY_HEADER_SIZE + alphabet_nbytes + words_nbytes
+        offset += -offset % 8
+        codes_size = num_words * word_length
+        counts_size = num_words * alphabet_size
+        if num_words == 0 or len(buffer) != offset + codes_size \
+                + 2 * counts_size:
+            raise ValueError(f'\'{path}\' is truncated or corrupt.')
+
+        text = buffer[BINARY_HEADER_SIZE:BINARY_HEADER_SIZE + alphabet_nbytes
+                      + words_nbytes].tobytes()
+        words = text[alphabet_nbytes:].decode('utf-8').split('\n')
+        word_hash = word_hash.decode('ascii')
+        if (len(words) != num_words
+                or patterns.wordlist_hash(words) != word_hash):
+            raise ValueError(f'\'{path}\' is truncated or corrupt.')
+
+        word_dictionary = cls.__new__(cls)
+        word_dictionary.words = tuple(words)
+        word_dictionary.index = dict(zip(words, range(num_words)))
+        word_dictionary.hash = word_hash
+        word_dictionary.alphabet = text[:alphabet_nbytes].decode('utf-8')
+        word_dictionary.letter_index = {
+            letter: i for i, letter in enumerate(word_dictionary.alphabet)}
+
+        word_dictionary.codes = buffer[offset:offset + codes_size].reshape(
+            num_words, word_length)
+        offset += codes_size
+        word_dictionary.num_letters = buffer[
+            offset:offset + counts_size].reshape(num_words, alphabet_size)
+        offset += counts_size
+        word_dictionary.presence = buffer[
+            offset:offset + counts_size].view(bool).reshape(num_words,
+                                                            alphabet_size)
+        word_dictionary._derive_arrays()
+        return word_dictionary
+
+
+class AnswerList():
+
+    def __init__(self, word_dictionary, words, weights=None):
+        '''
+        Initialise the list of words which may be the true word, a subset
+        of the words which may be guessed, with an optional prior weight
+        for each word.
+
+        Parameters
+        ----------
+        word_dictionary: Dictionary
+            the dictionary of allowed guesses.
+        words: list of str
+            the words which may be the true word. every word must be in
+            the dictionary.
+        weights: dict
+            the prior weight of each word, e.g. how common it is. answers
+            without a weight are given the smallest weight. if None, every
+            answer is equally likely.
+        '''
+        missing = [word for word in words if word not in word_dictionary]
+        if missing:
+            raise ValueError(f'{len(missing)} answers are not in the '
+                             f'dictionary, e.g. \'{missing[0]}\'.')
+        # The answers are kept in the order of the dictionary, so their
+        # indices can be used as viable indices.
+        self.indices = np.unique(np.array(
+            [word_dictionary.index[word] for word in words],
+            dtype=word_dictionary.index_dtype))
+        if len(self.indices) == 0:
+            raise ValueError('An answer list must have at least one word.')
+        self.words = tuple(word_dictionary.words[i] for i in self.indices)
+        self.index = dict(zip(self.words, range(len(self.words))))
+        self.dictionary_hash = word_dictionary.hash
+
+        answer_hash = hashlib.sha1(patterns.wordlist_hash(self.words)
+                                   .encode('ascii'))
+        presence_matrix = word_dictionary.presence_matrix[self.indices]
+        if weights is None:
+            # Every answer is equally likely, so counts are used instead.
+            self.word_weights = None
+            self.letter_counts = presence_matrix.sum(axis=0)
+        else:
+            answer_weights = np.array([weights.get(word, np.nan)
+                                       for word in self.words])
+            given = ~np.isnan(answer_weights)
+            if not np.any(given) or np.any(answer_weights[given] <= 0):
+                raise ValueError('The answer weights must be positive, and '
+                                 'at least one answer must have a weight.')
+            answer_weights[~given] = answer_weights[given].min()
+            # The weight of every word in the dictionary, which is zero
+            # for words which are not answers.
+            self.word_weights = np.zeros(len(word_dictionary))
+            self.word_weights[self.indices] = answer_weights
+            self.letter_counts = (answer_weights @ presence_matrix).astype(
+                np.float32)
+            self.word_weights.flags.writeable = False
+            answer_hash.update(answer_weights.tobytes())
+        self.hash = answer_hash.hexdigest()
+
+        for array in (self.indices, self.letter_counts):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __contains__(self, word):
+        return word in self.index
+
+    @classmethod
+    def from_file(cls, word_dictionary, answers_path, weights_path=None):
+        '''
+        Reads an answer list from a file with one word per line, and the
+        weights from a file with a word and its weight on each line, such
+        as a word frequency list.
+
+        Parameters
+        ----------
+        word_dictionary: Dictionary
+            the dictionary of allowed guesses.
+        answers_path: str
+            the path for the answer list.
+        weights_path: str
+            the path for the weights. if None, every answer is equally
+            likely.
+        '''
+        with open(answers_path, 'r', encoding='utf-8') as file:
+            words = [line.strip() for line in file if line.strip()]
+
+        weights = None
+        if weights_path is not None:
+            weights = {}
+            with open(weights_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    fields = line.split()
+                    if len(fields) != 2:
+                        continue
+                    try:
+                        weights[fields[0]] = float(fields[1])
+                    except ValueError:
+                        raise ValueError(f'Unable to read the weight of '
+                                         f'\'{fields[0]}\'.')
+
+        return cls(word_dictionary, words, weights)
+
+
+def source_stamp(wordlist_path):
+    '''
+    Returns the size and the modification time in nanoseconds of a
+    wordlist, which are recorded in its binary file.
+    '''
+    stat = os.stat(wordlist_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def binary_path(wordlist_path, cache_dir=None):
+    '''
+    Returns the path of the binary file for a wordlist. The file name
+    includes a digest of the wordlist's absolute path.
+
+    Parameters
+    ----------
+    wordlist_path: str
+        the path for the wordlist.
+    cache_dir: str
+        the directory for the binary file. defaults to the .wordle_cache
+        directory next to the wordlist.
+    '''
+    if cache_dir is None:
+        cache_dir = patterns.default_cache_dir(wordlist_path)
+    name = os.path.basename(wordlist_path)
+    digest = hashlib.sha1(os.path.abspath(wordlist_path).encode(
+        'utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir,
+                        f'{name}.{digest}.v{BINARY_VERSION}.bin')
+
+
+def load_binary(wordlist_path=r'all_words.txt', cache_dir=None):
+    '''
+    Loads the dictionary for a wordlist from its binary file. The text
+    file is the source of the words, so the binary file is built from it
+    first if it is missing, not valid, or was built from a text file with
+    a different size or modification time.
+
+    Parameters
+    ----------
+    wordlist_path: str
+        the path for the wordlist.
+    cache_dir: str
+        the directory for the binary file. defaults to the .wordle_cache
+        directory next to the wordlist.
+
+    Returns
+    ----------
+    Dictionary
+        the dictionary for the wordlist.
+    '''
+    path = binary_path(wordlist_path, cache_dir)
+    # The text file is stamped before it is read, so a change while it is
+    # being read makes the binary file out of date rather than wrong.
+    source = source_stamp(wordlist_path)
+    try:
+        return Dictionary.from_binary(path, source)
+    except (OSError, ValueError):
+        pass
+
+    word_dictionary = Dictionary.from_file(wordlist_path)
+    try:
+        word_dictionary.save_binary(path, source)
+    except OSError:
+        # The words can still be used if the file cannot be written.
+        pass
+    return word_dictionary
+
+
+@functools.lru_cache(maxsize=None)
+def load_dictionary(wordlist_path=r'all_words.txt'):
+    '''
+    Loads the Dictionary for a wordlist file from its binary file with
+    load_binary. The file is only read the first time each path is
+    requested, after which the same Dictionary is returned.
+
+    Parameters
+    ----------
+    wordlist_path: str
+        the path for the wordlist.
+
+    Returns
+    ----------
+    Dictionary
+        the shared dictionary for the wordlist.
+    '''
+    return load_binary(wordlist_path)
+
+
+@functools.lru_cache(maxsize=None)
+def load_answers(answers_path, weights_path=None,
+                 wordlist_path=r'all_words.txt'):
+    '''
+    Loads the answer list for an answers file and the shared dictionary
+    of a wordlist. The files are only read the first time they are
+    requested, after which the same AnswerList is returned.
+
+    Parameters
+    ----------
+    answers_path: str
+        the path for the answer list.
+    weights_path: str
+        the path for the answer weights, or None.
+    wordlist_path: str
+        the path for the wordlist of allowed guesses.
+
+    Returns
+    ----------
+    AnswerList
+        the shared answer list.
+    '''
+    return AnswerList.from_file(load_dictionary(wordlist_path),
+                                answers_path, weights_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Build the binary file for each wordlist.')
+    parser.add_argument('wordlists', nargs='+',
+                        help='the paths for the wordlists.')
+    parser.add_argument('--cache-dir', default=None,
+                        help='the directory for the binary files. defaults '
+                             'to the .wordle_cache directory next to each '
+                             'wordlist.')
+    args = parser.parse_args(argv)
+
+    for wordlist_path in args.wordlists:
+        source = source_stamp(wordlist_path)
+        word_dictionary = Dictionary.from_file(wordlist_path)
+        path = binary_path(wordlist_path, args.cache_dir)
+        word_dictionary.save_binary(path, source)
+        print(f'{wordlist_path}: {len(word_dictionary)} words -> {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,50 +1,160 @@
-import solver
-import userfunctions
+'''
+This script can be executed from the command line with Python3 in
+order to solve every word in the Wordle dictionary with one of the
+strategies and plot a bar chart of the number of attempts taken.
+
+    >>> python3 efficiency.py --method flagship --workers 8
+
+The words are solved in parallel by the evaluation module. The
+--step argument can be used to only solve every nth word, and the
+--seed argument sets the random state so that runs are repeatable.
+With --hard-mode, every guess must use the hints revealed so far. The
+summary includes the failure rate, the fraction of words which took
+more than six attempts.
+
+With --answers, only the words in the given file are solved and may be
+the true word, although any word in the dictionary may be guessed. The
+answers can be weighted by a word frequency file with --weights.
+
+With --stats, the solvers are instrumented and the summary is followed
+by a table of the time spent in each phase of each turn and of how many
+viable words each turn leaves, and by the suggestion cache hit rate.
+--track-allocations adds the memory allocated in each phase, which
+makes solving much slower.
+'''
+
+import argparse
+
+import dictionary
+import evaluation
+import instrumentation
 
 import numpy as np
 import matplotlib.pyplot as plt
-from tqdm import tqdm
-
-solver_instance = solver.WordleSolver()
-
-step = 1
-wordlist = solver_instance.master_wordlist[::step]
-
-method_name = 'Flagship'
-# method_name = 'Random'
-# method_name = 'Eliminator'
-
-num_attempts = np.zeros(len(wordlist), dtype=int)
-
-for i, word in enumerate(tqdm(wordlist)):
-    if method_name == 'Flagship':
-        word, attempts = userfunctions.flagship_batch_solve(word, True)
-    elif method_name == 'Random':
-        word, attempts = userfunctions.random_batch_solve(word, True)
-    elif method_name == 'Eliminator':
-        word, attempts = userfunctions.eliminator_batch_solve(word, True)
-    num_attempts[i] = int(attempts)
-
-avg = np.mean(num_attempts)
-std = np.std(num_attempts)
-med = np.median(num_attempts)
-print(f'{method_name} Attempt Summary')
-print(f'AVG: {round(avg, 2)}')
-print(f'STD: {round(std, 2)}')
-print(f'MED: {round(med, 2)}')
-
-values, counts = np.unique(num_attempts, return_counts=True)
-
-plt.bar(values, counts, color='black',
-        label=f'{method_name}')
-plt.axvline(avg, color='cyan', linewidth=2,
-            label=f'AVG: {round(avg, 2)}'r'$\pm$'f'{round(std, 2)}')
-plt.axvline(med, color='red', linewidth=2,
-            label=f'MED: {round(med, 2)}')
-plt.xlabel('Number of Attempts')
-plt.ylabel("Number of Words")
-# plt.title(f'{method_name}')
-plt.grid()
-plt.legend()
-plt.savefig(f'{method_name}_hist.png')
-plt.close()
+
+# The number of attempts allowed in a game of Wordle.
+MAX_ATTEMPTS = 6
+
+
+def print_turn_summary(stats):
+    '''
+    Prints the median and 95th percentile time of each phase for each
+    turn, the memory allocated in each phase if it was tracked, the mean
+    number of viable words before and after each turn, the median
+    fraction of the viable words each turn leaves, and the cache hit rate.
+    '''
+    columns = ['Turn', 'Games']
+    for name in instrumentation.PHASES:
+        columns += [f'{name} p50 ms', f'{name} p95 ms']
+        if stats.track_allocations:
+            columns.append(f'{name} KB')
+    columns += ['Viable before', 'Viable after', 'Shrinkage']
+    print()
+    print('  '.join(f'{column:>14}' for column in columns))
+
+    for row in stats.turn_summary():
+        values = [f'{row["turn"]:>14}', f'{row["games"]:>14}']
+        for name in instrumentation.PHASES:
+            values += [f'{row[f"{name}_p50_ms"]:>14.3f}',
+                       f'{row[f"{name}_p95_ms"]:>14.3f}']
+            if stats.track_allocations:
+                values.append(f'{row[f"{name}_kb"]:>14.1f}')
+        values += [f'{row["viable_before"]:>14.1f}',
+                   f'{row["viable_after"]:>14.1f}',
+                   f'{row["shrinkage"]:>14.4f}']
+        print('  '.join(values))
+
+    sources = ', '.join(f'{source}: {stats.suggestion_sources[source]}'
+                        for source in instrumentation.SUGGESTION_SOURCES)
+    print(f'Suggestions: {sources}')
+    if stats.cache_hit_rate is not None:
+        print(f'Cache hit rate: {round(100 * stats.cache_hit_rate, 2)}%')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Solve every word in the Wordle dictionary.')
+    parser.add_argument('--method', default='flagship',
+                        choices=list(evaluation.STRATEGIES),
+                        help='the strategy used to solve each word.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of worker processes. '
+                             'defaults to one per CPU.')
+    parser.add_argument('--step', type=int, default=1,
+                        help='only solve every nth word.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed for the random state.')
+    parser.add_argument('--hard-mode', action='store_true',
+                        help='solve every word in hard mode.')
+    parser.add_argument('--answers', metavar='FILE', default=None,
+                        help='the list of words which may be the true '
+                             'word.')
+    parser.add_argument('--weights', metavar='FILE', default=None,
+                        help='the prior weight of each answer, as a word '
+                             'and its weight on each line.')
+    parser.add_argument('--stats', action='store_true',
+                        help='print the latency and the number of viable '
+                             'words for each turn.')
+    parser.add_argument('--track-allocations', action='store_true',
+                        help='also print the memory allocated in each '
+                             'phase. implies --stats.')
+    args = parser.parse_args()
+
+    answer_list = None
+    if args.answers is not None:
+        answer_list = dictionary.load_answers(args.answers, args.weights)
+        wordlist = answer_list.words[::args.step]
+    elif args.weights is not None:
+        parser.error('--weights requires --answers.')
+    else:
+        wordlist = dictionary.load_dictionary().words[::args.step]
+    method_name = args.method.capitalize()
+    if args.hard_mode:
+        method_name += ' Hard Mode'
+
+    stats = None
+    if args.stats or args.track_allocations:
+        stats = instrumentation.SolverStats(
+            track_allocations=args.track_allocations)
+
+    num_attempts = evaluation.evaluate(args.method, wordlist,
+                                       workers=args.workers,
+                                       seed=args.seed, progress=True,
+                                       hard_mode=args.hard_mode,
+                                       answer_list=answer_list,
+                                       stats=stats)
+
+    avg = np.mean(num_attempts)
+    std = np.std(num_attempts)
+    med = np.median(num_attempts)
+    print(f'{method_name} Attempt Summary')
+    print(f'AVG: {round(avg, 2)}')
+    print(f'STD: {round(std, 2)}')
+    print(f'MED: {round(med, 2)}')
+    print(f'MAX: {np.max(num_attempts)}')
+    failures = np.count_nonzero(num_attempts > MAX_ATTEMPTS)
+    print(f'FAIL (>{MAX_ATTEMPTS}): {failures} '
+          f'({round(100 * failures / len(num_attempts), 2)}%)')
+
+    if stats is not None:
+        print_turn_summary(stats)
+
+    values, counts = np.unique(num_attempts, return_counts=True)
+
+    plt.bar(values, counts, color='black',
+            label=f'{method_name}')
+    plt.axvline(avg, color='cyan', linewidth=2,
+                label=f'AVG: {round(avg, 2)}'r'$\pm$'f'{round(std, 2)}')
+    plt.axvline(med, color='red', linewidth=2,
+                label=f'MED: {round(med, 2)}')
+    plt.xlabel('Number of Attempts')
+    plt.ylabel("Number of Words")
+    # plt.title(f'{method_name}')
+    plt.grid()
+    plt.legend()
+    plt.savefig(f'{method_name.replace(" ", "_")}_hist.png')
+    plt.close()
+
+
+if __name__ == '__main__':
+    main()
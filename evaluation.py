@@ -0,0 +1,402 @@
+'''
+This module contains the evaluation engine used by the efficiency.py
+script. It solves Wordle for many true words with a chosen strategy,
+spreading the words over a pool of worker processes.
+
+Contains:
+----------------------------------------
+    STRATEGIES
+        The batch solve functions from userfunctions, keyed by name.
+    evaluate
+        Solves every word in a list of true words and returns the
+        number of attempts taken for each word.
+    solve_batch
+        Solves many true words in lockstep, advancing every game with
+        array operations and sharing guesses between games with the
+        same feedback history.
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import dictionary
+import instrumentation
+import opening
+import patterns
+import solver
+import userfunctions
+
+STRATEGIES = {
+    'flagship': userfunctions.flagship_batch_solve,
+    'eliminator': userfunctions.eliminator_batch_solve,
+    'random': userfunctions.random_batch_solve,
+}
+
+
+def _init_worker(wordlist_path):
+    '''
+    Initialises a worker process by reading and encoding the wordlist,
+    so that it is only done once per worker.
+    '''
+    dictionary.load_dictionary(wordlist_path)
+
+
+def _solve_chunk(strategy, answers, start, seed, hard_mode=False,
+                 answer_list=None, stats=None):
+    '''
+    Solves a chunk of the true words. The random state is seeded from
+    the seed and the position of each word, so that the results do not
+    depend on how the words are split between workers.
+
+    Parameters
+    ----------
+    strategy: str
+        the name of the strategy in STRATEGIES.
+    answers: list of str
+        the true words in this chunk.
+    start: int
+        the position of the first word of the chunk in the full list.
+    seed: int
+        the seed for the evaluation.
+    hard_mode: boolean
+        whether the words are solved in hard mode.
+    answer_list: dictionary.AnswerList
+        the words which may be the true word, or None.
+    stats: instrumentation.SolverStats
+        the stats the games are recorded to, or None.
+
+    Returns
+    ----------
+    numpy.ndarray
+        the number of attempts taken for each word in the chunk.
+    instrumentation.SolverStats
+        the stats, which are a copy in a worker process.
+    '''
+    batch_solve = STRATEGIES[strategy]
+    num_attempts = np.zeros(len(answers), dtype=np.uint8)
+
+    for i, word in enumerate(answers):
+        np.random.seed([seed, start + i])
+        word, attempts = batch_solve(word, True, hard_mode, answer_list,
+                                     stats)
+        num_attempts[i] = attempts
+
+    return num_attempts, stats
+
+
+def _chunk_stats(stats):
+    '''
+    Returns empty stats for a chunk solved by a worker process, with the
+    same settings as stats, or None if stats is None.
+    '''
+    if stats is None:
+        return None
+    return instrumentation.SolverStats(
+        track_allocations=stats.track_allocations)
+
+
+def evaluate(strategy='flagship', answers=None, workers=None,
+             chunk_size=64, seed=0, wordlist_path=r'all_words.txt',
+             progress=False, hard_mode=False, answer_list=None,
+             stats=None):
+    '''
+    Solves Wordle for every word in answers using the given strategy.
+
+    Parameters
+    ----------
+    strategy: str
+        the name of the strategy to use. must be one of 'flagship',
+        'eliminator' or 'random'.
+    answers: list of str
+        the true words to solve. if None, every word in the wordlist,
+        or every word in answer_list if it is given, is solved.
+    workers: int
+        the number of worker processes. if None, one worker is used per
+        CPU. if 1, the words are solved in the current process.
+    chunk_size: int
+        the number of words sent to a worker at a time.
+    seed: int
+        the seed for the random state, so that runs are repeatable.
+    wordlist_path: str
+        the path for the wordlist.
+    progress: boolean
+        if set to true, shows a progress bar as chunks are completed.
+    hard_mode: boolean
+        if set to true, every guess uses the hints revealed so far.
+    answer_list: dictionary.AnswerList
+        the words which may be the true word, and their prior weights.
+        if None, every word in the wordlist may be the true word.
+    stats: instrumentation.SolverStats
+        if given, every game is recorded to it. the games solved by
+        worker processes are recorded separately and added when each
+        chunk is finished, in the order of the words, so the callback is
+        only called if the words are solved in the current process.
+
+    Returns
+    ----------
+    numpy.ndarray
+        uint8 array of the number of attempts taken for each word.
+    '''
+    if strategy not in STRATEGIES:
+        raise ValueError(f'Unknown strategy \'{strategy}\'. Choose from '
+                         f'{", ".join(STRATEGIES)}.')
+
+    if answers is None and answer_list is not None:
+        answers = answer_list.words
+    elif answers is None:
+        answers = dictionary.load_dictionary(wordlist_path).words
+    answers = list(answers)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    num_attempts = np.zeros(len(answers), dtype=np.uint8)
+    starts = range(0, len(answers), chunk_size)
+
+    if progress:
+        from tqdm import tqdm
+        progress_bar = tqdm(total=len(answers))
+
+    if workers == 1:
+        for start in starts:
+            chunk = answers[start:start + chunk_size]
+            num_attempts[start:start + len(chunk)] = \
+                _solve_chunk(strategy, chunk, start, seed, hard_mode,
+                             answer_list, stats)[0]
+            if progress:
+                progress_bar.update(len(chunk))
+    else:
+        # The opening book is built once, before the workers need it.
+        opening.load_opening_book(strategy)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(wordlist_path,)) as executor:
+            futures = {executor.submit(_solve_chunk, strategy,
+                                       answers[start:start + chunk_size],
+                                       start, seed, hard_mode,
+                                       answer_list, _chunk_stats(stats)):
+                       start for start in starts}
+            chunk_stats = {}
+            for future in as_completed(futures):
+                start = futures[future]
+                chunk_attempts, chunk_stats[start] = future.result()
+                num_attempts[start:start + len(chunk_attempts)] = \
+                    chunk_attempts
+                if progress:
+                    progress_bar.update(len(chunk_attempts))
+
+        if stats is not None:
+            for start in starts:
+                stats.merge(chunk_stats[start])
+
+    if progress:
+        progress_bar.close()
+
+    return num_attempts
+
+
+def solve_batch(answers, strategy='flagship', batch_size=512,
+                pattern_matrix=None, word_dictionary=None, max_turns=100,
+                opening_book=None, hard_mode=False):
+    '''
+    Solves Wordle for many true words at once. The state of every game is
+    kept in stacked arrays: a mask of the viable words and the minimum and
+    maximum number of each letter, and in hard mode a mask of the allowed
+    guesses and the known letters. Each turn, the games are grouped by
+    their feedback history, one guess is computed for each group, and the
+    feedback for every game is applied in one vectorised step.
+
+    Parameters
+    ----------
+    answers: list of str
+        the true words to solve. must be in the dictionary.
+    strategy: str
+        the strategy used to choose guesses, as for
+        WordleSolver.suggest_guess.
+    batch_size: int
+        the number of games played at once. bounds the size of the
+        viable word masks.
+    pattern_matrix: numpy.ndarray
+        the pattern matrix for the dictionary. if None, the patterns of
+        each turn's guesses are computed.
+    word_dictionary: dictionary.Dictionary
+        the dictionary of allowed words. defaults to the shared dictionary.
+    max_turns: int
+        the number of turns after which unsolved games are abandoned.
+    opening_book: opening.OpeningBook
+        the opening book for the strategy. if word_dictionary is not
+        given, defaults to the cached book for the shared dictionary, as
+        used by the batch solve functions.
+    hard_mode: boolean
+        if set to true, every guess uses the hints revealed so far.
+
+    Returns
+    ----------
+    numpy.ndarray
+        uint8 array of the number of attempts taken for each word.
+    list of list of str
+        the guesses made for each word.
+    '''
+    if word_dictionary is None:
+        word_dictionary = dictionary.load_dictionary()
+        if opening_book is None:
+            opening_book = opening.load_opening_book(strategy)
+    answer_indices = np.array([word_dictionary.index[word]
+                               for word in answers], dtype=int)
+
+    num_attempts = np.zeros(len(answer_indices), dtype=np.uint8)
+    guess_sequences = [[] for word in answers]
+
+    for start in range(0, len(answer_indices), batch_size):
+        batch_attempts, batch_guesses = _solve_lockstep(
+            answer_indices[start:start + batch_size], strategy,
+            pattern_matrix, word_dictionary, max_turns, opening_book,
+            hard_mode)
+        num_attempts[start:start + len(batch_attempts)] = batch_attempts
+        for i, guesses in enumerate(batch_guesses):
+            guess_sequences[start + i] = [word_dictionary.words[guess]
+                                          for guess in guesses]
+
+    return num_attempts, guess_sequences
+
+
+def _solve_lockstep(answer_indices, strategy, pattern_matrix,
+                    word_dictionary, max_turns, opening_book, hard_mode):
+    '''
+    Plays one batch of games in lockstep for solve_batch, returning the
+    attempts and the guess indices for each game.
+    '''
+    num_games = len(answer_indices)
+    num_words = len(word_dictionary)
+    num_letters = word_dictionary.num_letters.shape[1]
+    word_length = word_dictionary.codes.shape[1]
+    games = np.arange(num_games)
+
+    viable = np.ones((num_games, num_words), dtype=bool)
+    minnum_letters = np.zeros((num_games, num_letters), dtype=np.uint8)
+    maxnum_letters = np.full((num_games, num_letters), word_length,
+                             dtype=np.uint8)
+    if hard_mode:
+        legal = np.ones((num_games, num_words), dtype=bool)
+        # The code of the known letter in each position, or -1.
+        known_codes = np.full((num_games, word_length), -1, dtype=np.int16)
+    # Games with the same group number have the same feedback history.
+    groups = np.zeros(num_games, dtype=int)
+    active = np.ones(num_games, dtype=bool)
+
+    num_attempts = np.zeros(num_games, dtype=np.uint8)
+    guesses = [[] for game in games]
+
+    for turn in range(max_turns):
+        if not np.any(active):
+            break
+        active_games = games[active]
+
+        # Compute one guess for each group, using the state of its first
+        # game.
+        group_numbers, first_games, group_of_game = np.unique(
+            groups[active_games], return_index=True, return_inverse=True)
+        group_guesses = np.empty(len(group_numbers), dtype=int)
+        for i, game in enumerate(active_games[first_games]):
+            solver_instance = solver.WordleSolver(
+                true_word=word_dictionary.words[answer_indices[game]],
+                suppress_info=True, pattern_matrix=pattern_matrix,
+                word_dictionary=word_dictionary, opening_book=opening_book,
+                hard_mode=hard_mode)
+            solver_instance.viable_indices = np.flatnonzero(viable[game])
+            solver_instance.minnum_letters = minnum_letters[game]
+            solver_instance.maxnum_letters = maxnum_letters[game]
+            solver_instance.num_attempts = turn
+            if hard_mode:
+                solver_instance.hard_mode_indices = np.flatnonzero(
+                    legal[game]).astype(word_dictionary.index_dtype)
+                solver_instance.known_letters = [
+                    word_dictionary.alphabet[code] if code >= 0 else '*'
+                    for code in known_codes[game]]
+            group_guesses[i] = word_dictionary.index[
+                solver_instance.suggest_guess(strategy)]
+
+        if pattern_matrix is not None:
+            group_patterns = pattern_matrix[group_guesses]
+        else:
+            group_patterns = patterns.compute_patterns(
+                word_dictionary.codes[group_guesses], word_dictionary.codes)
+
+        # Apply the feedback to every active game at once.
+        game_guesses = group_guesses[group_of_game]
+        game_pattern_rows = group_patterns[group_of_game]
+        game_patterns = game_pattern_rows[
+            np.arange(len(active_games)), answer_indices[active_games]]
+
+        viable[active_games] &= game_pattern_rows == game_patterns[:, None]
+        _update_letter_counts(word_dictionary.codes[game_guesses],
+                              game_patterns, minnum_letters, maxnum_letters,
+                              active_games)
+        if hard_mode:
+            _update_legal_guesses(word_dictionary,
+                                  word_dictionary.codes[game_guesses],
+                                  game_patterns, minnum_letters, legal,
+                                  known_codes, active_games)
+
+        for game, guess in zip(active_games, game_guesses):
+            guesses[game].append(guess)
+        num_attempts[active_games] = turn + 1
+
+        solved = game_patterns == word_dictionary.all_correct
+        active[active_games[solved]] = False
+        groups[active_games] = (group_of_game * word_dictionary.num_patterns
+                                + game_patterns)
+
+    return num_attempts, guesses
+
+
+def _update_letter_counts(guess_codes, game_patterns, minnum_letters,
+                          maxnum_letters, games):
+    '''
+    Updates the minimum and maximum letter counts of the given games from
+    the feedback patterns of their guesses, as WordleSolver does for one
+    game.
+    '''
+    num_games, word_length = guess_codes.shape
+    rows = np.arange(num_games)
+    guess_num_letters = np.zeros((num_games, minnum_letters.shape[1]),
+                                 dtype=np.uint8)
+    marked_num_letters = np.zeros_like(guess_num_letters)
+
+    for i in range(word_length):
+        feedback = (game_patterns // 3 ** i) % 3
+        np.add.at(guess_num_letters, (rows, guess_codes[:, i]), 1)
+        np.add.at(marked_num_letters, (rows, guess_codes[:, i]),
+                  feedback != patterns.ABSENT)
+
+    minnum_letters[games] = np.maximum(minnum_letters[games],
+                                       marked_num_letters)
+    maxnum_letters[games] = np.where(marked_num_letters < guess_num_letters,
+                                     marked_num_letters,
+                                     maxnum_letters[games])
+
+
+def _update_legal_guesses(word_dictionary, guess_codes, game_patterns,
+                          minnum_letters, legal, known_codes, games):
+    '''
+    Updates the known letters and the mask of the guesses allowed in hard
+    mode for the given games, as WordleSolver does for one game. A guess
+    must have each known letter in its position, and at least the minimum
+    number of each letter.
+    '''
+    game_legal = legal[games]
+    for i in range(guess_codes.shape[1]):
+        correct = (game_patterns // 3 ** i) % 3 == patterns.CORRECT
+        known_codes[games[correct], i] = guess_codes[correct, i]
+        game_known_codes = known_codes[games, i]
+        game_legal &= ((game_known_codes[:, None] < 0)
+                       | (word_dictionary.codes[:, i][None, :]
+                          == game_known_codes[:, None]))
+
+    game_minnum_letters = minnum_letters[games]
+    for letter in range(minnum_letters.shape[1]):
+        game_legal &= (word_dictionary.num_letters[:, letter][None, :]
+                       >= game_minnum_letters[:, letter][:, None])
+    legal[games] = game_legal
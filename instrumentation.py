@@ -0,0 +1,281 @@
+'''
+This module contains the opt-in instrumentation of WordleSolver. A
+SolverStats object given to a solver records the wall time of each
+phase of every turn, the number of viable words left after each guess,
+where each suggestion came from, and optionally the memory allocated in
+each phase. A callback can be given to receive each event as it
+happens. A solver without stats only checks that its stats attribute is
+None, so the instrumentation costs almost nothing when it is not used.
+
+The phases are:
+
+    suggestion
+        choosing a guess with suggest_guess, including the lookups in
+        the opening book and the suggestion cache.
+    scoring
+        scoring the possible guesses, which is part of the suggestion
+        when it is not looked up.
+    filter
+        updating the known letters and finding the viable words after
+        the feedback for a guess.
+
+Contains:
+----------------------------------------
+    PHASES
+        The names of the phases which are timed.
+    SUGGESTION_SOURCES
+        Where a suggestion can come from.
+    timed_phase
+        Decorates a solver method so that its calls are timed as a phase.
+    SolverStats
+        Records the phases, guesses and suggestions of many games.
+'''
+
+import collections
+import functools
+import time
+import tracemalloc
+
+import numpy as np
+
+PHASES = ('suggestion', 'scoring', 'filter')
+SUGGESTION_SOURCES = ('book', 'cache_hit', 'cache_miss', 'uncached')
+
+
+def _traced_memory():
+    '''
+    Returns the memory traced now and its peak since the last call, and
+    starts measuring a new peak. Before Python 3.9 the peak cannot be
+    reset, so only the memory traced at each phase boundary is seen and
+    temporary arrays freed within a phase are not counted.
+    '''
+    current, peak = tracemalloc.get_traced_memory()
+    if not hasattr(tracemalloc, 'reset_peak'):
+        return current, current
+    tracemalloc.reset_peak()
+    return current, peak
+
+
+def timed_phase(name):
+    '''
+    Returns a decorator for methods of a class with a stats attribute,
+    which times each call of the method as the named phase if stats is
+    not None.
+    '''
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.stats is None:
+                return method(self, *args, **kwargs)
+            with self.stats.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _Phase():
+
+    def __init__(self, stats, name):
+        '''
+        A phase which is being timed.
+        '''
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.stats._enter_phase(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats._exit_phase(self.name)
+        return False
+
+
+class SolverStats():
+
+    def __init__(self, callback=None, track_allocations=False):
+        '''
+        Initialise empty stats. One SolverStats may be shared by every
+        solver in a process, one game at a time.
+
+        Parameters
+        ----------
+        callback: function
+            called with a dict describing each event: the end of a
+            phase, a guess, or a suggestion. every event has 'event',
+            'game' and 'turn' keys.
+        track_allocations: boolean
+            if set to true, the peak memory allocated in each phase is
+            recorded with tracemalloc, which is started if it is not
+            already tracing. this slows the solver down considerably.
+        '''
+        self.callback = callback
+        self.track_allocations = track_allocations
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        self.turns = []
+        self.suggestion_sources = collections.Counter()
+        self.num_games = 0
+        self._current = None
+        self._depth = collections.Counter()
+        self._started = {}
+        # The memory at the start of each open phase, and the peak since.
+        self._allocations = {}
+
+    def __getstate__(self):
+        '''
+        Returns the state to pickle, without the callback or the phases
+        which are being timed, so that stats can be returned by worker
+        processes.
+        '''
+        state = self.__dict__.copy()
+        state.update(callback=None, _current=None,
+                     _depth=collections.Counter(), _started={},
+                     _allocations={})
+        return state
+
+    def start_game(self, num_viable):
+        '''
+        Starts recording a new game, which has num_viable viable words
+        before its first guess.
+        '''
+        self.num_games += 1
+        self._new_turn(1, num_viable)
+
+    def _new_turn(self, turn, num_viable_before):
+        '''
+        Starts recording a turn of the current game.
+        '''
+        self._current = {'game': self.num_games - 1, 'turn': turn,
+                         'num_viable_before': num_viable_before,
+                         'times': dict.fromkeys(PHASES, 0.0),
+                         'allocated': dict.fromkeys(PHASES, 0)}
+
+    def _emit(self, event, **details):
+        '''
+        Passes an event to the callback, if there is one.
+        '''
+        if self.callback is not None:
+            self.callback({'event': event, 'game': self._current['game'],
+                           'turn': self._current['turn'], **details})
+
+    def phase(self, name):
+        '''
+        Returns a context manager which times its body as the named phase
+        of the current turn. A phase which is entered again before it
+        exits is only timed once.
+        '''
+        return _Phase(self, name)
+
+    def _enter_phase(self, name):
+        self._depth[name] += 1
+        if self._depth[name] > 1:
+            return
+        if self.track_allocations:
+            current, peak = _traced_memory()
+            for allocation in self._allocations.values():
+                allocation[1] = max(allocation[1], peak)
+            self._allocations[name] = [current, current]
+        self._started[name] = time.perf_counter()
+
+    def _exit_phase(self, name):
+        self._depth[name] -= 1
+        if self._depth[name] > 0:
+            return
+        elapsed = time.perf_counter() - self._started.pop(name)
+        allocated = 0
+        if self.track_allocations:
+            current, peak = _traced_memory()
+            for allocation in self._allocations.values():
+                allocation[1] = max(allocation[1], peak)
+            start, peak = self._allocations.pop(name)
+            allocated = peak - start
+
+        if self._current is not None:
+            self._current['times'][name] += elapsed
+            self._current['allocated'][name] = max(
+                self._current['allocated'][name], allocated)
+            self._emit('phase', phase=name, elapsed=elapsed,
+                       allocated=allocated)
+
+    def record_suggestion(self, source, guess):
+        '''
+        Records where a suggestion came from: one of SUGGESTION_SOURCES.
+        '''
+        self.suggestion_sources[source] += 1
+        if self._current is not None:
+            self._emit('suggestion', source=source, guess=guess)
+
+    def record_guess(self, guess, pattern, num_viable):
+        '''
+        Records a guess, its feedback pattern and the number of viable
+        words left after it, and starts the next turn.
+        '''
+        if self._current is None:
+            return
+        turn = self._current
+        turn.update(guess=guess, pattern=pattern, num_viable=num_viable)
+        self.turns.append(turn)
+        self._emit('guess', guess=guess, pattern=pattern,
+                   num_viable=num_viable)
+        self._new_turn(turn['turn'] + 1, num_viable)
+
+    def merge(self, other):
+        '''
+        Adds the games recorded by another SolverStats, e.g. from a worker
+        process, to these stats.
+        '''
+        for turn in other.turns:
+            self.turns.append({**turn, 'game': turn['game'] + self.num_games})
+        self.num_games += other.num_games
+        self.suggestion_sources.update(other.suggestion_sources)
+
+    @property
+    def cache_hit_rate(self):
+        '''
+        The fraction of the suggestions looked up in a suggestion cache
+        which were found, or None if there were no lookups.
+        '''
+        lookups = (self.suggestion_sources['cache_hit']
+                   + self.suggestion_sources['cache_miss'])
+        if lookups == 0:
+            return None
+        return self.suggestion_sources['cache_hit'] / lookups
+
+    def turn_summary(self):
+        '''
+        Summarises the recorded turns by turn number.
+
+        Returns
+        ----------
+        list of dict
+            for each turn number, the number of games which made that
+            guess, the 50th and 95th percentile time of each phase in
+            milliseconds, the mean peak memory allocated in each phase in
+            kilobytes, the mean number of viable words before and after
+            the guess, and the median fraction of the viable words left
+            by the guess.
+        '''
+        by_turn = collections.defaultdict(list)
+        for turn in self.turns:
+            by_turn[turn['turn']].append(turn)
+
+        summary = []
+        for number in sorted(by_turn):
+            turns = by_turn[number]
+            row = {'turn': number, 'games': len(turns)}
+            for name in PHASES:
+                milliseconds = 1000 * np.array([turn['times'][name]
+                                                for turn in turns])
+                row[f'{name}_p50_ms'] = float(np.percentile(milliseconds, 50))
+                row[f'{name}_p95_ms'] = float(np.percentile(milliseconds, 95))
+                row[f'{name}_kb'] = float(np.mean(
+                    [turn['allocated'][name] for turn in turns])) / 1024
+            before = np.array([turn['num_viable_before'] for turn in turns])
+            after = np.array([turn['num_viable'] for turn in turns])
+            row['viable_before'] = float(np.mean(before))
+            row['viable_after'] = float(np.mean(after))
+            row['shrinkage'] = float(np.median(after / before))
+            summary.append(row)
+        return summary
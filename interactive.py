@@ -1,6 +1,7 @@
 '''
 This script can be executed from the command line with Python3 in
-order to play Wordle interactively.
+order to play Wordle interactively, or to be given suggestions for a
+game being played elsewhere by entering the feedback for each guess.
 
     >>> python3 interactive.py
 '''
@@ -16,11 +17,18 @@ print('--------------------------------------------------------------')
 print(' ')
 print('Welcome to the interactive wordle-solver.')
 print(' ')
-print('Would you like suggestions? (Y/N)')
-suggest = input()
-if suggest.lower() == 'y':
-    suggest = True
+print('Are you playing a game elsewhere and entering its feedback? (Y/N)')
+assisted = input()
+print('Would you like to play in hard mode? (Y/N)')
+hard_mode = input().lower() == 'y'
+if assisted.lower() == 'y':
+    userfunctions.assisted_solve(hard_mode=hard_mode)
 else:
-    suggest = False
+    print('Would you like suggestions? (Y/N)')
+    suggest = input()
+    if suggest.lower() == 'y':
+        suggest = True
+    else:
+        suggest = False
 
-userfunctions.interactive_solve(suggest=suggest)
+    userfunctions.interactive_solve(suggest=suggest, hard_mode=hard_mode)
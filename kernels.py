@@ -0,0 +1,463 @@
+'''
+This module contains the kernels behind the hot paths of the solver:
+computing feedback patterns, filtering the viable words and counting
+the histogram of patterns for each guess. Each kernel has a NumPy
+implementation, and a compiled implementation which is used if Numba is
+installed. The compiled kernels loop over the words without allocating
+a temporary array for every mask, and can build pattern tables in
+parallel over the guesses.
+
+The backend is selected when the module is imported: 'numba' if Numba
+can be imported, otherwise 'numpy'. The WORDLE_KERNELS environment
+variable can be set to 'numpy' to force the fallback. Numba itself is
+only imported, and the kernels only compiled, the first time a compiled
+kernel is called. Both backends give bit-identical results.
+
+Contains:
+----------------------------------------
+    Kernels
+        The kernel functions of a backend.
+    load_kernels
+        Returns the kernels of a backend, loading them the first time.
+    set_backend
+        Selects the backend used by the functions below.
+    compute_patterns
+        Computes the feedback pattern for every (guess, answer) pair.
+    filter_by_pattern
+        Finds the answers which give a feedback pattern for a guess.
+    filter_by_letters
+        Finds the words which agree with the known letters.
+    pattern_histograms
+        Counts the patterns of each guess, optionally weighted.
+    histogram_entropy
+        Computes the entropy of histograms of patterns.
+'''
+
+import collections
+import functools
+import importlib.util
+import os
+
+import numpy as np
+
+# The feedback values of a present and a correct letter, as in the
+# patterns module.
+PRESENT = 1
+CORRECT = 2
+
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+BACKENDS = ('numba', 'numpy')
+
+Kernels = collections.namedtuple(
+    'Kernels', ['compute_patterns', 'filter_by_pattern', 'filter_by_letters',
+                'pattern_histograms'])
+
+
+def _numpy_compute_patterns(guess_codes, answer_codes, out, alphabet_size,
+                            block_size=32, parallel=False):
+    '''
+    Writes the pattern of every (guess, answer) pair to out, comparing
+    a block of guesses with every answer at once.
+    '''
+    num_guesses, word_length = guess_codes.shape
+    num_answers = answer_codes.shape[0]
+    dtype = out.dtype.type
+
+    # Number of each letter in each answer, indexed [letter, answer].
+    # Each answer appears once per position, so no index is repeated.
+    answer_counts = np.zeros((alphabet_size, num_answers), dtype=np.uint8)
+    answers = np.arange(num_answers)
+    for j in range(word_length):
+        answer_counts[answer_codes[:, j], answers] += 1
+    answer_columns = np.ascontiguousarray(answer_codes.T)
+
+    for start in range(0, num_guesses, block_size):
+        guesses = guess_codes[start:start + block_size]
+        green = [guesses[:, j, None] == answer_columns[j][None, :]
+                 for j in range(word_length)]
+        codes = np.zeros((guesses.shape[0], num_answers), dtype=dtype)
+
+        for i in range(word_length):
+            letter = guesses[:, i]
+            same_letter = guesses == letter[:, None]
+            # Occurrences of this letter in the answer which are not
+            # already accounted for by a green letter, and earlier
+            # non-green occurrences in the guess which use them up first.
+            available = answer_counts[letter]
+            used = np.zeros_like(available)
+            # Only the positions holding the same letter in some guess of
+            # the block are counted, which is usually only position i.
+            for j in np.flatnonzero(same_letter.any(axis=0)):
+                available -= green[j] & same_letter[:, j, None]
+                if j < i:
+                    used += ~green[j] & same_letter[:, j, None]
+
+            codes += green[i] * dtype(CORRECT * 3 ** i)
+            codes += (~green[i] & (available > used)) * dtype(
+                PRESENT * 3 ** i)
+
+        out[start:start + block_size] = codes
+
+
+def _numpy_filter_by_pattern(guess_code, codes, indices, pattern,
+                             alphabet_size):
+    '''
+    Returns a mask of the indexed words which give the pattern when the
+    guess is played against them.
+    '''
+    row = np.empty((1, len(indices)), dtype=np.uint32)
+    _numpy_compute_patterns(guess_code[None, :], codes[indices], row,
+                            alphabet_size)
+    return row[0] == pattern
+
+
+def _numpy_filter_by_letters(codes, num_letters, indices, minnum_letters,
+                             maxnum_letters, known_codes, false_letters):
+    '''
+    Returns a mask of the indexed words which have between the minimum
+    and maximum number of each letter, the known letter at each position
+    where it is known, and none of the false letters of each position.
+    '''
+    viable_codes = codes[indices]
+    viable_num_letters = num_letters[indices]
+
+    # The limits are converted to the type of the counts, which is
+    # faster than converting every count.
+    count_dtype = viable_num_letters.dtype
+    mask = np.all(viable_num_letters >= minnum_letters.astype(count_dtype),
+                  axis=1)
+    mask &= np.all(viable_num_letters <= maxnum_letters.astype(count_dtype),
+                   axis=1)
+
+    for j in np.flatnonzero(known_codes >= 0):
+        mask &= viable_codes[:, j] == known_codes[j]
+
+    positions = np.arange(len(known_codes))
+    mask &= ~np.any(false_letters[positions, viable_codes], axis=1)
+    return mask
+
+
+def _numpy_pattern_histograms(pattern_block, num_patterns, weights=None):
+    '''
+    Returns the number of answers giving each pattern for each guess,
+    or their total weight, counting the whole block with one bincount.
+    '''
+    num_guesses = pattern_block.shape[0]
+    offsets = np.arange(num_guesses, dtype=np.int64) * num_patterns
+    bins = (pattern_block + offsets[:, None]).ravel()
+    if weights is not None:
+        weights = np.tile(weights, num_guesses)
+    return np.bincount(bins, weights=weights,
+                       minlength=num_guesses * num_patterns).reshape(
+                           num_guesses, num_patterns)
+
+
+def _load_numba_kernels():
+    '''
+    Imports Numba and defines the compiled kernels. They are compiled the
+    first time they are called with each type of arguments.
+    '''
+    import numba
+
+    # The worker pools of this package fork the process. A process which
+    # forks after starting a TBB pool can hang when it exits, so Numba's
+    # own pool is used unless another is chosen with
+    # NUMBA_THREADING_LAYER.
+    if 'NUMBA_THREADING_LAYER' not in os.environ:
+        numba.config.THREADING_LAYER = 'workqueue'
+
+    @numba.njit(cache=True, nogil=True)
+    def score_pair(guess, answer, counts):
+        # The letters of the answer which are not matched by a green
+        # letter are counted first, and used up by the guess from left
+        # to right. counts is left as zeros.
+        word_length = guess.shape[0]
+        for j in range(word_length):
+            if guess[j] != answer[j]:
+                counts[answer[j]] += 1
+        code = 0
+        place = 1
+        for j in range(word_length):
+            if guess[j] == answer[j]:
+                code += CORRECT * place
+            elif counts[guess[j]] > 0:
+                counts[guess[j]] -= 1
+                code += PRESENT * place
+            place *= 3
+        for j in range(word_length):
+            counts[answer[j]] = 0
+        return code
+
+    def pattern_rows(guess_codes, answer_codes, out, alphabet_size):
+        for g in numba.prange(guess_codes.shape[0]):
+            counts = np.zeros(alphabet_size, dtype=np.int32)
+            for a in range(answer_codes.shape[0]):
+                out[g, a] = score_pair(guess_codes[g], answer_codes[a],
+                                       counts)
+
+    # The rows are only split between threads for whole tables. The
+    # patterns for a game are computed serially, which is faster for
+    # small tables and starts no threads.
+    serial_rows = numba.njit(cache=True, nogil=True)(pattern_rows)
+    parallel_rows = numba.njit(cache=True, nogil=True,
+                               parallel=True)(pattern_rows)
+
+    def compute_patterns(guess_codes, answer_codes, out, alphabet_size,
+                         block_size=32, parallel=False):
+        rows = parallel_rows if parallel else serial_rows
+        rows(guess_codes, answer_codes, out, alphabet_size)
+
+    @numba.njit(cache=True, nogil=True)
+    def filter_by_pattern(guess_code, codes, indices, pattern,
+                          alphabet_size):
+        counts = np.zeros(alphabet_size, dtype=np.int32)
+        mask = np.empty(len(indices), dtype=np.bool_)
+        for k in range(len(indices)):
+            mask[k] = score_pair(guess_code, codes[indices[k]],
+                                 counts) == pattern
+        return mask
+
+    @numba.njit(cache=True, nogil=True)
+    def filter_by_letters(codes, num_letters, indices, minnum_letters,
+                          maxnum_letters, known_codes, false_letters):
+        mask = np.empty(len(indices), dtype=np.bool_)
+        for k in range(len(indices)):
+            word = indices[k]
+            viable = True
+            for letter in range(num_letters.shape[1]):
+                count = num_letters[word, letter]
+                if (count < minnum_letters[letter]
+                        or count > maxnum_letters[letter]):
+                    viable = False
+                    break
+            if viable:
+                for j in range(codes.shape[1]):
+                    code = codes[word, j]
+                    if ((known_codes[j] >= 0 and code != known_codes[j])
+                            or false_letters[j, code]):
+                        viable = False
+                        break
+            mask[k] = viable
+        return mask
+
+    @numba.njit(cache=True, nogil=True)
+    def count_patterns(pattern_block, num_patterns):
+        counts = np.zeros((pattern_block.shape[0], num_patterns),
+                          dtype=np.int64)
+        for g in range(pattern_block.shape[0]):
+            for a in range(pattern_block.shape[1]):
+                counts[g, pattern_block[g, a]] += 1
+        return counts
+
+    @numba.njit(cache=True, nogil=True)
+    def weigh_patterns(pattern_block, num_patterns, weights):
+        totals = np.zeros((pattern_block.shape[0], num_patterns))
+        for g in range(pattern_block.shape[0]):
+            for a in range(pattern_block.shape[1]):
+                totals[g, pattern_block[g, a]] += weights[a]
+        return totals
+
+    def pattern_histograms(pattern_block, num_patterns, weights=None):
+        pattern_block = np.ascontiguousarray(pattern_block)
+        if weights is None:
+            return count_patterns(pattern_block, num_patterns)
+        return weigh_patterns(pattern_block, num_patterns,
+                              np.ascontiguousarray(weights, dtype=float))
+
+    return Kernels(compute_patterns, filter_by_pattern, filter_by_letters,
+                   pattern_histograms)
+
+
+@functools.lru_cache(maxsize=None)
+def load_kernels(backend):
+    '''
+    Returns the kernels of a backend, importing and defining them the
+    first time they are requested.
+
+    Parameters
+    ----------
+    backend: str
+        'numba' or 'numpy'.
+
+    Returns
+    ----------
+    Kernels
+        the kernel functions.
+    '''
+    if backend == 'numpy':
+        return Kernels(_numpy_compute_patterns, _numpy_filter_by_pattern,
+                       _numpy_filter_by_letters, _numpy_pattern_histograms)
+    if backend == 'numba':
+        if not NUMBA_AVAILABLE:
+            raise ValueError('The numba backend needs Numba to be '
+                             'installed.')
+        return _load_numba_kernels()
+    raise ValueError(f'Unknown kernel backend \'{backend}\'. Choose from '
+                     f'{", ".join(BACKENDS)}.')
+
+
+def set_backend(backend=None):
+    '''
+    Selects the backend used by the kernel functions of this module.
+
+    Parameters
+    ----------
+    backend: str
+        'numba' or 'numpy'. if None, Numba is used if it is installed.
+    '''
+    global BACKEND
+    if backend is None:
+        backend = 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown kernel backend \'{backend}\'. Choose from '
+                         f'{", ".join(BACKENDS)}.')
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ValueError('The numba backend needs Numba to be installed.')
+    BACKEND = backend
+
+
+set_backend(os.environ.get('WORDLE_KERNELS') or None)
+
+
+def compute_patterns(guess_codes, answer_codes, out, alphabet_size,
+                     block_size=32, parallel=False):
+    '''
+    Computes the feedback pattern for every (guess, answer) pair, with
+    the green-first rule for repeated letters.
+
+    Parameters
+    ----------
+    guess_codes: numpy.ndarray
+        uint8 letter codes of the guesses, shape (num_guesses, word
+        length).
+    answer_codes: numpy.ndarray
+        uint8 letter codes of the answers, shape (num_answers, word
+        length).
+    out: numpy.ndarray
+        the array of shape (num_guesses, num_answers) the base-3 pattern
+        codes are written to.
+    alphabet_size: int
+        one more than the largest letter code.
+    block_size: int
+        the number of guesses compared at once by the NumPy backend.
+    parallel: boolean
+        whether the Numba backend splits the guesses between threads.
+        this is only worthwhile for whole pattern tables.
+    '''
+    load_kernels(BACKEND).compute_patterns(guess_codes, answer_codes, out,
+                                           alphabet_size, block_size,
+                                           parallel)
+
+
+def filter_by_pattern(guess_code, codes, indices, pattern, alphabet_size):
+    '''
+    Finds the words which give a feedback pattern when a guess is played
+    against them, without keeping the pattern of every word.
+
+    Parameters
+    ----------
+    guess_code: numpy.ndarray
+        uint8 letter codes of the guess.
+    codes: numpy.ndarray
+        uint8 letter codes of every word in the dictionary.
+    indices: numpy.ndarray
+        the indices of the words to check.
+    pattern: int
+        the base-3 pattern code observed for the guess.
+    alphabet_size: int
+        one more than the largest letter code.
+
+    Returns
+    ----------
+    numpy.ndarray
+        boolean mask of the indexed words which give the pattern.
+    '''
+    return load_kernels(BACKEND).filter_by_pattern(guess_code, codes,
+                                                   indices, pattern,
+                                                   alphabet_size)
+
+
+def filter_by_letters(codes, num_letters, indices, minnum_letters,
+                      maxnum_letters, known_codes, false_letters):
+    '''
+    Finds the words which agree with what is known about the letters of
+    the true word.
+
+    Parameters
+    ----------
+    codes: numpy.ndarray
+        uint8 letter codes of every word in the dictionary.
+    num_letters: numpy.ndarray
+        the number of each letter in every word in the dictionary.
+    indices: numpy.ndarray
+        the indices of the words to check.
+    minnum_letters: numpy.ndarray
+        the minimum number of each letter.
+    maxnum_letters: numpy.ndarray
+        the maximum number of each letter.
+    known_codes: numpy.ndarray
+        the code of the known letter at each position, or -1 if it is not
+        known.
+    false_letters: numpy.ndarray
+        boolean array of shape (word length, alphabet size), true where
+        a letter is known not to be at a position.
+
+    Returns
+    ----------
+    numpy.ndarray
+        boolean mask of the indexed words which agree with the letters.
+    '''
+    return load_kernels(BACKEND).filter_by_letters(
+        codes, num_letters, indices, minnum_letters, maxnum_letters,
+        known_codes, false_letters)
+
+
+def pattern_histograms(pattern_block, num_patterns, weights=None):
+    '''
+    Counts the number of answers which give each pattern for each guess.
+
+    Parameters
+    ----------
+    pattern_block: numpy.ndarray
+        the patterns of each guess against each answer, shape
+        (num_guesses, num_answers).
+    num_patterns: int
+        the number of possible patterns.
+    weights: numpy.ndarray
+        the weight of each answer. if given, the total weight of the
+        answers giving each pattern is returned instead of their number.
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of shape (num_guesses, num_patterns), of int64 counts or
+        float64 weights.
+    '''
+    return load_kernels(BACKEND).pattern_histograms(pattern_block,
+                                                    num_patterns, weights)
+
+
+def histogram_entropy(histograms, total):
+    '''
+    Computes the entropy, in bits, of histograms of patterns, i.e. the
+    expected information gained from a guess which splits the answers
+    into parts of the given sizes or weights.
+
+    Parameters
+    ----------
+    histograms: numpy.ndarray
+        the number or total weight of the answers giving each pattern,
+        with the patterns along the last axis, e.g. as returned by
+        pattern_histograms.
+    total: float or numpy.ndarray
+        the number or total weight of the answers in each histogram.
+        must broadcast against the histograms without their last axis.
+
+    Returns
+    ----------
+    numpy.ndarray
+        the entropy of each histogram.
+    '''
+    part_information = histograms * np.log2(
+        np.where(histograms > 0, histograms, 1))
+    return np.log2(total) - part_information.sum(axis=-1) / total
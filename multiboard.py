@@ -0,0 +1,502 @@
+'''
+This module contains a solver for the multi-board variants of Wordle,
+such as Dordle (2 boards), Quordle (4 boards) and Octordle (8 boards),
+where every guess is played on every board at once. It can also be
+executed from the command line with Python3 in order to report the
+number of guesses needed for each number of boards.
+
+    >>> python3 multiboard.py --boards 2 4 8 --games 200 --workers 8
+
+The boards share one dictionary, and the viable words of every board
+are kept as the rows of one boolean mask. Each guess is scored against
+all of the unsolved boards at once, by summing the entropy of its
+feedback patterns on each board, and the feedback for every board is
+applied with one comparison of the guess's patterns.
+
+Contains:
+----------------------------------------
+    BOARD_ATTEMPTS
+        The number of guesses allowed for the usual numbers of boards.
+    MultiBoardSolver
+        Solves several boards at once with shared guesses.
+    multiboard_batch_solve
+        Solves a game for given true words and returns the number of
+        guesses taken.
+    evaluate_boards
+        Plays many games with random true words for a number of boards
+        and returns the number of guesses taken for each game.
+'''
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import dictionary
+import kernels
+import patterns
+import solver
+
+# The number of guesses allowed in Dordle, Quordle and Octordle.
+BOARD_ATTEMPTS = {1: 6, 2: 7, 4: 9, 8: 13}
+
+
+class MultiBoardSolver():
+
+    def __init__(self,
+                 num_boards=4,
+                 true_words=None,
+                 wordlist_path=r'all_words.txt',
+                 suppress_info=False,
+                 pattern_matrix=None,
+                 word_dictionary=None,
+                 num_candidates=256
+                 ):
+        '''
+        Initialise the solver with every word viable on every board.
+
+        Parameters
+        ----------
+        num_boards: int
+            the number of boards. ignored if true_words is given.
+        true_words: list of str
+            the answer for each board. if None, the answers are not known
+            and the solver can only be given feedback with
+            process_feedback.
+        wordlist_path: str
+            the path for the wordlist.
+        suppress_info: boolean
+            if set to true, will stop most information from being printed.
+        pattern_matrix: numpy.ndarray
+            the guess x answer pattern matrix for the wordlist. if given,
+            the patterns of each guess are read from it.
+        word_dictionary: dictionary.Dictionary
+            the dictionary of allowed words. defaults to the shared
+            dictionary for wordlist_path.
+        num_candidates: int
+            the number of guesses, chosen by their letters, which are
+            scored by entropy each turn. the viable words are also scored
+            once there are no more than this many.
+        '''
+        if word_dictionary is None:
+            word_dictionary = dictionary.load_dictionary(wordlist_path)
+        self.dictionary = word_dictionary
+        self.suppress_info = suppress_info
+        self.pattern_matrix = pattern_matrix
+        self.num_candidates = num_candidates
+
+        if true_words is not None:
+            true_words = [word.replace(' ', '').lower()
+                          for word in true_words]
+            for word in true_words:
+                if word not in self.dictionary:
+                    raise ValueError(f'Input word \'{word}\' is not in the '
+                                     f'Wordle dictionary.')
+            num_boards = len(true_words)
+            self.true_indices = np.array(
+                [self.dictionary.index[word] for word in true_words])
+        else:
+            self.true_indices = None
+        if num_boards < 1:
+            raise ValueError('There must be at least one board.')
+        self.true_words = true_words
+        self.num_boards = num_boards
+
+        self.viable = np.ones((num_boards, len(self.dictionary)), dtype=bool)
+        self.solved = np.zeros(num_boards, dtype=bool)
+        self.num_attempts = 0
+        self.guess_history = []
+
+    @property
+    def unsolved_boards(self):
+        '''
+        The numbers of the boards which have not been solved.
+        '''
+        return np.flatnonzero(~self.solved)
+
+    def viable_counts(self):
+        '''
+        Returns the number of viable words on each board.
+        '''
+        return np.count_nonzero(self.viable, axis=1)
+
+    def _guess_patterns(self, guess_indices, answer_indices):
+        '''
+        Returns the feedback patterns of the guesses against the answers,
+        read from the pattern_matrix attribute if it is set.
+        '''
+        if self.pattern_matrix is not None:
+            return self.pattern_matrix[np.ix_(guess_indices, answer_indices)]
+        return patterns.compute_patterns(self.dictionary.codes[guess_indices],
+                                         self.dictionary.codes[answer_indices])
+
+    def _sanitise_guess(self, guess):
+        '''
+        Returns the guess in lower case, raising a ValueError if it is not
+        in the dictionary.
+        '''
+        sanitised_guess = guess.replace(' ', '').lower()
+        if sanitised_guess not in self.dictionary:
+            raise ValueError(f'{guess} is not a valid '
+                             f'{self.dictionary.word_length} letter word. '
+                             f'Guess not processed.')
+        return sanitised_guess
+
+    def process_guess(self, guess):
+        '''
+        Plays a guess on every board against the true words and updates
+        the viable words of each unsolved board.
+
+        Parameters
+        ----------
+        guess: str
+            the input word to be processed as a guess.
+
+        Returns
+        ----------
+        boolean
+            whether or not every board has been solved.
+        '''
+        if self.true_indices is None:
+            raise ValueError('The true words are not known, so the feedback '
+                             'must be given with process_feedback.')
+        guess = self._sanitise_guess(guess)
+        guess_index = self.dictionary.index[guess]
+        board_patterns = self._guess_patterns([guess_index],
+                                              self.true_indices)[0]
+        return self._record_feedback(guess, guess_index, board_patterns)
+
+    def process_feedback(self, guess, board_patterns):
+        '''
+        Takes a guess and the feedback pattern it was given on each board,
+        e.g. by a game being played elsewhere, and updates the viable words
+        of each unsolved board.
+
+        Parameters
+        ----------
+        guess: str
+            the input word which was guessed.
+        board_patterns: list of str or int
+            the feedback for the guess on each board, as for
+            patterns.parse_pattern. the feedback of solved boards is
+            ignored and may be None.
+
+        Returns
+        ----------
+        boolean
+            whether or not every board has been solved.
+        '''
+        if len(board_patterns) != self.num_boards:
+            raise ValueError(f'Feedback must be given for each of the '
+                             f'{self.num_boards} boards.')
+        guess = self._sanitise_guess(guess)
+        guess_index = self.dictionary.index[guess]
+
+        word_length = self.dictionary.word_length
+        codes = np.full(self.num_boards, self.dictionary.all_correct)
+        for board in self.unsolved_boards:
+            codes[board] = patterns.parse_pattern(board_patterns[board],
+                                                  word_length)
+        return self._record_feedback(guess, guess_index, codes)
+
+    def _record_feedback(self, guess, guess_index, board_patterns):
+        '''
+        Applies the feedback pattern of a guess on each board to the
+        viable words of every unsolved board at once. Inconsistent
+        feedback raises a ValueError before anything is changed.
+
+        Returns
+        ----------
+        boolean
+            whether or not every board has been solved.
+        '''
+        unsolved = self.unsolved_boards
+        board_patterns = np.asarray(board_patterns)[unsolved]
+
+        # The guess is only compared with the words which are viable on
+        # some board, and every board is filtered by the same comparison.
+        columns = np.flatnonzero(np.any(self.viable[unsolved], axis=0))
+        guess_row = self._guess_patterns([guess_index], columns)[0]
+        viable = self.viable[np.ix_(unsolved, columns)] & (
+            guess_row[None, :] == board_patterns[:, None])
+
+        empty = ~np.any(viable, axis=1)
+        if np.any(empty):
+            position = np.argmax(empty)
+            feedback = patterns.pattern_to_string(
+                board_patterns[position], self.dictionary.word_length)
+            raise ValueError(
+                f'No viable word on board {unsolved[position] + 1} gives '
+                f'the feedback {feedback} for {guess}. Feedback not '
+                f'processed.')
+
+        self.viable[np.ix_(unsolved, columns)] = viable
+        self.num_attempts += 1
+        # Solved boards give no feedback, so they are recorded as None.
+        history_patterns = [None] * self.num_boards
+        for board, pattern in zip(unsolved, board_patterns):
+            history_patterns[board] = int(pattern)
+        self.guess_history.append((guess, history_patterns))
+        self.solved[unsolved[board_patterns
+                             == self.dictionary.all_correct]] = True
+
+        if not self.suppress_info:
+            feedback = ' '.join(
+                patterns.pattern_to_string(pattern,
+                                           self.dictionary.word_length)
+                for pattern in board_patterns)
+            print(f'{guess} {feedback}')
+            if np.all(self.solved):
+                print(f'You have successfully solved every board after '
+                      f'{self.num_attempts} attempts!')
+
+        return bool(np.all(self.solved))
+
+    def score_guesses(self, guess_indices, block_size=128):
+        '''
+        Scores guesses by the sum of the entropy of their feedback
+        patterns over the viable words of each unsolved board. The
+        patterns of a block of guesses are computed once against every
+        word which is viable on some board, and the histograms for every
+        guess and board are counted together by
+        kernels.pattern_histograms, treating the patterns on each board
+        as a separate range of patterns.
+
+        Parameters
+        ----------
+        guess_indices: numpy.ndarray
+            the indices of the guesses in the master wordlist.
+        block_size: int
+            the number of guesses scored at once. bounds the memory used.
+
+        Returns
+        ----------
+        entropy: numpy.ndarray
+            the total expected information, in bits, gained from each
+            guess over the unsolved boards.
+        expected_solved: numpy.ndarray
+            the expected number of boards each guess solves.
+        '''
+        unsolved = self.unsolved_boards
+        num_boards = len(unsolved)
+        num_patterns = self.dictionary.num_patterns
+        viable = self.viable[unsolved]
+        columns = np.flatnonzero(np.any(viable, axis=0))
+
+        # The position in columns of each board's viable words, and the
+        # offset of each board's patterns within a guess's histogram.
+        board_of_word, word_columns = np.nonzero(viable[:, columns])
+        board_offsets = (board_of_word * num_patterns).astype(np.int64)
+        board_sizes = np.count_nonzero(viable, axis=1)
+
+        entropy = np.empty(len(guess_indices))
+        for start in range(0, len(guess_indices), block_size):
+            block = guess_indices[start:start + block_size]
+            pattern_block = self._guess_patterns(block, columns)
+
+            counts = kernels.pattern_histograms(
+                pattern_block[:, word_columns] + board_offsets[None, :],
+                num_boards * num_patterns).reshape(len(block), num_boards,
+                                                   num_patterns)
+
+            entropy[start:start + len(block)] = kernels.histogram_entropy(
+                counts, board_sizes).sum(axis=1)
+
+        expected_solved = (viable[:, guess_indices]
+                           / board_sizes[:, None]).sum(axis=0)
+        return entropy, expected_solved
+
+    def candidate_guesses(self):
+        '''
+        Returns the indices of the guesses scored by suggest_guess. These
+        are the words with the most informative letters over the unsolved
+        boards, and the viable words if there are few enough of them.
+        '''
+        unsolved = self.unsolved_boards
+        presence_matrix = self.dictionary.presence_matrix
+        viable = self.viable[unsolved]
+        board_sizes = np.count_nonzero(viable, axis=1).astype(np.float32)
+
+        # A letter in half of a board's viable words is the most
+        # informative, and a letter in all or none of them tells nothing.
+        letter_fractions = (viable.astype(np.float32) @ presence_matrix) \
+            / board_sizes[:, None]
+        letter_scores = np.sum(letter_fractions * (1 - letter_fractions),
+                               axis=0)
+        word_scores = presence_matrix @ letter_scores
+
+        num_candidates = min(self.num_candidates, len(word_scores))
+        candidates = np.argpartition(-word_scores,
+                                     num_candidates - 1)[:num_candidates]
+
+        viable_words = np.flatnonzero(np.any(viable, axis=0))
+        if len(viable_words) <= self.num_candidates:
+            candidates = np.union1d(candidates, viable_words)
+        return np.sort(candidates)
+
+    def suggest_guess(self):
+        '''
+        Suggest a guess for every board. The first guess is the default
+        first guess of WordleSolver. Afterwards, a board with only one
+        viable word is solved first, otherwise the guess with the most
+        total entropy is suggested, preferring guesses which are likely
+        to solve a board.
+        '''
+        if self.num_attempts == 0:
+            return solver.WordleSolver(
+                suppress_info=True, word_dictionary=self.dictionary,
+                pattern_matrix=self.pattern_matrix
+            ).suggest_default_first_guess()
+
+        unsolved = self.unsolved_boards
+        board_sizes = np.count_nonzero(self.viable[unsolved], axis=1)
+        if np.any(board_sizes == 1):
+            board = unsolved[np.argmax(board_sizes == 1)]
+            return self.dictionary.words[np.argmax(self.viable[board])]
+
+        candidates = self.candidate_guesses()
+        entropy, expected_solved = self.score_guesses(candidates)
+        # Break ties between guesses with the same entropy in favour of
+        # the guess most likely to solve a board, then the first word.
+        best = np.lexsort((candidates, -expected_solved,
+                           -np.round(entropy, 9)))[0]
+        return self.dictionary.words[candidates[best]]
+
+
+def multiboard_batch_solve(true_words, suppress_info=False,
+                           word_dictionary=None, pattern_matrix=None):
+    '''
+    Function to solve a multi-board game for given true words.
+
+    Parameters
+    ----------
+    true_words: list of str
+        the answer for each board.
+    suppress_info: boolean
+        if set to true, will stop most information from being printed.
+    word_dictionary: dictionary.Dictionary
+        the dictionary of allowed words. defaults to the shared dictionary.
+    pattern_matrix: numpy.ndarray
+        the pattern matrix for the dictionary.
+
+    Returns
+    ----------
+    int
+        the number of guesses taken to solve every board.
+    '''
+    solver_instance = MultiBoardSolver(true_words=true_words,
+                                       suppress_info=suppress_info,
+                                       word_dictionary=word_dictionary,
+                                       pattern_matrix=pattern_matrix)
+    success = False
+    while not success:
+        success = solver_instance.process_guess(
+            solver_instance.suggest_guess())
+    return solver_instance.num_attempts
+
+
+def _init_worker(wordlist_path):
+    '''
+    Loads the shared dictionary when a worker process starts.
+    '''
+    dictionary.load_dictionary(wordlist_path)
+
+
+def _solve_games(num_boards, games, seed, wordlist_path):
+    '''
+    Plays the numbered games for evaluate_boards. The true words of each
+    game are drawn from the seed and the game number, so that the results
+    do not depend on how the games are split between workers.
+    '''
+    word_dictionary = dictionary.load_dictionary(wordlist_path)
+    num_attempts = np.zeros(len(games), dtype=np.uint8)
+    for i, game in enumerate(games):
+        random_state = np.random.default_rng([seed, num_boards, game])
+        true_indices = random_state.choice(len(word_dictionary), num_boards,
+                                           replace=False)
+        num_attempts[i] = multiboard_batch_solve(
+            [word_dictionary.words[index] for index in true_indices],
+            suppress_info=True, word_dictionary=word_dictionary)
+    return num_attempts
+
+
+def evaluate_boards(num_boards, num_games=100, workers=None, chunk_size=8,
+                    seed=0, wordlist_path=r'all_words.txt'):
+    '''
+    Plays games with random true words on a number of boards.
+
+    Parameters
+    ----------
+    num_boards: int
+        the number of boards in each game.
+    num_games: int
+        the number of games to play.
+    workers: int
+        the number of worker processes. if None, one worker is used per
+        CPU. if 1, the games are played in the current process.
+    chunk_size: int
+        the number of games sent to a worker at a time.
+    seed: int
+        the seed for the true words, so that runs are repeatable.
+    wordlist_path: str
+        the path for the wordlist.
+
+    Returns
+    ----------
+    numpy.ndarray
+        uint8 array of the number of guesses taken for each game.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = [range(start, min(start + chunk_size, num_games))
+              for start in range(0, num_games, chunk_size)]
+
+    if workers == 1:
+        results = [_solve_games(num_boards, games, seed, wordlist_path)
+                   for games in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(wordlist_path,)) as executor:
+            results = list(executor.map(
+                _solve_games, [num_boards] * len(chunks), chunks,
+                [seed] * len(chunks), [wordlist_path] * len(chunks)))
+
+    if not results:
+        return np.zeros(0, dtype=np.uint8)
+    return np.concatenate(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Report the guesses needed to solve multi-board games.')
+    parser.add_argument('--boards', type=int, nargs='+', default=[2, 4, 8],
+                        help='the numbers of boards to evaluate.')
+    parser.add_argument('--games', type=int, default=100,
+                        help='the number of games for each number of '
+                             'boards.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of worker processes. '
+                             'defaults to one per CPU.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed for the true words.')
+    args = parser.parse_args(argv)
+
+    for num_boards in args.boards:
+        num_attempts = evaluate_boards(num_boards, args.games,
+                                       workers=args.workers, seed=args.seed)
+        print(f'{num_boards} Boards Guess Summary')
+        print(f'AVG: {round(np.mean(num_attempts), 2)}')
+        print(f'STD: {round(np.std(num_attempts), 2)}')
+        print(f'MED: {round(np.median(num_attempts), 2)}')
+        print(f'MAX: {np.max(num_attempts)}')
+        if num_boards in BOARD_ATTEMPTS:
+            limit = BOARD_ATTEMPTS[num_boards]
+            failures = np.count_nonzero(num_attempts > limit)
+            print(f'FAIL (>{limit}): {failures} '
+                  f'({round(100 * failures / len(num_attempts), 2)}%)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+'''
+This module contains the opening book, which records the first guess
+of a strategy, the pattern it gives for every word, and the second
+guess for every feedback pattern the first guess can be given. The
+solver looks up the first two guesses in the book instead of computing
+them, and filters the viable words after the first guess by its
+recorded patterns.
+
+For the flagship strategy, the first guess is chosen when the book is
+built: the openers which give the most information are each followed by
+the strategy's second guesses, and the opener which leaves the fewest
+viable words after two guesses is recorded. Other strategies choose
+their own first guess, so only their guesses are recorded.
+
+The book is a small binary file: a header, followed by the second guess
+for each pattern code, or NO_GUESS if the pattern cannot occur, and the
+pattern of the first guess against each word. It is
+cached next to the wordlist, under a name which includes the wordlist
+hash and the strategy version, so it is rebuilt when either changes.
+The books can be built in advance from the command line:
+
+    >>> python3 opening.py --strategies flagship eliminator
+
+Contains:
+----------------------------------------
+    choose_opener
+        Finds the first guess which leaves the fewest viable words after
+        the strategy's second guess.
+    build_opening_book
+        Computes the first and second guesses of a strategy and writes
+        the opening book.
+    OpeningBook
+        An opening book loaded from a file.
+    load_opening_book
+        Loads the cached opening book for a strategy and wordlist,
+        building it first if necessary.
+'''
+
+import argparse
+import functools
+import hashlib
+import os
+import struct
+import sys
+
+import numpy as np
+
+import dictionary
+import patterns
+import solver
+
+OPENING_MAGIC = b'WOPN'
+OPENING_VERSION = 1
+HEADER_FORMAT = '<4sIIIIi40s16s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Strategies which choose the same guesses every game, so that their
+# guesses can be recorded.
+BOOK_STRATEGIES = ('flagship', 'eliminator', 'entropy')
+
+# Value recorded for patterns which the first guess cannot be given.
+NO_GUESS = -1
+
+
+def _second_guesses(root, opener, strategy):
+    '''
+    Computes the strategy's second guess for each pattern the opener can
+    be given, and the sum over the patterns of the squared number of
+    viable words left after the second guess. Words solved by either
+    guess are not counted.
+    '''
+    opener_index = root.master_index[opener]
+    opener_patterns = root.compute_guess_patterns(
+        np.array([opener_index]))[0]
+    all_correct = root.dictionary.all_correct
+
+    second_guesses = np.full(root.dictionary.num_patterns, NO_GUESS,
+                             dtype=np.int32)
+    sum_squares = 0
+    for pattern in np.unique(opener_patterns):
+        if pattern == all_correct:
+            continue
+        child = root.copy()
+        child.process_feedback(opener, int(pattern))
+        guess_index = root.master_index[child.suggest_guess(strategy)]
+        second_guesses[pattern] = guess_index
+
+        counts = np.bincount(
+            child.compute_guess_patterns(np.array([guess_index]))[0],
+            minlength=root.dictionary.num_patterns)
+        counts[all_correct] = 0
+        sum_squares += int(np.sum(counts.astype(np.int64) ** 2))
+
+    return second_guesses, sum_squares
+
+
+def choose_opener(root, strategy='flagship', num_candidates=16,
+                  shortlist_size=256):
+    '''
+    Finds the first guess which leaves the fewest viable words on
+    average after the strategy's second guess. The candidates are the
+    words which give the most information among the best eliminator
+    guesses.
+
+    Parameters
+    ----------
+    root: solver.WordleSolver
+        a solver which has not made a guess.
+    strategy: str
+        the strategy used to choose the second guesses.
+    num_candidates: int
+        the number of first guesses which are followed by second guesses.
+    shortlist_size: int
+        the number of eliminator guesses scored by their information.
+
+    Returns
+    ----------
+    opener: str
+        the best first guess.
+    second_guesses: numpy.ndarray
+        the master wordlist index of the second guess for each pattern
+        code, or NO_GUESS.
+    '''
+    shortlist = np.array([root.master_index[guess] for guess in
+                          root.suggest_eliminator_guesses(shortlist_size)])
+    entropy, expected_remaining = root.score_guess_patterns(shortlist)
+    candidates = shortlist[np.argsort(-entropy,
+                                      kind='stable')[:num_candidates]]
+
+    best = None
+    for candidate in candidates:
+        opener = root.master_wordlist[candidate]
+        second_guesses, sum_squares = _second_guesses(root, opener,
+                                                      strategy)
+        if best is None or sum_squares < best[0]:
+            best = (sum_squares, opener, second_guesses)
+
+    return best[1], best[2]
+
+
+def _opening_book_contents(strategy='flagship', word_dictionary=None,
+                           pattern_matrix=None, num_candidates=16):
+    '''
+    Computes the first guess of a strategy and its second guess for
+    every pattern, and returns the first guess and the contents of the
+    opening book file. The parameters are those of build_opening_book.
+    '''
+    if strategy not in BOOK_STRATEGIES:
+        raise ValueError(f'The {strategy} strategy cannot be recorded in an '
+                         f'opening book.')
+    root = solver.WordleSolver(suppress_info=True,
+                               pattern_matrix=pattern_matrix,
+                               word_dictionary=word_dictionary)
+
+    if strategy == 'flagship':
+        opener, second_guesses = choose_opener(root, strategy,
+                                               num_candidates)
+    else:
+        opener = root.suggest_guess(strategy)
+        second_guesses, sum_squares = _second_guesses(root, opener,
+                                                      strategy)
+
+    opener_index = root.master_index[opener]
+    first_patterns = patterns.compute_patterns(
+        root.master_wordlist_codes[opener_index], root.master_wordlist_codes)
+    # Patterns take one byte for words of up to five letters.
+    pattern_size = first_patterns.dtype.itemsize
+
+    header = struct.pack(HEADER_FORMAT, OPENING_MAGIC, OPENING_VERSION,
+                         len(second_guesses), len(first_patterns),
+                         pattern_size, opener_index,
+                         root.dictionary.hash.encode('ascii'),
+                         strategy.encode('ascii'))
+
+    return opener, (header + second_guesses.astype('<i4').tobytes()
+                    + first_patterns.astype(f'<u{pattern_size}').tobytes())
+
+
+def build_opening_book(path, strategy='flagship', word_dictionary=None,
+                       pattern_matrix=None, num_candidates=16):
+    '''
+    Computes the first guess of a strategy and its second guess for
+    every pattern, and writes them to an opening book file.
+
+    Parameters
+    ----------
+    path: str
+        the path for the opening book file.
+    strategy: str
+        one of BOOK_STRATEGIES.
+    word_dictionary: dictionary.Dictionary
+        the dictionary of allowed words. defaults to the shared dictionary.
+    pattern_matrix: numpy.ndarray
+        the pattern matrix for the dictionary, used to speed up the build.
+    num_candidates: int
+        the number of first guesses tried for the flagship strategy.
+
+    Returns
+    ----------
+    str
+        the first guess.
+    '''
+    opener, contents = _opening_book_contents(strategy, word_dictionary,
+                                              pattern_matrix, num_candidates)
+    with patterns.atomic_open(path) as file:
+        file.write(contents)
+    return opener
+
+
+class OpeningBook():
+
+    def __init__(self, path, contents=None):
+        '''
+        Load an opening book file, checking its header.
+
+        Parameters
+        ----------
+        path: str
+            the path for the opening book file, or None if the book is
+            only held in memory.
+        contents: bytes
+            the contents of the file, if they have already been read.
+        '''
+        if contents is None:
+            with open(path, 'rb') as file:
+                contents = file.read()
+        if len(contents) < HEADER_SIZE:
+            raise ValueError(f'\'{path}\' is not an opening book.')
+
+        (magic, version, num_patterns, num_words, pattern_size,
+         first_guess, word_hash, strategy) = struct.unpack(
+             HEADER_FORMAT, contents[:HEADER_SIZE])
+        if magic != OPENING_MAGIC or version != OPENING_VERSION:
+            raise ValueError(f'\'{path}\' is not a version '
+                             f'{OPENING_VERSION} opening book.')
+        if len(contents) != (HEADER_SIZE + 4 * num_patterns
+                             + pattern_size * num_words):
+            raise ValueError(f'\'{path}\' is truncated.')
+
+        self.path = path
+        self.wordlist_hash = word_hash.decode('ascii')
+        self.strategy = strategy.rstrip(b'\0').decode('ascii')
+        self.first_guess = first_guess
+        self.second_guesses = np.frombuffer(contents, dtype='<i4',
+                                            count=num_patterns,
+                                            offset=HEADER_SIZE)
+        self.first_patterns = np.frombuffer(
+            contents, dtype=f'<u{pattern_size}',
+            offset=HEADER_SIZE + 4 * num_patterns)
+        self.hash = hashlib.blake2b(contents, digest_size=16).hexdigest()
+
+    def guess(self, guess_history, master_index):
+        '''
+        Returns the master wordlist index of the book's next guess after
+        a history of guesses, or None if the history has left the book.
+
+        Parameters
+        ----------
+        guess_history: list of (str, int)
+            each guess and the pattern code it was given.
+        master_index: dict
+            the index of each word in the master wordlist.
+        '''
+        if not guess_history:
+            return self.first_guess
+        if len(guess_history) == 1:
+            guess, pattern = guess_history[0]
+            if (master_index[guess] == self.first_guess
+                    and self.second_guesses[pattern] != NO_GUESS):
+                return int(self.second_guesses[pattern])
+        return None
+
+
+def opening_book_path(strategy, words, cache_dir):
+    '''
+    Returns the path of the cached opening book for a strategy and
+    wordlist. The file name includes the strategy version, so a book is
+    rebuilt when the strategies change.
+    '''
+    digest = patterns.wordlist_hash(words)[:16]
+    return os.path.join(
+        cache_dir, f'opening_v{OPENING_VERSION}_{strategy}'
+                   f'_s{solver.STRATEGY_VERSION}_{digest}.bin')
+
+
+@functools.lru_cache(maxsize=None)
+def load_opening_book(strategy='flagship', wordlist_path=r'all_words.txt',
+                      cache_dir=None):
+    '''
+    Loads the opening book for a strategy and wordlist from the on-disk
+    cache, building it first if it is not there or cannot be read. A
+    message is printed to stderr while the book is built, which can take
+    tens of seconds. If the book cannot be saved, e.g. because the cache
+    directory is read-only, it is only kept in memory. The book is only
+    loaded once per process.
+
+    Parameters
+    ----------
+    strategy: str
+        one of BOOK_STRATEGIES.
+    wordlist_path: str
+        the path for the wordlist.
+    cache_dir: str
+        the directory for the cached book. defaults to the .wordle_cache
+        directory next to the wordlist.
+
+    Returns
+    ----------
+    OpeningBook
+        the opening book, or None if the strategy is not one of
+        BOOK_STRATEGIES.
+    '''
+    if strategy not in BOOK_STRATEGIES:
+        return None
+    word_dictionary = dictionary.load_dictionary(wordlist_path)
+    if cache_dir is None:
+        cache_dir = patterns.default_cache_dir(wordlist_path)
+
+    path = opening_book_path(strategy, word_dictionary.words, cache_dir)
+    try:
+        return OpeningBook(path)
+    except (OSError, ValueError):
+        pass
+
+    print(f'Building the {strategy} opening book for {wordlist_path}. '
+          f'This is only done once.', file=sys.stderr, flush=True)
+    opener, contents = _opening_book_contents(strategy, word_dictionary)
+    try:
+        with patterns.atomic_open(path) as file:
+            file.write(contents)
+    except OSError:
+        # The book can still be used if the file cannot be written.
+        path = None
+    return OpeningBook(path, contents)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Build the opening book for each strategy.')
+    parser.add_argument('--strategies', nargs='+', default=['flagship'],
+                        choices=BOOK_STRATEGIES,
+                        help='the strategies to build books for.')
+    parser.add_argument('--wordlist', default='all_words.txt',
+                        help='the path for the wordlist.')
+    parser.add_argument('--cache-dir', default=None,
+                        help='the directory for the books. defaults to the '
+                             '.wordle_cache directory next to the wordlist.')
+    parser.add_argument('--candidates', type=int, default=16,
+                        help='the number of first guesses tried for the '
+                             'flagship strategy.')
+    args = parser.parse_args(argv)
+
+    cache_dir = args.cache_dir
+    if cache_dir is None:
+        cache_dir = patterns.default_cache_dir(args.wordlist)
+
+    word_dictionary = dictionary.load_dictionary(args.wordlist)
+    for strategy in args.strategies:
+        path = opening_book_path(strategy, word_dictionary.words, cache_dir)
+        first_guess = build_opening_book(path, strategy, word_dictionary,
+                                         num_candidates=args.candidates)
+        print(f'{strategy}: {first_guess} -> {path}')
+
+
+if __name__ == '__main__':
+    main()
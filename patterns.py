@@ -0,0 +1,464 @@
+'''
+This module computes Wordle feedback patterns, using the kernels
+module, which compiles them with Numba if it is installed.
+A feedback pattern is stored as a base-3 integer, where position i
+of the guess contributes 3**i times 0 (absent), 1 (present) or
+2 (correct). A word which is guessed correctly gives ALL_CORRECT, or
+all_correct(word_length) for words which are not five letters long.
+Patterns are stored as uint8 for words of up to five letters, and as
+uint16 for longer words.
+
+Contains:
+----------------------------------------
+    infer_alphabet
+        Finds the letters used by a list of words.
+    all_correct
+        Returns the pattern code of a correct guess for a word length.
+    pattern_dtype
+        Returns the smallest unsigned integer type which holds every
+        pattern code for a word length.
+    encode_words
+        Converts a list of words to a matrix of uint8 letter codes.
+    compute_patterns
+        Computes the feedback pattern for every (guess, answer) pair.
+    score_pattern
+        Computes the feedback pattern for one guess and one answer.
+    parse_pattern
+        Converts a feedback pattern given as a string of colours or as a
+        base-3 integer to its pattern code.
+    pattern_to_string
+        Converts a pattern code to a string of colours.
+    format_pattern
+        Renders a guess with each letter coloured by its feedback.
+    wordlist_hash
+        Computes a hash identifying the contents of a wordlist.
+    default_cache_dir
+        Returns the .wordle_cache directory next to a wordlist.
+    atomic_open
+        Opens a file to be written and moved into place when it is
+        closed.
+    build_pattern_matrix
+        Builds the full guess x answer pattern matrix for a wordlist.
+    load_pattern_matrix
+        Loads the pattern matrix for a wordlist from the on-disk cache,
+        building and caching it first if necessary.
+    shared_pattern_matrix
+        Returns the pattern matrix for a wordlist, loading it only once
+        per process.
+'''
+
+import contextlib
+import functools
+import hashlib
+import os
+
+import numpy as np
+
+import kernels
+
+ABSENT = 0
+PRESENT = 1
+CORRECT = 2
+WORD_LENGTH = 5
+ALL_CORRECT = 3 ** WORD_LENGTH - 1
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+PATTERN_CHARACTERS = {'g': CORRECT, '2': CORRECT,
+                      'y': PRESENT, '1': PRESENT,
+                      '.': ABSENT, '-': ABSENT, 'b': ABSENT, 'x': ABSENT,
+                      '0': ABSENT}
+
+# Increment whenever the layout or meaning of the cached matrix changes.
+PATTERN_CACHE_VERSION = 1
+CACHE_DIRNAME = '.wordle_cache'
+
+
+def infer_alphabet(words):
+    '''
+    Returns the letters used by a list of words, in sorted order.
+    '''
+    return ''.join(sorted(set(''.join(words))))
+
+
+def all_correct(word_length):
+    '''
+    Returns the pattern code given by a correct guess of a word length.
+    '''
+    return 3 ** word_length - 1
+
+
+def pattern_dtype(word_length):
+    '''
+    Returns the smallest unsigned integer type which can hold every
+    pattern code for words of a length.
+    '''
+    # 3 ** 5 <= 2 ** 8, 3 ** 10 <= 2 ** 16 and 3 ** 20 <= 2 ** 32.
+    if word_length <= 5:
+        return np.uint8
+    if word_length <= 10:
+        return np.uint16
+    if word_length <= 20:
+        return np.uint32
+    raise ValueError(f'Words of {word_length} letters are too long.')
+
+
+def encode_words(words, alphabet=ALPHABET):
+    '''
+    Converts a list of lowercase words to a matrix of letter codes, where
+    each letter is coded by its position in the alphabet. For the default
+    alphabet, 'a' is 0 and 'z' is 25.
+
+    Parameters
+    ----------
+    words: list of str
+        the words to be encoded. all words must be the same length.
+    alphabet: str
+        the letters which may appear in the words. must have at most 256
+        letters.
+
+    Returns
+    ----------
+    numpy.ndarray
+        uint8 array of shape (len(words), word length).
+    '''
+    if len(words) == 0:
+        return np.zeros((0, WORD_LENGTH), dtype=np.uint8)
+    word_length = len(words[0])
+    joined = ''.join(words)
+    # If no word is shorter and the total length matches, none is longer.
+    if (len(joined) != len(words) * word_length
+            or min(map(len, words)) != word_length):
+        raise ValueError('Every word must have the same number of letters.')
+
+    if alphabet == ALPHABET and joined.isascii():
+        codes = np.frombuffer(joined.encode('ascii'), dtype=np.uint8) \
+            - np.uint8(ord('a'))
+        if np.any(codes >= len(ALPHABET)):
+            raise ValueError('The words contain letters which are not in '
+                             'the alphabet.')
+    else:
+        if len(alphabet) > 256:
+            raise ValueError('The alphabet must have at most 256 letters.')
+        letter_index = {letter: i for i, letter in enumerate(alphabet)}
+        try:
+            codes = np.fromiter((letter_index[letter] for letter in joined),
+                                dtype=np.uint8, count=len(joined))
+        except KeyError:
+            raise ValueError('The words contain letters which are not in '
+                             'the alphabet.')
+    return codes.reshape(len(words), word_length)
+
+
+def compute_patterns(guess_codes, answer_codes, block_size=32,
+                     parallel=False):
+    '''
+    Computes the feedback pattern for every (guess, answer) pair.
+    Green letters take priority over yellow letters, and a repeated
+    letter is only highlighted yellow as many times as it appears in
+    the answer outside of the green positions.
+
+    Parameters
+    ----------
+    guess_codes: numpy.ndarray
+        uint8 letter codes of the guesses, shape (num_guesses, word
+        length), or of one guess, shape (word length,).
+    answer_codes: numpy.ndarray
+        uint8 letter codes of the answers, shape (num_answers, word
+        length).
+    block_size: int
+        the number of guesses processed at once by the NumPy kernel.
+        bounds the size of the temporary arrays.
+    parallel: boolean
+        whether the compiled kernel splits the guesses between threads,
+        as for kernels.compute_patterns.
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of shape (num_guesses, num_answers) holding the base-3
+        pattern codes, with the type given by pattern_dtype. for one
+        guess, the shape is (num_answers,).
+    '''
+    guess_codes = np.asarray(guess_codes, dtype=np.uint8)
+    if guess_codes.ndim == 1:
+        return compute_patterns(guess_codes[None, :], answer_codes,
+                                block_size, parallel)[0]
+    answer_codes = np.asarray(answer_codes, dtype=np.uint8)
+    alphabet_size = int(max(guess_codes.max(initial=0),
+                            answer_codes.max(initial=0))) + 1
+
+    patterns = np.empty((guess_codes.shape[0], answer_codes.shape[0]),
+                        dtype=pattern_dtype(guess_codes.shape[1]))
+    kernels.compute_patterns(guess_codes, answer_codes, patterns,
+                             alphabet_size, block_size, parallel)
+    return patterns
+
+
+def score_pattern(guess, answer):
+    '''
+    Computes the feedback pattern for one guess and one answer, with the
+    same green-first rule as compute_patterns. This is much faster than
+    compute_patterns for a single pair, e.g. when a guess is played.
+
+    Parameters
+    ----------
+    guess: str or sequence of int
+        the guess, as a word or as its letter codes.
+    answer: str or sequence of int
+        the answer, in the same form as the guess.
+
+    Returns
+    ----------
+    int
+        the base-3 pattern code.
+    '''
+    # Letters of the answer which are not matched by a green letter, and
+    # so may make a letter of the guess yellow.
+    unmatched = {}
+    for guess_letter, answer_letter in zip(guess, answer):
+        if guess_letter != answer_letter:
+            unmatched[answer_letter] = unmatched.get(answer_letter, 0) + 1
+
+    code = 0
+    place = 1
+    for guess_letter, answer_letter in zip(guess, answer):
+        if guess_letter == answer_letter:
+            code += CORRECT * place
+        elif unmatched.get(guess_letter, 0) > 0:
+            unmatched[guess_letter] -= 1
+            code += PRESENT * place
+        place *= 3
+    return code
+
+
+def parse_pattern(pattern, word_length=WORD_LENGTH):
+    '''
+    Converts a feedback pattern to its base-3 pattern code. The pattern
+    can be given as the code itself, or as a string with one character
+    per letter of the guess: 'G' or '2' for a correct letter, 'Y' or '1'
+    for a present letter, and '.', '-', 'B', 'X' or '0' for an absent
+    letter. Letters are case insensitive.
+
+    Parameters
+    ----------
+    pattern: str or int
+        the feedback pattern.
+    word_length: int
+        the number of letters in the guess.
+
+    Returns
+    ----------
+    int
+        the base-3 pattern code.
+    '''
+    if isinstance(pattern, (int, np.integer)) and not isinstance(pattern,
+                                                                 bool):
+        if not 0 <= pattern <= all_correct(word_length):
+            raise ValueError(f'Pattern code {pattern} is not between 0 and '
+                             f'{all_correct(word_length)}.')
+        return int(pattern)
+
+    if not isinstance(pattern, str) or len(pattern) != word_length:
+        raise ValueError(f'Unable to convert {pattern!r} to a '
+                         f'{word_length} letter feedback pattern.')
+
+    code = 0
+    for i, colour in enumerate(pattern.lower()):
+        if colour not in PATTERN_CHARACTERS:
+            raise ValueError(f'Unknown feedback colour {colour!r} in '
+                             f'{pattern!r}.')
+        code += PATTERN_CHARACTERS[colour] * 3 ** i
+    return code
+
+
+def pattern_to_string(code, word_length=WORD_LENGTH):
+    '''
+    Converts a pattern code to a string with 'G' for a correct letter,
+    'Y' for a present letter and '.' for an absent letter.
+
+    Parameters
+    ----------
+    code: int
+        the base-3 pattern code.
+    word_length: int
+        the number of letters in the pattern.
+
+    Returns
+    ----------
+    str
+        the pattern as a string of colours.
+    '''
+    return ''.join('.YG'[(int(code) // 3 ** i) % 3]
+                   for i in range(word_length))
+
+
+def format_pattern(guess, code, colours=('', '', ''), reset=''):
+    '''
+    Renders a guess in upper case with each letter marked by its
+    feedback, e.g. with terminal colour codes.
+
+    Parameters
+    ----------
+    guess: str
+        the guess.
+    code: int
+        the base-3 pattern code of the guess.
+    colours: tuple of str
+        the text put before an absent, a present and a correct letter.
+    reset: str
+        the text put after each letter.
+
+    Returns
+    ----------
+    str
+        the rendered guess.
+    '''
+    letters = []
+    for letter in guess.upper():
+        letters.append(f'{colours[code % 3]}{letter}{reset}')
+        code //= 3
+    return ''.join(letters)
+
+
+def wordlist_hash(words):
+    '''
+    Computes a hash identifying the contents and order of a wordlist.
+
+    Parameters
+    ----------
+    words: list of str
+        the wordlist to be hashed.
+
+    Returns
+    ----------
+    str
+        the hexadecimal sha1 digest of the wordlist.
+    '''
+    return hashlib.sha1('\n'.join(words).encode('utf-8')).hexdigest()
+
+
+def build_pattern_matrix(words):
+    '''
+    Builds the full pattern matrix for a wordlist, where element
+    [i, j] is the pattern seen when guessing words[i] if the answer
+    is words[j].
+
+    Parameters
+    ----------
+    words: list of str
+        the wordlist, used for both the guesses and the answers.
+
+    Returns
+    ----------
+    numpy.ndarray
+        array of shape (len(words), len(words)), with the type given by
+        pattern_dtype.
+    '''
+    codes = encode_words(words, infer_alphabet(words))
+    return compute_patterns(codes, codes, parallel=True)
+
+
+def default_cache_dir(wordlist_path):
+    '''
+    Returns the .wordle_cache directory next to a wordlist, where the
+    files built from it are cached by default.
+    '''
+    return os.path.join(os.path.dirname(os.path.abspath(wordlist_path)),
+                        CACHE_DIRNAME)
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode='wb'):
+    '''
+    Opens a temporary file next to path, creating its directory if
+    necessary, and moves it into place when it is closed. A concurrent
+    reader never sees a partly written file, and the temporary file is
+    removed if writing fails.
+
+    Parameters
+    ----------
+    path: str
+        the path of the file to write.
+    mode: str
+        the mode the file is opened with, 'wb' or 'w'.
+    '''
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, mode) as file:
+            yield file
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
+def pattern_cache_path(words, cache_dir):
+    '''
+    Returns the path of the cached pattern matrix for a wordlist.
+    The file name contains the cache version and the wordlist hash,
+    so a changed wordlist never loads a stale matrix.
+    '''
+    digest = wordlist_hash(words)[:16]
+    return os.path.join(
+        cache_dir, f'patterns_v{PATTERN_CACHE_VERSION}_{digest}.npy')
+
+
+def load_pattern_matrix(wordlist_path=r'all_words.txt', cache_dir=None,
+                        words=None):
+    '''
+    Loads the pattern matrix for a wordlist as a read-only memory map,
+    so that every solver instance and process shares one copy of the
+    pages. The matrix is built and saved to the cache first if it is
+    not already there.
+
+    Parameters
+    ----------
+    wordlist_path: str
+        the path for the wordlist.
+    cache_dir: str
+        the directory for the cached matrix. defaults to a
+        .wordle_cache directory next to the wordlist.
+    words: list of str
+        the words in the wordlist, if they have already been read.
+
+    Returns
+    ----------
+    numpy.memmap
+        read-only array of shape (len(words), len(words)).
+    '''
+    if words is None:
+        with open(wordlist_path, 'r', encoding='utf-8') as file:
+            words = [line.rstrip() for line in file]
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir(wordlist_path)
+
+    path = pattern_cache_path(words, cache_dir)
+
+    if not os.path.exists(path):
+        matrix = build_pattern_matrix(words)
+        with atomic_open(path) as file:
+            np.save(file, matrix)
+
+    return np.load(path, mmap_mode='r')
+
+
+@functools.lru_cache(maxsize=None)
+def shared_pattern_matrix(wordlist_path=r'all_words.txt'):
+    '''
+    Returns the pattern matrix for a wordlist from load_pattern_matrix,
+    only loading it the first time each path is requested in a process.
+
+    Parameters
+    ----------
+    wordlist_path: str
+        the path for the wordlist.
+
+    Returns
+    ----------
+    numpy.memmap
+        read-only array of shape (len(words), len(words)).
+    '''
+    return load_pattern_matrix(wordlist_path)
@@ -0,0 +1,366 @@
+'''
+This module contains the policy book, a precomputed decision tree
+which records the guess a strategy makes after every feedback history
+that can occur for the words in a wordlist. Looking up the next guess
+in the book replaces recomputing the strategy every turn.
+
+The book is stored as a flat binary file which is memory mapped:
+a header, followed by the guess for each node, the offset of each
+node's first child edge, and the pattern and child node of each edge.
+The edges of a node are sorted by pattern. The header records the size
+of each pattern, which is larger for words longer than five letters,
+whether the book was built for hard mode, and the hash of the opening
+book the strategy used for its first two guesses.
+
+Contains:
+----------------------------------------
+    POLICY_STRATEGIES
+        The strategies which can be recorded in a policy book.
+    build_policy_book
+        Walks the game tree for a strategy and writes the policy book.
+    PolicyBook
+        A memory mapped policy book.
+    load_policy_book
+        Loads the cached policy book for a strategy and wordlist,
+        building it first if necessary.
+    PolicySolver
+        Plays a game by following a policy book, falling back to live
+        computation if the game leaves the book.
+'''
+
+import collections
+import functools
+import os
+import struct
+
+import numpy as np
+
+import dictionary
+import opening
+import patterns
+import solver
+
+POLICY_MAGIC = b'WPOL'
+POLICY_VERSION = 4
+HEADER_FORMAT = '<4sIIII40s16s?32s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Value returned when a history is not in the book.
+NO_NODE = -1
+
+# A book records one guess for each history, so only strategies which
+# always make the same guess for the same history can be recorded.
+POLICY_STRATEGIES = ('flagship', 'eliminator', 'entropy')
+
+
+def build_policy_book(path, strategy='flagship', word_dictionary=None,
+                      pattern_matrix=None, hard_mode=False,
+                      opening_book=None):
+    '''
+    Walks the game tree from the first guess, recording the guess the
+    strategy makes for every feedback history that any word in the
+    dictionary can produce, and writes the result to a policy book file.
+
+    Parameters
+    ----------
+    path: str
+        the path for the policy book file.
+    strategy: str
+        the strategy used to choose guesses, one of POLICY_STRATEGIES.
+    word_dictionary: dictionary.Dictionary
+        the dictionary of allowed words. defaults to the shared dictionary.
+    pattern_matrix: numpy.ndarray
+        the pattern matrix for the dictionary, used to speed up the walk.
+    hard_mode: boolean
+        if set to true, every guess in the book uses the hints revealed
+        so far.
+    opening_book: opening.OpeningBook
+        the opening book the strategy uses, as for WordleSolver, so that
+        the policy book records the same guesses as the strategy does
+        when it is given the book.
+
+    Returns
+    ----------
+    int
+        the number of nodes in the policy book.
+    '''
+    if strategy not in POLICY_STRATEGIES:
+        raise ValueError(f'The {strategy} strategy cannot be recorded in a '
+                         f'policy book.')
+    root = solver.WordleSolver(suppress_info=True,
+                               pattern_matrix=pattern_matrix,
+                               word_dictionary=word_dictionary,
+                               hard_mode=hard_mode,
+                               opening_book=opening_book)
+
+    node_guesses = []
+    edge_patterns = []
+    edge_children = []
+    first_edges = []
+
+    # Nodes are numbered in breadth first order, so the children of
+    # each node have consecutive numbers.
+    queue = collections.deque([root])
+    num_nodes = 1
+    while queue:
+        solver_instance = queue.popleft()
+        guess = solver_instance.suggest_guess(strategy)
+        guess_index = solver_instance.master_index[guess]
+        node_guesses.append(guess_index)
+        first_edges.append(len(edge_patterns))
+
+        guess_patterns = solver_instance.compute_guess_patterns(
+            np.array([guess_index]))[0]
+        for pattern in np.unique(guess_patterns):
+            if pattern == root.dictionary.all_correct:
+                continue
+            child = solver_instance.copy()
+            child.process_feedback(guess, int(pattern))
+            queue.append(child)
+
+            edge_patterns.append(pattern)
+            edge_children.append(num_nodes)
+            num_nodes += 1
+
+    first_edges.append(len(edge_patterns))
+
+    # Patterns take one byte for words of up to five letters.
+    pattern_size = np.dtype(root.dictionary.pattern_dtype).itemsize
+    edge_patterns = np.array(edge_patterns, dtype=f'<u{pattern_size}')
+    padding = b'\0' * (-edge_patterns.nbytes % 4)
+
+    header = struct.pack(HEADER_FORMAT, POLICY_MAGIC, POLICY_VERSION,
+                         len(node_guesses), len(edge_patterns),
+                         pattern_size,
+                         root.dictionary.hash.encode('ascii'),
+                         strategy.encode('ascii'), hard_mode,
+                         _opening_hash(opening_book).encode('ascii'))
+
+    with patterns.atomic_open(path) as file:
+        file.write(header)
+        file.write(np.array(node_guesses, dtype='<i4').tobytes())
+        file.write(np.array(first_edges, dtype='<i4').tobytes())
+        file.write(edge_patterns.tobytes())
+        file.write(padding)
+        file.write(np.array(edge_children, dtype='<i4').tobytes())
+
+    return len(node_guesses)
+
+
+class PolicyBook():
+
+    def __init__(self, path):
+        '''
+        Memory map a policy book file, checking its header.
+
+        Parameters
+        ----------
+        path: str
+            the path for the policy book file.
+        '''
+        with open(path, 'rb') as file:
+            header = file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            raise ValueError(f'\'{path}\' is not a policy book.')
+
+        (magic, version, num_nodes, num_edges, pattern_size,
+         word_hash, strategy, hard_mode,
+         opening_hash) = struct.unpack(HEADER_FORMAT, header)
+        if magic != POLICY_MAGIC or version != POLICY_VERSION:
+            raise ValueError(f'\'{path}\' is not a version {POLICY_VERSION} '
+                             f'policy book.')
+
+        self.path = path
+        self.wordlist_hash = word_hash.decode('ascii')
+        self.strategy = strategy.rstrip(b'\0').decode('ascii')
+        self.hard_mode = hard_mode
+        self.opening_hash = opening_hash.rstrip(b'\0').decode('ascii')
+        self.num_nodes = num_nodes
+
+        offset = HEADER_SIZE
+        self.node_guesses = np.memmap(path, dtype='<i4', mode='r',
+                                      offset=offset, shape=(num_nodes,))
+        offset += 4 * num_nodes
+        self.first_edges = np.memmap(path, dtype='<i4', mode='r',
+                                     offset=offset, shape=(num_nodes + 1,))
+        offset += 4 * (num_nodes + 1)
+        self.edge_patterns = np.memmap(path, dtype=f'<u{pattern_size}',
+                                       mode='r', offset=offset,
+                                       shape=(num_edges,))
+        offset += pattern_size * num_edges + (-pattern_size * num_edges % 4)
+        self.edge_children = np.memmap(path, dtype='<i4', mode='r',
+                                       offset=offset, shape=(num_edges,))
+
+    def guess(self, node):
+        '''
+        Returns the master wordlist index of the guess made at a node.
+        '''
+        return int(self.node_guesses[node])
+
+    def child(self, node, pattern):
+        '''
+        Returns the node reached from a node when its guess is given the
+        feedback pattern, or NO_NODE if the pattern is not in the book.
+        '''
+        first = self.first_edges[node]
+        last = self.first_edges[node + 1]
+        position = first + np.searchsorted(self.edge_patterns[first:last],
+                                           pattern)
+        if position < last and self.edge_patterns[position] == pattern:
+            return int(self.edge_children[position])
+        return NO_NODE
+
+
+def _opening_hash(opening_book):
+    '''
+    Returns the hash of an opening book, or an empty string for None.
+    '''
+    return '' if opening_book is None else opening_book.hash
+
+
+def policy_book_path(strategy, words, cache_dir, hard_mode=False,
+                     opening_book=None):
+    '''
+    Returns the path of the cached policy book for a strategy and
+    wordlist. The file name includes the strategy version and the hash
+    of the opening book, so a book is rebuilt when the strategies or the
+    opening book change.
+    '''
+    digest = patterns.wordlist_hash(words)[:16]
+    mode = '_hard' if hard_mode else ''
+    opening_digest = _opening_hash(opening_book)[:16] or 'none'
+    return os.path.join(
+        cache_dir, f'policy_v{POLICY_VERSION}_{strategy}{mode}'
+                   f'_s{solver.STRATEGY_VERSION}_{digest}'
+                   f'_o{opening_digest}.bin')
+
+
+@functools.lru_cache(maxsize=None)
+def load_policy_book(strategy='flagship', hard_mode=False,
+                     wordlist_path=r'all_words.txt', cache_dir=None):
+    '''
+    Loads the policy book for a strategy and wordlist from the on-disk
+    cache, building it first if it is not already there. The book is
+    built with the strategy's opening book, as the batch solve functions
+    use it. The book is only loaded once per process.
+
+    Parameters
+    ----------
+    strategy: str
+        the strategy recorded in the book, one of POLICY_STRATEGIES.
+    hard_mode: boolean
+        whether the book is for hard mode.
+    wordlist_path: str
+        the path for the wordlist.
+    cache_dir: str
+        the directory for the cached book. defaults to the .wordle_cache
+        directory next to the wordlist.
+
+    Returns
+    ----------
+    PolicyBook
+        the policy book.
+    '''
+    if strategy not in POLICY_STRATEGIES:
+        raise ValueError(f'The {strategy} strategy cannot be recorded in a '
+                         f'policy book.')
+    word_dictionary = dictionary.load_dictionary(wordlist_path)
+    opening_book = opening.load_opening_book(strategy, wordlist_path,
+                                             cache_dir)
+    if cache_dir is None:
+        cache_dir = patterns.default_cache_dir(wordlist_path)
+
+    path = policy_book_path(strategy, word_dictionary.words, cache_dir,
+                            hard_mode, opening_book)
+    if not os.path.exists(path):
+        build_policy_book(path, strategy, word_dictionary,
+                          hard_mode=hard_mode, opening_book=opening_book)
+
+    return PolicyBook(path)
+
+
+class PolicySolver():
+
+    def __init__(self, book, true_word=None, suppress_info=False,
+                 word_dictionary=None, stats=None, opening_book=None):
+        '''
+        Initialise a game which follows a policy book.
+
+        Parameters
+        ----------
+        book: PolicyBook
+            the policy book to follow. the game is in hard mode if the
+            book was built for hard mode.
+        true_word: str
+            the input word to be set as the answer for the Wordle.
+            must be a word in the dictionary, otherwise a random word
+            is set.
+        suppress_info: boolean
+            if set to true, will stop most information from being printed.
+        word_dictionary: dictionary.Dictionary
+            the dictionary the book was built for. defaults to the shared
+            dictionary.
+        stats: instrumentation.SolverStats
+            if given, the phases, guesses and suggestions of the game are
+            recorded to it. guesses looked up in the book are recorded as
+            coming from the book.
+        opening_book: opening.OpeningBook
+            the opening book the policy book was built with, which is
+            used if the game leaves the book.
+        '''
+        self.book = book
+        self.solver = solver.WordleSolver(true_word=true_word,
+                                          suppress_info=suppress_info,
+                                          word_dictionary=word_dictionary,
+                                          hard_mode=book.hard_mode,
+                                          stats=stats,
+                                          opening_book=opening_book)
+        if self.solver.dictionary.hash != book.wordlist_hash:
+            raise ValueError('The policy book was built for a different '
+                             'wordlist.')
+        if _opening_hash(opening_book) != book.opening_hash:
+            raise ValueError('The policy book was built with a different '
+                             'opening book.')
+        self.node = 0
+
+    def suggest_guess(self):
+        '''
+        Suggest the next guess from the book, or compute it with the
+        book's strategy if the game has left the book.
+        '''
+        if self.node == NO_NODE:
+            return self.solver.suggest_guess(self.book.strategy)
+
+        stats = self.solver.stats
+        if stats is None:
+            return self.solver.master_wordlist[self.book.guess(self.node)]
+        with stats.phase('suggestion'):
+            guess = self.solver.master_wordlist[self.book.guess(self.node)]
+        stats.record_suggestion('book', guess)
+        return guess
+
+    def process_guess(self, guess):
+        '''
+        Processes a guess and moves to the matching node of the book.
+        Guesses which differ from the book leave the book.
+
+        Parameters
+        ----------
+        guess: str
+            the input word to be processed as a guess.
+
+        Returns
+        ----------
+        boolean
+            whether or not the guess is correct
+        '''
+        success = self.solver.process_guess(guess)
+
+        if not success and self.node != NO_NODE:
+            guess, pattern = self.solver.guess_history[-1]
+            if self.solver.master_index[guess] == self.book.guess(self.node):
+                self.node = self.book.child(self.node, pattern)
+            else:
+                self.node = NO_NODE
+
+        return success
@@ -0,0 +1,466 @@
+'''
+This module contains a search based strategy which chooses guesses to
+minimise the expected number of guesses needed to solve Wordle, rather
+than using a scoring heuristic.
+
+The search works on sets of possible true words. The total number of
+guesses T(S) needed to solve every word in a set S is found by trying
+candidate guesses, splitting S by the feedback pattern of each guess,
+and solving each part recursively. Results are memoised by a bitmask
+of the set, branches are pruned using the lower bound that every word
+but one needs at least two guesses, and only the top-k guesses by
+entropy are tried at each step. If the node or time budget runs out,
+the remaining parts are estimated from their lower bound instead of
+being searched, and the result is reported as incomplete. The memo can
+be limited in size, in which case it is cleared between searches once
+it is full.
+
+In hard mode, the guesses can be limited to the words which use every
+revealed hint. The same words are allowed at every step of the search,
+so the totals are estimated as if later guesses were only limited by
+the hints revealed so far, but the guess chosen is always allowed.
+
+Contains:
+----------------------------------------
+    SearchResult
+        The guess chosen by a search, with its expected number of
+        guesses and the lower bound.
+    score_guesses
+        Scores every guess by its entropy and lower bound over a set
+        of possible true words.
+    ExpectedGuessSearch
+        The memoised branch and bound search.
+    shared_search
+        Returns a search for the default wordlist which is kept for the
+        life of the process, so its memo is shared between games.
+'''
+
+import collections
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import dictionary
+import kernels
+import patterns
+
+SearchResult = collections.namedtuple(
+    'SearchResult', ['guess', 'expected_guesses', 'lower_bound', 'gap',
+                     'nodes', 'complete'])
+
+
+def score_guesses(pattern_matrix, answers, block_size=128,
+                  all_correct=patterns.ALL_CORRECT, guesses=None):
+    '''
+    Scores every guess in the pattern matrix, or only the given guesses,
+    over a set of possible true words.
+
+    Parameters
+    ----------
+    pattern_matrix: numpy.ndarray
+        the guess x answer pattern matrix.
+    answers: numpy.ndarray
+        the indices of the possible true words.
+    block_size: int
+        the number of guesses scored at once.
+    all_correct: int
+        the pattern code of a correct guess, which depends on the word
+        length.
+    guesses: numpy.ndarray
+        the indices of the guesses to score. if None, every row of the
+        pattern matrix is scored.
+
+    Returns
+    ----------
+    entropy: numpy.ndarray
+        the entropy of the feedback patterns of each guess.
+    lower_bound: numpy.ndarray
+        a lower bound on the total number of guesses needed to solve
+        every word in answers when starting with each guess.
+    '''
+    if guesses is None:
+        num_guesses = pattern_matrix.shape[0]
+    else:
+        num_guesses = len(guesses)
+    num_answers = len(answers)
+    num_patterns = all_correct + 1
+
+    entropy = np.empty(num_guesses)
+    num_parts = np.empty(num_guesses, dtype=int)
+
+    for start in range(0, num_guesses, block_size):
+        if guesses is None:
+            rows = pattern_matrix[start:start + block_size]
+        else:
+            rows = pattern_matrix[guesses[start:start + block_size]]
+        pattern_block = rows[:, answers]
+        counts = kernels.pattern_histograms(pattern_block, num_patterns)
+
+        stop = start + len(counts)
+        entropy[start:stop] = kernels.histogram_entropy(counts, num_answers)
+        num_parts[start:stop] = np.count_nonzero(counts, axis=1)
+
+    if guesses is None:
+        in_answers = np.zeros(num_guesses, dtype=int)
+        in_answers[answers] = 1
+    else:
+        in_answers = np.isin(guesses, answers).astype(int)
+
+    # Each part of size m needs at least 2m - 1 guesses, and a guess
+    # which is a possible answer solves its own part immediately.
+    lower_bound = 3 * num_answers - in_answers - num_parts
+
+    return entropy, lower_bound
+
+
+def _part_lower_bound(size):
+    '''
+    Returns the lower bound on the total guesses to solve a set of words.
+    '''
+    return 2 * size - 1
+
+
+def _split(pattern_row, answers, all_correct=patterns.ALL_CORRECT):
+    '''
+    Splits answers by their pattern for a guess, leaving out the word
+    guessed correctly.
+    '''
+    order = np.argsort(pattern_row, kind='stable')
+    sorted_patterns = pattern_row[order]
+    boundaries = np.flatnonzero(np.diff(sorted_patterns)) + 1
+    parts = np.split(answers[order], boundaries)
+    part_patterns = sorted_patterns[np.r_[0, boundaries]]
+    return [part for part, pattern in zip(parts, part_patterns)
+            if pattern != all_correct]
+
+
+class ExpectedGuessSearch():
+
+    def __init__(self, pattern_matrix, top_k=8, max_nodes=None,
+                 time_limit=None, workers=1,
+                 all_correct=patterns.ALL_CORRECT, max_memo=None):
+        '''
+        Initialise the search.
+
+        Parameters
+        ----------
+        pattern_matrix: numpy.ndarray
+            the guess x answer pattern matrix for the wordlist.
+        top_k: int
+            the number of guesses tried for each set of words, chosen by
+            highest entropy.
+        max_nodes: int
+            the number of sets which may be searched by each call to
+            search. if None, there is no limit.
+        time_limit: float
+            the number of seconds each call to search may take before
+            the rest of the search is estimated. if None, there is no
+            limit.
+        workers: int
+            the number of processes used to search the subtrees of the
+            first guess. if 1, the search runs in the current process.
+        all_correct: int
+            the pattern code of a correct guess, which depends on the word
+            length.
+        max_memo: int
+            the number of sets whose results are kept between calls to
+            search. once there are more, the memo is cleared before the
+            next search. if None, there is no limit.
+        '''
+        self.pattern_matrix = pattern_matrix
+        self.num_words = pattern_matrix.shape[1]
+        self.top_k = top_k
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.workers = workers
+        self.all_correct = all_correct
+        self.max_memo = max_memo
+
+        # Exact totals and best guesses, and proven lower bounds, keyed
+        # by the bitmask of the set of words and of the allowed guesses.
+        self.memo = {}
+        self.lower_bounds = {}
+        # The allowed guesses of the current search, or None if every
+        # word may be guessed.
+        self.guesses = None
+        self.guess_key = b''
+
+        self.nodes = 0
+        self.deadline = None
+        self.complete = True
+
+    def _key(self, answers):
+        '''
+        Returns the canonical key of a set of words.
+        '''
+        mask = np.zeros(self.num_words, dtype=bool)
+        mask[answers] = True
+        return np.packbits(mask).tobytes() + self.guess_key
+
+    def _set_guesses(self, guesses):
+        '''
+        Limits the guesses of the search to the given indices, or allows
+        every guess if guesses is None.
+        '''
+        if guesses is None:
+            self.guesses = None
+            self.guess_key = b''
+            return
+        self.guesses = np.sort(np.asarray(guesses, dtype=np.intp))
+        if len(self.guesses) == 0:
+            raise ValueError('At least one guess must be allowed.')
+        mask = np.zeros(self.pattern_matrix.shape[0], dtype=bool)
+        mask[self.guesses] = True
+        self.guess_key = np.packbits(mask).tobytes()
+
+    def _score(self, answers):
+        '''
+        Scores the allowed guesses over a set of words. Guesses which are
+        not allowed have no entropy and an infinite lower bound.
+        '''
+        if self.guesses is None:
+            return score_guesses(self.pattern_matrix, answers,
+                                 all_correct=self.all_correct)
+        entropy, lower_bound = score_guesses(
+            self.pattern_matrix, answers, all_correct=self.all_correct,
+            guesses=self.guesses)
+        num_guesses = self.pattern_matrix.shape[0]
+        all_entropy = np.full(num_guesses, -np.inf)
+        all_entropy[self.guesses] = entropy
+        all_lower_bound = np.full(num_guesses, np.inf)
+        all_lower_bound[self.guesses] = lower_bound
+        return all_entropy, all_lower_bound
+
+    def _budget_exhausted(self):
+        '''
+        Checks whether the node or time budget has run out.
+        '''
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            return True
+        return False
+
+    def _candidates(self, entropy, answers):
+        '''
+        Returns the top_k guesses by entropy, with ties broken in favour
+        of possible true words.
+        '''
+        scores = entropy.copy()
+        scores[answers] += 1e-9
+        top_k = min(self.top_k, len(scores))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidates = candidates[np.argsort(-scores[candidates],
+                                           kind='stable')]
+        return candidates[np.isfinite(scores[candidates])]
+
+    def _solve(self, answers, bound):
+        '''
+        Finds the smallest total number of guesses needed to solve every
+        word in answers, trying the top_k guesses at each step.
+
+        Parameters
+        ----------
+        answers: numpy.ndarray
+            the indices of the possible true words.
+        bound: float
+            the total is only needed if it is below this bound.
+
+        Returns
+        ----------
+        tuple of (int, int) or None
+            the total and the best guess, or None if the total is not
+            below the bound.
+        '''
+        num_answers = len(answers)
+        if num_answers == 1:
+            return 1, int(answers[0])
+        if num_answers == 2:
+            return 3, int(answers[0])
+
+        key = self._key(answers)
+        if key in self.memo:
+            total, guess = self.memo[key]
+            return (total, guess) if total < bound else None
+        if self.lower_bounds.get(key, 0) >= bound:
+            return None
+
+        if self.nodes and self._budget_exhausted():
+            # Estimate the total from the lower bound of the set rather
+            # than scoring and searching it. The first set is always
+            # searched, so that the guess is chosen by its score.
+            self.complete = False
+            total = _part_lower_bound(num_answers)
+            return (total, int(answers[0])) if total < bound else None
+
+        self.nodes += 1
+        entropy, lower_bound = self._score(answers)
+
+        best_guess = None
+        best_total = bound
+        for guess in self._candidates(entropy, answers):
+            if lower_bound[guess] >= best_total:
+                continue
+            total = self._guess_total(guess, answers, lower_bound[guess],
+                                      best_total)
+            if total is not None and total < best_total:
+                best_total, best_guess = total, int(guess)
+
+        if best_guess is None:
+            if self.complete:
+                self.lower_bounds[key] = max(self.lower_bounds.get(key, 0),
+                                             bound)
+            return None
+
+        if self.complete:
+            self.memo[key] = (best_total, best_guess)
+        return best_total, best_guess
+
+    def _guess_total(self, guess, answers, guess_lower_bound, bound):
+        '''
+        Finds the total number of guesses needed when starting with a
+        guess, or None if it is not below the bound.
+        '''
+        parts = _split(self.pattern_matrix[guess][answers], answers,
+                       self.all_correct)
+        total = len(answers)
+        if len(parts) == 1 and len(parts[0]) == total:
+            # The guess gives no information.
+            return None
+        remaining_lower_bound = guess_lower_bound - total
+
+        for part in parts:
+            remaining_lower_bound -= _part_lower_bound(len(part))
+            result = self._solve(part,
+                                 bound - total - remaining_lower_bound)
+            if result is None:
+                return None
+            total += result[0]
+
+        return total
+
+    def search(self, answers, guesses=None):
+        '''
+        Searches for the guess which minimises the expected number of
+        guesses needed to solve every word in answers.
+
+        Parameters
+        ----------
+        answers: numpy.ndarray
+            the indices of the possible true words.
+        guesses: numpy.ndarray
+            the indices of the words which may be guessed, e.g. the
+            hard_mode_indices of a solver in hard mode. if None, every
+            word may be guessed.
+
+        Returns
+        ----------
+        SearchResult
+            the best guess found, the expected number of guesses
+            including it, the lower bound on the expected number of
+            guesses, the gap between them, the number of sets searched,
+            and whether the search finished within its budget.
+        '''
+        answers = np.sort(np.asarray(answers))
+        num_answers = len(answers)
+        self._set_guesses(guesses)
+        if (self.max_memo is not None
+                and len(self.memo) + len(self.lower_bounds) > self.max_memo):
+            self.memo.clear()
+            self.lower_bounds.clear()
+
+        self.nodes = 0
+        self.complete = True
+        self.deadline = None
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+
+        entropy, lower_bound = self._score(answers)
+        best_lower_bound = lower_bound.min() if num_answers > 2 else (
+            _part_lower_bound(num_answers))
+
+        result = None
+        if self.workers > 1 and num_answers > 2:
+            result = self._search_parallel(answers, entropy, lower_bound)
+        if result is None:
+            result = self._solve(answers, np.inf)
+        if result is None:
+            # None of the allowed guesses gives any information, so the
+            # best of them is estimated from its lower bound.
+            self.complete = False
+            guess = self._candidates(entropy, answers)[0]
+            result = int(lower_bound[guess]), int(guess)
+        total, guess = result
+
+        expected_guesses = float(total / num_answers)
+        expected_lower_bound = float(best_lower_bound / num_answers)
+        return SearchResult(int(guess), expected_guesses,
+                            expected_lower_bound,
+                            expected_guesses - expected_lower_bound,
+                            self.nodes, self.complete)
+
+    def _search_parallel(self, answers, entropy, lower_bound):
+        '''
+        Searches the subtrees of each candidate first guess in a separate
+        process and returns the best total and guess, or None if none of
+        the candidates gives any information.
+        '''
+        candidates = self._candidates(entropy, answers)
+        matrix_source = self.pattern_matrix
+        if isinstance(matrix_source, np.memmap):
+            matrix_source = matrix_source.filename
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(_search_subtree, matrix_source,
+                                       self.top_k, self.max_nodes,
+                                       self.time_limit, int(guess), answers,
+                                       int(lower_bound[guess]),
+                                       self.all_correct, self.guesses)
+                       for guess in candidates]
+            results = [future.result() for future in futures]
+
+        best = None
+        for guess, (total, nodes, complete) in zip(candidates, results):
+            self.nodes += nodes
+            self.complete &= complete
+            if total is not None and (best is None or total < best[0]):
+                best = total, int(guess)
+
+        return best
+
+
+def _search_subtree(matrix_source, top_k, max_nodes, time_limit, guess,
+                    answers, guess_lower_bound, all_correct, guesses=None):
+    '''
+    Finds the total number of guesses when starting with a guess, in a
+    worker process. The pattern matrix is memory mapped again if it was
+    loaded from a file.
+    '''
+    if isinstance(matrix_source, str):
+        matrix_source = np.load(matrix_source, mmap_mode='r')
+    subtree_search = ExpectedGuessSearch(matrix_source, top_k, max_nodes,
+                                         time_limit, all_correct=all_correct)
+    subtree_search._set_guesses(guesses)
+    if time_limit is not None:
+        subtree_search.deadline = time.perf_counter() + time_limit
+    total = subtree_search._guess_total(guess, answers, guess_lower_bound,
+                                        np.inf)
+    return total, subtree_search.nodes, subtree_search.complete
+
+
+@functools.lru_cache(maxsize=None)
+def shared_search(top_k=8, max_nodes=500, time_limit=1.0,
+                  wordlist_path=r'all_words.txt', max_memo=10000):
+    '''
+    Returns a search over the pattern matrix for a wordlist, which is
+    kept for the life of the process so that its memo is shared by every
+    game using the same settings. The memo keeps the results of up to
+    max_memo sets, which take around 2 KB each for the Wordle dictionary.
+    '''
+    word_dictionary = dictionary.load_dictionary(wordlist_path)
+    return ExpectedGuessSearch(patterns.shared_pattern_matrix(wordlist_path),
+                               top_k, max_nodes, time_limit,
+                               all_correct=word_dictionary.all_correct,
+                               max_memo=max_memo)
@@ -0,0 +1,448 @@
+'''
+This script can be executed from the command line with Python3 in
+order to run a local suggestion service, so that a game backend does
+not need to start Python or load the wordlist for every request.
+
+    >>> python3 server.py --port 8080 --workers 4
+    >>> python3 server.py --unix /tmp/wordle.sock
+
+The service speaks HTTP/1.1 with JSON bodies and has four endpoints:
+
+    POST /suggest
+        {"history": [["tares", "..G.Y"], ...], "strategy": "flagship"}
+        returns the next guess and the number of viable words. Feedback
+        can be a string of colours or a base-3 pattern code, as for
+        patterns.parse_pattern.
+    POST /solve
+        {"word": "shoal", "strategy": "flagship"}
+        returns the same record as batch.py in streaming mode.
+    GET /metrics
+        returns the number of requests, errors and the latency
+        percentiles of each endpoint.
+    GET /health
+        returns {"status": "ok"}.
+
+The event loop only parses requests. Suggestions and games are computed
+by a pool of worker processes which load the dictionary, and optionally
+the pattern matrix, once when they start.
+
+Contains:
+----------------------------------------
+    suggest_from_history
+        Replays the feedback for a list of guesses and suggests the next
+        guess.
+    LatencyMetrics
+        Records the latency of recent requests to each endpoint.
+    SuggestionServer
+        The asyncio HTTP server and its pool of worker processes.
+'''
+
+import argparse
+import asyncio
+import collections
+import functools
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import batch
+import bench
+import dictionary
+import opening
+import patterns
+import solver
+import suggestion_cache
+
+STRATEGIES = ('flagship', 'eliminator', 'entropy', 'random')
+ROUTES = {'/suggest': 'POST', '/solve': 'POST', '/metrics': 'GET',
+          '/health': 'GET'}
+MAX_BODY_SIZE = 1 << 16
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                  405: 'Method Not Allowed', 413: 'Payload Too Large',
+                  500: 'Internal Server Error'}
+
+
+def _init_worker(use_pattern_matrix):
+    '''
+    Loads the shared dictionary, the opening book of every strategy
+    which has one, and the pattern matrix if it is used, when a worker
+    process starts.
+    '''
+    dictionary.load_dictionary()
+    for strategy in STRATEGIES:
+        opening.load_opening_book(strategy)
+    if use_pattern_matrix:
+        patterns.shared_pattern_matrix()
+
+
+def _ping():
+    '''
+    Does nothing, so that the worker processes can be started early.
+    '''
+    return os.getpid()
+
+
+def _check_history(history):
+    '''
+    Raises ValueError unless a history is a list of [guess, feedback]
+    pairs, where each guess is a string and each feedback is a string or
+    a pattern code.
+    '''
+    if not isinstance(history, list):
+        raise ValueError('The history must be a list of [guess, feedback] '
+                         'pairs.')
+    for entry in history:
+        if not (isinstance(entry, (list, tuple)) and len(entry) == 2):
+            raise ValueError('The history must be a list of '
+                             '[guess, feedback] pairs.')
+        guess, feedback = entry
+        if not isinstance(guess, str):
+            raise ValueError(f'The guess {guess!r} is not a string.')
+        if (not isinstance(feedback, (str, int))
+                or isinstance(feedback, bool)):
+            raise ValueError(f'The feedback {feedback!r} is not a string '
+                             f'or a pattern code.')
+
+
+def suggest_from_history(history, strategy='flagship',
+                         use_pattern_matrix=False):
+    '''
+    Applies the feedback for each guess in a history and suggests the
+    next guess.
+
+    Parameters
+    ----------
+    history: list of (str, str or int)
+        each guess and the feedback pattern it was given.
+    strategy: str
+        the strategy used to choose the guess, as for
+        WordleSolver.suggest_guess.
+    use_pattern_matrix: boolean
+        whether to filter the viable words using the shared pattern matrix.
+
+    Returns
+    ----------
+    dict
+        the suggested guess, the number of viable words and whether the
+        history already ends with a correct guess.
+    '''
+    _check_history(history)
+    pattern_matrix = None
+    if use_pattern_matrix:
+        pattern_matrix = patterns.shared_pattern_matrix()
+    solver_instance = solver.WordleSolver(
+        suppress_info=True, pattern_matrix=pattern_matrix,
+        suggestion_cache=suggestion_cache.shared_suggestion_cache(),
+        opening_book=opening.load_opening_book(strategy))
+
+    for guess, pattern in history:
+        if solver_instance.process_feedback(guess, pattern):
+            return {'guess': solver_instance.guess_history[-1][0],
+                    'num_viable': 1, 'solved': True}
+
+    num_viable = len(solver_instance.viable_indices)
+    return {'guess': solver_instance.suggest_guess(strategy),
+            'num_viable': num_viable, 'solved': False}
+
+
+class LatencyMetrics():
+
+    def __init__(self, window=10000):
+        '''
+        Initialise the metrics.
+
+        Parameters
+        ----------
+        window: int
+            the number of recent requests to each endpoint used for the
+            latency percentiles.
+        '''
+        self.window = window
+        self.counts = collections.Counter()
+        self.errors = collections.Counter()
+        self.latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=self.window))
+
+    def record(self, endpoint, status, elapsed):
+        '''
+        Records a request to an endpoint which took elapsed seconds.
+        '''
+        self.counts[endpoint] += 1
+        if status >= 400:
+            self.errors[endpoint] += 1
+        self.latencies[endpoint].append(elapsed)
+
+    def snapshot(self):
+        '''
+        Returns the number of requests and errors, and a summary of the
+        recent latencies, for each endpoint.
+        '''
+        return {endpoint: {'requests': self.counts[endpoint],
+                           'errors': self.errors[endpoint],
+                           **bench.summarise(list(latencies))}
+                for endpoint, latencies in self.latencies.items()}
+
+
+class SuggestionServer():
+
+    def __init__(self, workers=None, use_pattern_matrix=False):
+        '''
+        Initialise the server. The worker processes are started by start.
+
+        Parameters
+        ----------
+        workers: int
+            the number of worker processes. defaults to the number of CPUs.
+        use_pattern_matrix: boolean
+            whether the workers filter the viable words using the pattern
+            matrix. this makes each suggestion faster but uses more memory
+            in each worker.
+        '''
+        self.workers = workers or os.cpu_count() or 1
+        self.use_pattern_matrix = use_pattern_matrix
+        self.metrics = LatencyMetrics()
+        self.executor = None
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8080, unix_path=None):
+        '''
+        Starts the worker processes, waits until they are ready, and
+        starts listening on a TCP port or a Unix socket. The opening
+        books of the strategies are built first if they are not cached,
+        which can take a minute.
+
+        Parameters
+        ----------
+        host: str
+            the address to listen on.
+        port: int
+            the TCP port to listen on. if 0, a free port is chosen.
+        unix_path: str
+            the path of a Unix socket to listen on instead of a TCP port.
+        '''
+        # The opening books are built once, before the workers load
+        # them, rather than in the first request for each strategy.
+        for strategy in STRATEGIES:
+            opening.load_opening_book(strategy)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self.use_pattern_matrix,))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _ping)
+                               for worker in range(self.workers)])
+
+        if unix_path is not None:
+            self.server = await asyncio.start_unix_server(
+                self._handle_connection, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(
+                self._handle_connection, host=host, port=port)
+        return self.server
+
+    @property
+    def port(self):
+        '''
+        The TCP port the server is listening on.
+        '''
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        '''
+        Stops listening and shuts down the worker processes.
+        '''
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    async def handle_request(self, method, path, body):
+        '''
+        Handles one request.
+
+        Parameters
+        ----------
+        method: str
+            the HTTP method.
+        path: str
+            the path of the request.
+        body: bytes
+            the body of the request.
+
+        Returns
+        ----------
+        status: int
+            the HTTP status code.
+        payload: dict
+            the JSON response.
+        '''
+        if path not in ROUTES:
+            return 404, {'error': f'Unknown path \'{path}\'.'}
+        if method != ROUTES[path]:
+            return 405, {'error': f'{path} only accepts {ROUTES[path]}.'}
+
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/metrics':
+            return 200, self.metrics.snapshot()
+
+        try:
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError('The request body must be a JSON object.')
+            strategy = request.get('strategy', 'flagship')
+            if strategy not in STRATEGIES:
+                raise ValueError(f'Unknown strategy \'{strategy}\'.')
+
+            if path == '/suggest':
+                history = request.get('history', [])
+                _check_history(history)
+                task = functools.partial(suggest_from_history, history,
+                                         strategy, self.use_pattern_matrix)
+            else:
+                if not isinstance(request.get('word'), str):
+                    raise ValueError('A word to solve is required.')
+                task = functools.partial(batch.solve_record, request['word'],
+                                         strategy)
+
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, task)
+        except ValueError as error:
+            return 400, {'error': str(error)}
+
+        if 'error' in result:
+            return 400, result
+        return 200, result
+
+    async def _handle_connection(self, reader, writer):
+        '''
+        Reads requests from a connection and writes their responses,
+        until the client closes the connection or asks for it to close.
+        '''
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = \
+                        request_line.decode('latin-1').split()
+                except ValueError:
+                    writer.write(_response(400, {'error': 'Bad request.'},
+                                           False))
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = (connection == 'keep-alive'
+                              or (version == 'HTTP/1.1'
+                                  and connection != 'close'))
+
+                start = time.perf_counter()
+                path = target.split('?', 1)[0]
+                length = _content_length(headers)
+                if length is None:
+                    status, payload = 400, {'error': 'Invalid '
+                                                     'Content-Length.'}
+                    keep_alive = False
+                elif length > MAX_BODY_SIZE:
+                    status, payload = 413, {'error': 'Body too large.'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    try:
+                        status, payload = await self.handle_request(
+                            method, path, body)
+                    except Exception:
+                        # The details are only logged, not sent to the
+                        # client.
+                        traceback.print_exc()
+                        status, payload = 500, {'error': 'Internal server '
+                                                         'error.'}
+
+                endpoint = path if path in ROUTES else 'other'
+                self.metrics.record(endpoint, status,
+                                    time.perf_counter() - start)
+
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def _content_length(headers):
+    '''
+    Returns the length of the request body from its headers, or None if
+    the Content-Length header is not a non-negative integer.
+    '''
+    value = headers.get('content-length', '0')
+    if not (value.isascii() and value.isdigit()):
+        return None
+    return int(value)
+
+
+def _response(status, payload, keep_alive):
+    '''
+    Returns the bytes of an HTTP response with a JSON body.
+    '''
+    body = json.dumps(payload).encode('utf-8')
+    connection = 'keep-alive' if keep_alive else 'close'
+    head = (f'HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {connection}\r\n\r\n')
+    return head.encode('latin-1') + body
+
+
+async def _serve(args):
+    '''
+    Runs the server until it is interrupted.
+    '''
+    server = SuggestionServer(args.workers, args.pattern_matrix)
+    await server.start(args.host, args.port, args.unix)
+    if args.unix is not None:
+        print(f'Listening on {args.unix}', flush=True)
+    else:
+        print(f'Listening on http://{args.host}:{server.port}', flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a local Wordle suggestion service.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='the address to listen on.')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='the TCP port to listen on.')
+    parser.add_argument('--unix', metavar='PATH', default=None,
+                        help='listen on a Unix socket instead of a TCP port.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of worker processes.')
+    parser.add_argument('--pattern-matrix', action='store_true',
+                        help='filter words using the cached pattern matrix.')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
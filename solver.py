@@ -3,20 +3,46 @@ This module is the core of the Wordle solver program. The
 main feature is the WordleSolver class.
 """
 
+import copy
+import hashlib
+
 import numpy as np
+import constraints
+import dictionary
+import instrumentation
+import kernels
+import patterns
 from colorama import init as colorama_init
 from colorama import Fore
 from colorama import Style
 
 colorama_init()
 
+# Increment whenever a change to the suggest methods can change the guesses
+# they make, so that guesses cached on disk are recomputed.
+STRATEGY_VERSION = 3
+
+# The first guess of the flagship strategy if there is no opening book.
+DEFAULT_FIRST_GUESS = 'salet'
+
+# The colours of absent, present and correct letters when a guess is
+# printed.
+FEEDBACK_COLOURS = (Fore.RED, Fore.YELLOW, Fore.CYAN)
+
 
 class WordleSolver():
 
     def __init__(self,
                  wordlist_path=r'all_words.txt',
                  true_word=None,
-                 suppress_info=False
+                 suppress_info=False,
+                 pattern_matrix=None,
+                 word_dictionary=None,
+                 suggestion_cache=None,
+                 hard_mode=False,
+                 answers=None,
+                 opening_book=None,
+                 stats=None
                  ):
         '''
         Initialise the solver. Set attributes to their default values,
@@ -33,21 +59,147 @@ class WordleSolver():
         suppress_info: boolean
             if set to true, will stop most information from being printed.
             can be useful if solving many words in batch.
+        pattern_matrix: numpy.ndarray
+            the guess x answer feedback pattern matrix for the wordlist,
+            e.g. from patterns.load_pattern_matrix. if given, guesses are
+            processed by comparing pattern codes rather than by checking
+            each word against the known letters.
+        word_dictionary: dictionary.Dictionary
+            the dictionary of allowed words. if None, the shared
+            dictionary for wordlist_path is used, so that creating a
+            solver does not read the wordlist again.
+        suggestion_cache: suggestion_cache.SuggestionCache
+            a cache of the guesses suggested by suggest_guess for each
+            state, which may be shared by many solvers. if None,
+            suggestions are always computed.
+        hard_mode: boolean
+            if set to true, every guess must use the hints revealed so
+            far: correct letters must be guessed in the same position and
+            present letters must be included. suggestions are only chosen
+            from these words.
+        answers: dictionary.AnswerList
+            the words which may be the true word, and their prior weights.
+            every word in the dictionary may still be guessed. if None,
+            every word in the dictionary is an equally likely answer.
+        opening_book: opening.OpeningBook
+            the first and second guesses of a strategy, e.g. from
+            opening.load_opening_book. the flagship strategy uses the
+            book's first guess instead of DEFAULT_FIRST_GUESS, and
+            suggest_guess looks up the first two guesses of the book's
+            strategy, unless the solver is in hard mode or has answers.
+        stats: instrumentation.SolverStats
+            if given, the time spent in each phase of every turn, the
+            number of viable words after each guess and the source of
+            each suggestion are recorded. copies of the solver do not
+            record, so feedback explored on a copy is not counted as a
+            turn.
         '''
         self.wordlist_path = wordlist_path
-        self.fetch_word_list()
-        self.viable_wordlist = self.master_wordlist[:]
+        if word_dictionary is None:
+            self.fetch_word_list()
+        else:
+            self.set_dictionary(word_dictionary)
+        self.answers = answers
+        if answers is None:
+            self.viable_indices = self.dictionary.all_indices
+        elif answers.dictionary_hash != self.dictionary.hash:
+            raise ValueError('The answer list was built for a different '
+                             'wordlist.')
+        else:
+            self.viable_indices = answers.indices
+        if (opening_book is not None
+                and opening_book.wordlist_hash != self.dictionary.hash):
+            raise ValueError('The opening book was built for a different '
+                             'wordlist.')
+        self.opening_book = opening_book
         self.suppress_info = suppress_info
+        self.pattern_matrix = pattern_matrix
+        self.suggestion_cache = suggestion_cache
+        self.stats = stats
+        self.hard_mode = hard_mode
+        self.hard_mode_indices = self.dictionary.all_indices
 
         # Initialise important attributes.
         self.num_attempts = 0
-        self.known_letters = ['*', '*', '*', '*', '*']
-        self.known_falseletters = [[], [], [], [], []]
-        self.minnum_letters = np.zeros(26, dtype=int)
-        self.maxnum_letters = np.ones(26, dtype=int) * 5
+        self.guess_history = []
+        alphabet_size = len(self.dictionary.alphabet)
+        self.known_letters = ['*'] * self.word_length
+        self.known_falseletters = [[] for i in range(self.word_length)]
+        self.minnum_letters = np.zeros(alphabet_size, dtype=np.uint8)
+        self.maxnum_letters = np.full(alphabet_size, self.word_length,
+                                      dtype=np.uint8)
 
         self.set_true_word(true_word)
 
+        if stats is not None:
+            stats.start_game(len(self.viable_indices))
+
+    def copy(self):
+        '''
+        Returns a copy of the solver which can be updated without changing
+        this one. The dictionary and the read-only arrays are shared. The
+        copy has no stats, so its guesses are not recorded.
+        '''
+        solver_copy = copy.copy(self)
+        solver_copy.stats = None
+        solver_copy.guess_history = list(self.guess_history)
+        solver_copy.known_letters = list(self.known_letters)
+        solver_copy.known_falseletters = [list(letters) for letters
+                                          in self.known_falseletters]
+        return solver_copy
+
+    @property
+    def viable_indices(self):
+        '''
+        The indices in the master wordlist of the words which may still be
+        the true word, in the dictionary's compact index_dtype. Setting
+        them also updates viable_letter_counts, the number, or the total
+        weight, of the viable words containing each letter.
+        '''
+        return self._viable_indices
+
+    @viable_indices.setter
+    def viable_indices(self, indices):
+        indices = np.asarray(indices, dtype=self.dictionary.index_dtype)
+        self._viable_indices = indices
+        answers = self.answers
+        if indices is self.dictionary.all_indices:
+            self.viable_letter_counts = self.dictionary.letter_counts
+        elif answers is not None and indices is answers.indices:
+            self.viable_letter_counts = answers.letter_counts
+        elif answers is not None and answers.word_weights is not None:
+            self.viable_letter_counts = (
+                self.viable_weights
+                @ self.dictionary.presence_matrix[indices]).astype(np.float32)
+        else:
+            self.viable_letter_counts = \
+                self.dictionary.presence_matrix[indices].sum(axis=0)
+
+    @property
+    def viable_weights(self):
+        '''
+        The prior weight of each viable word if the answers are weighted,
+        otherwise None. The weights are looked up when they are needed
+        rather than kept with each game.
+        '''
+        if self.answers is None or self.answers.word_weights is None:
+            return None
+        return self.answers.word_weights[self.viable_indices]
+
+    @property
+    def viable_wordlist(self):
+        '''
+        The list of words which may still be the true word.
+        '''
+        return [self.master_wordlist[i] for i in self.viable_indices]
+
+    @property
+    def wordlist_num_letters(self):
+        '''
+        The number of each letter in each of the viable words.
+        '''
+        return self.master_wordlist_num_letters[self.viable_indices]
+
     def sanitise_word(self, word):
         '''
         Sanitises an input word by removing spaces and converting to lower
@@ -60,16 +212,18 @@ class WordleSolver():
         Returns
         ----------
         sanitised_word: str
-            the sanitised word as a five letter lowercase string
+            the sanitised word as a lowercase string with the word length
+            of the dictionary
         '''
         sanitised_word = word.replace(" ", "")
         sanitised_word = sanitised_word.lower()
 
-        if len(sanitised_word) != 5:
+        if len(sanitised_word) != self.word_length:
             raise ValueError(
-                f'Unable to convert {word} to a five letter lowercase word.')
+                f'Unable to convert {word} to a {self.word_length} letter '
+                f'lowercase word.')
 
-        if sanitised_word not in self.master_wordlist:
+        if sanitised_word not in self.master_index:
             raise ValueError(
                 f'Input word \'{word}\' is not in the Wordle dictionary.')
 
@@ -91,42 +245,15 @@ class WordleSolver():
             the word in output format, suitable to be sent to print
             in colour.
         '''
-
         word = self.sanitise_word(word)
-
-        letter_string_list = ["*", "*", "*", "*", "*"]
-        output_string = ""
-        running_num_letters = np.zeros(26, dtype=int)
-
-        # First highlight the green letters because they take priority
-        # e.g. in the shoal ->books
-        for i, letter in enumerate(word):
-            index = ord(letter) - ord('a')
-            if letter == self.true_word[i]:
-                running_num_letters[index] += 1
-                letter_string_list[i] = (f'{Fore.CYAN}'
-                                         f'{letter.upper()}{Style.RESET_ALL}')
-
-        for i, letter in enumerate(word):
-            index = ord(letter) - ord('a')
-            if letter_string_list[i] == "*":
-                if self.true_num_letters[index] > running_num_letters[index]:
-                    running_num_letters[index] += 1
-                    letter_string_list[i] = (f'{Fore.YELLOW}{letter.upper()}'
-                                             f'{Style.RESET_ALL}')
-
-                elif (self.true_num_letters[index]
-                      == running_num_letters[index]):
-                    letter_string_list[i] = (f'{Fore.RED}{letter.upper()}'
-                                             f'{Style.RESET_ALL}')
-            output_string = f'{output_string}{letter_string_list[i]}'
-
-        return output_string
+        return patterns.format_pattern(word, self.compute_pattern(word),
+                                       FEEDBACK_COLOURS, Style.RESET_ALL)
 
     def set_true_word(self, true_word):
         '''
         Sets the true_word attribute to the true_word provided.
-        Sets to a random word on the master list if true_word is None or
+        Sets to a random word on the master list, or a random answer drawn
+        by weight if the solver has answers, if true_word is None or
         invalid.
 
         Parameters
@@ -138,42 +265,84 @@ class WordleSolver():
         '''
 
         if true_word is None:
-            number_of_words = len(self.master_wordlist)
-            random_index = np.random.randint(number_of_words)
-            self.true_word = self.master_wordlist[random_index]
+            self.true_word = self._random_true_word()
 
         else:
             try:
                 self.true_word = self.sanitise_word(true_word)
+                if (self.answers is not None
+                        and self.true_word not in self.answers):
+                    raise ValueError(f'{true_word} is not an answer.')
             except ValueError:
                 if not self.suppress_info:
                     print('Input true word not valid. '
                           'Setting random true word.')
-                number_of_words = len(self.master_wordlist)
-                random_index = np.random.randint(number_of_words)
-                self.true_word = self.master_wordlist[random_index]
+                self.true_word = self._random_true_word()
+
+        self.true_num_letters = \
+            self.master_wordlist_num_letters[self.master_index[self.true_word]]
 
-        self.true_num_letters = np.zeros(26, dtype=int)
-        for i, letter in enumerate(self.true_word):
-            self.true_num_letters[ord(letter) - ord('a')] += 1
+    def _random_true_word(self):
+        '''
+        Returns a random word from the master list, or a random answer
+        drawn by weight if the solver has answers.
+        '''
+        if self.answers is None:
+            number_of_words = len(self.master_wordlist)
+            random_index = np.random.randint(number_of_words)
+            return self.master_wordlist[random_index]
+
+        answer_weights = None
+        if self.answers.word_weights is not None:
+            answer_weights = self.answers.word_weights[self.answers.indices]
+            answer_weights = answer_weights / answer_weights.sum()
+        random_index = np.random.choice(len(self.answers), p=answer_weights)
+        return self.answers.words[random_index]
 
     def fetch_word_list(self):
         '''
-        Fetches the master word list from the specificed file and returns the
-        words as a list.
+        Fetches the master word list from the shared dictionary for the
+        wordlist_path attribute, reading the file if this is the first
+        time the wordlist has been used.
+        '''
+        self.set_dictionary(dictionary.load_dictionary(self.wordlist_path))
+
+    def set_dictionary(self, word_dictionary):
         '''
-        with open(self.wordlist_path, 'r') as file:
-            self.master_wordlist = [line.rstrip() for line in file]
+        Sets the master word list attributes from a Dictionary. The
+        arrays are shared with the dictionary rather than copied.
 
-        num_words = len(self.master_wordlist)
-        self.master_wordlist_num_letters = np.zeros((num_words, 26),
-                                                    dtype=int)
-        for i, word in enumerate(self.master_wordlist):
-            for letter in word:
-                self.master_wordlist_num_letters[i, ord(
-                    letter) - ord('a')] += 1
+        Parameters
+        ----------
+        word_dictionary: dictionary.Dictionary
+            the dictionary of allowed words.
+        '''
+        self.dictionary = word_dictionary
+        self.master_wordlist = word_dictionary.words
+        self.master_index = word_dictionary.index
+        self.master_wordlist_codes = word_dictionary.codes
+        self.master_wordlist_num_letters = word_dictionary.num_letters
+        self.word_length = word_dictionary.word_length
+        self.letter_index = word_dictionary.letter_index
+
+    def compute_pattern(self, guess):
+        '''
+        Computes the feedback pattern for a guess against the true word.
 
-        self.wordlist_num_letters = np.copy(self.master_wordlist_num_letters)
+        Parameters
+        ----------
+        guess: str
+            the sanitised guess.
+
+        Returns
+        ----------
+        int
+            the base-3 feedback pattern code.
+        '''
+        if self.pattern_matrix is not None:
+            return int(self.pattern_matrix[self.master_index[guess],
+                                           self.master_index[self.true_word]])
+        return patterns.score_pattern(guess, self.true_word)
 
     def process_guess(self, guess):
         '''
@@ -185,7 +354,7 @@ class WordleSolver():
         ----------
         guess: str
             the input word to be processed as a guess.
-            must be a valid five letter word.
+            must be a word in the dictionary.
 
         Returns
         ----------
@@ -198,58 +367,226 @@ class WordleSolver():
             guess = self.sanitise_word(guess)
         except ValueError:
             raise ValueError(
-                f'{guess} is not a valid 5 letter word. Guess not processed.')
+                f'{guess} is not a valid {self.word_length} letter word. '
+                f'Guess not processed.')
+        self._check_hard_mode(guess)
 
-        self.num_attempts += 1
+        pattern = self.compute_pattern(guess)
 
         if not self.suppress_info:
-            print(self.output_word(guess))
+            print(patterns.format_pattern(guess, pattern, FEEDBACK_COLOURS,
+                                          Style.RESET_ALL))
+
+        return self._record_feedback(guess, pattern)
+
+    def process_feedback(self, guess, pattern):
+        '''
+        Takes a guess and the feedback pattern it was given, e.g. by a
+        game being played elsewhere, and updates the class attributes with
+        new information from that feedback. Unlike process_guess, this
+        does not need the true word.
+
+        Parameters
+        ----------
+        guess: str
+            the input word which was guessed.
+            must be a word in the dictionary.
+        pattern: str or int
+            the feedback for the guess, as a string of colours such as
+            'GY..Y' or as a base-3 pattern code. see patterns.parse_pattern.
+
+        Returns
+        ----------
+        boolean
+            whether or not the guess is correct
+        '''
+        try:
+            guess = self.sanitise_word(guess)
+        except ValueError:
+            raise ValueError(
+                f'{guess} is not a valid {self.word_length} letter word. '
+                f'Guess not processed.')
+        self._check_hard_mode(guess)
+        pattern = patterns.parse_pattern(pattern, self.word_length)
+
+        # Check the feedback against the viable words before changing any
+        # knowledge, so that inconsistent feedback can be corrected.
+        viable_indices = self.viable_by_pattern(guess, pattern)
+        if len(viable_indices) == 0:
+            raise ValueError(
+                f'No viable word gives the feedback '
+                f'{patterns.pattern_to_string(pattern, self.word_length)} '
+                f'for {guess}. Feedback not processed.')
+
+        if not self.suppress_info:
+            print(f'{guess} '
+                  f'{patterns.pattern_to_string(pattern, self.word_length)}')
+
+        return self._record_feedback(guess, pattern, viable_indices)
+
+    def _check_hard_mode(self, guess):
+        '''
+        Raises a ValueError if the solver is in hard mode and the sanitised
+        guess does not use every hint revealed so far.
+        '''
+        if not self.hard_mode:
+            return
+        guess_index = self.master_index[guess]
+        position = np.searchsorted(self.hard_mode_indices, guess_index)
+        if (position == len(self.hard_mode_indices)
+                or self.hard_mode_indices[position] != guess_index):
+            raise ValueError(
+                f'{guess} does not use every revealed hint, so it is not '
+                f'allowed in hard mode. Guess not processed.')
+
+    def _record_feedback(self, guess, pattern, viable_indices=None):
+        '''
+        Records a guess and its feedback pattern, and applies the feedback
+        unless the guess is correct.
+
+        Parameters
+        ----------
+        guess: str
+            the sanitised guess.
+        pattern: int
+            the base-3 feedback pattern code for the guess.
+        viable_indices: numpy.ndarray
+            the viable words which give the feedback, if already known.
+
+        Returns
+        ----------
+        boolean
+            whether or not the guess is correct
+        '''
+        self.num_attempts += 1
+        self.guess_history.append((guess, pattern))
 
         # Check if the guess is correct
-        if guess == self.true_word:
+        if pattern == self.dictionary.all_correct:
             if not self.suppress_info:
                 print(
                     f'You have successfully guessed the word after '
                     f'{self.num_attempts} attempts!')
+            if self.stats is not None:
+                self.stats.record_guess(guess, pattern, 1)
             return True
 
-        guess_num_letters = np.zeros(26, dtype=int)
+        self._apply_feedback(guess, pattern, viable_indices)
+
+        if self.stats is not None:
+            self.stats.record_guess(guess, pattern,
+                                    len(self.viable_indices))
+        return False
+
+    @instrumentation.timed_phase('filter')
+    def _apply_feedback(self, guess, pattern, viable_indices=None):
+        '''
+        Updates the known letters and the viable words using the feedback
+        pattern given for a guess. This does not need the true word, so it
+        is also used to explore hypothetical feedback.
+
+        Parameters
+        ----------
+        guess: str
+            the sanitised guess.
+        pattern: int
+            the base-3 feedback pattern code for the guess.
+        viable_indices: numpy.ndarray
+            the viable words which give the feedback, if already known.
+        '''
+        guess_num_letters = np.zeros_like(self.minnum_letters)
+        marked_num_letters = np.zeros_like(self.minnum_letters)
         # Update the lists with new knowledge from guess
         for i, letter in enumerate(guess):
-            guess_num_letters[ord(letter) - ord('a')] += 1
-            if letter == self.true_word[i]:
+            index = self.letter_index[letter]
+            feedback = (pattern // 3 ** i) % 3
+            guess_num_letters[index] += 1
+            if feedback == patterns.CORRECT:
                 self.known_letters[i] = letter
             else:
                 self.known_falseletters[i].append(letter)
+            if feedback != patterns.ABSENT:
+                marked_num_letters[index] += 1
 
-        too_many_mask = guess_num_letters > self.true_num_letters
-        exact_mask = guess_num_letters == self.true_num_letters
-        too_few_mask = guess_num_letters < self.true_num_letters
-
-        # When you guess too many of a letter, you know the exact number of
-        # that letter in the true word.
+        # When you guess too many of a letter, some of its copies are not
+        # highlighted and you know the exact number of that letter in the
+        # true word. Otherwise you have updated knowledge about the minimum
+        # number of that letter, but only if your new knowledge
+        # is more restrictive than the previous knowledge gained.
 
-        self.minnum_letters = np.where(too_many_mask,
-                                       self.true_num_letters,
-                                       self.minnum_letters)
+        too_many_mask = marked_num_letters < guess_num_letters
 
+        self.minnum_letters = np.maximum(marked_num_letters,
+                                         self.minnum_letters)
         self.maxnum_letters = np.where(too_many_mask,
-                                       self.true_num_letters,
+                                       marked_num_letters,
                                        self.maxnum_letters)
 
-        # When you guess the correct number or too few of a letter,
-        # you have updated knowledge about the minimum number of that letter,
-        # but only if your new knowledge
-        # is more restrictive than the previous knowledge gained.
+        if self.hard_mode:
+            self.eliminate_hard_mode_guesses()
 
-        self.minnum_letters = np.where(too_few_mask | exact_mask,
-                                       np.maximum(guess_num_letters,
-                                                  self.minnum_letters),
-                                       self.minnum_letters)
+        if viable_indices is not None:
+            self.viable_indices = viable_indices
+        elif (self.pattern_matrix is not None
+              or self._is_opening_book_guess(guess)):
+            self.eliminate_by_pattern(guess, pattern)
+        else:
+            self.eliminate_nonviable_words()
 
-        self.eliminate_nonviable_words()
+    @instrumentation.timed_phase('filter')
+    def viable_by_pattern(self, guess, pattern):
+        '''
+        Finds the viable words which would give the same feedback pattern
+        for the guess. Only the viable words are compared, using the
+        pattern_matrix attribute if it is set, or the opening book's
+        patterns for its first guess.
 
-        return False
+        Parameters
+        ----------
+        guess: str
+            the sanitised guess.
+        pattern: int
+            the base-3 feedback pattern code observed for the guess.
+
+        Returns
+        ----------
+        numpy.ndarray
+            the indices of the viable words which give the pattern.
+        '''
+        guess_index = self.master_index[guess]
+        if self.pattern_matrix is not None:
+            viable_row = self.pattern_matrix[guess_index][self.viable_indices]
+            return self.viable_indices[viable_row == pattern]
+        if self._is_opening_book_guess(guess):
+            viable_row = self.opening_book.first_patterns[self.viable_indices]
+            return self.viable_indices[viable_row == pattern]
+        return self.viable_indices[kernels.filter_by_pattern(
+            self.master_wordlist_codes[guess_index],
+            self.master_wordlist_codes, self.viable_indices, pattern,
+            len(self.dictionary.alphabet))]
+
+    def _is_opening_book_guess(self, guess):
+        '''
+        Returns whether the sanitised guess is the first guess of the
+        opening book, whose patterns are recorded in the book.
+        '''
+        return (self.opening_book is not None
+                and self.master_index[guess] == self.opening_book.first_guess)
+
+    def eliminate_by_pattern(self, guess, pattern):
+        '''
+        Eliminates words which would not have given the same feedback
+        pattern for the guess. This gives the same viable words as
+        eliminate_nonviable_words.
+
+        Parameters
+        ----------
+        guess: str
+            the sanitised guess which has just been processed.
+        pattern: int
+            the base-3 feedback pattern code observed for the guess.
+        '''
+        self.viable_indices = self.viable_by_pattern(guess, pattern)
 
     def eliminate_nonviable_words(self):
         '''
@@ -257,43 +594,76 @@ class WordleSolver():
         the current knowledge. The current knowledge is stored in the
         minnum_letter, maxnumletters, known_letters, and known_falseletters
         attributes.
-        '''
-
-        for i, word in enumerate(list(self.viable_wordlist)):
-            # Check that the word doesn't violate known letter numbers
-            if (np.any(self.wordlist_num_letters[i, :] < self.minnum_letters)
-                    or np.any(self.wordlist_num_letters[i, :]
-                              > self.maxnum_letters)):
-                self.viable_wordlist.remove(word)
-                continue
-
-            for j, letter in enumerate(word):
 
-                # Check that the word contains the true letter, if known
-                if (self.known_letters[j] != '*'
-                        and self.known_letters[j] != letter):
-                    self.viable_wordlist.remove(word)
-                    break
+        The restrictions are checked for the viable words by
+        kernels.filter_by_letters, and only the viable_indices attribute is
+        updated.
+        '''
+        # The code of the known letter at each position, or -1, and
+        # whether each letter is known to be false at each position.
+        known_codes = np.array([-1 if letter == '*'
+                                else self.letter_index[letter]
+                                for letter in self.known_letters],
+                               dtype=np.int64)
+        false_letters = np.zeros((len(self.known_falseletters),
+                                  len(self.dictionary.alphabet)), dtype=bool)
+        for j, letters in enumerate(self.known_falseletters):
+            false_letters[j, [self.letter_index[letter]
+                              for letter in letters]] = True
+
+        viable_mask = kernels.filter_by_letters(
+            self.master_wordlist_codes, self.master_wordlist_num_letters,
+            self.viable_indices, self.minnum_letters, self.maxnum_letters,
+            known_codes, false_letters)
+        self.viable_indices = self.viable_indices[viable_mask]
+
+    def eliminate_hard_mode_guesses(self):
+        '''
+        Removes words which are no longer allowed as guesses in hard mode
+        from the hard_mode_indices attribute. A guess must have each known
+        letter in its position, and at least the minimum number of each
+        letter given by minnum_letters. Only the words which were allowed
+        before are checked, in the same way as eliminate_nonviable_words.
+        '''
+        legal_codes = self.master_wordlist_codes[self.hard_mode_indices]
+        legal_num_letters = \
+            self.master_wordlist_num_letters[self.hard_mode_indices]
 
-                # Otherwise, check that the letter isn't known to be false
-                elif any(letter in x for x in self.known_falseletters[j][:]):
-                    self.viable_wordlist.remove(word)
-                    break
+        legal_mask = np.all(
+            legal_num_letters
+            >= self.minnum_letters.astype(legal_num_letters.dtype), axis=1)
+        for j, letter in enumerate(self.known_letters):
+            if letter != '*':
+                legal_mask &= legal_codes[:, j] == self.letter_index[letter]
 
-        self.wordlist_num_letters = np.zeros((len(self.viable_wordlist), 26),
-                                             dtype=int)
-        for i, word in enumerate(self.viable_wordlist):
-            for letter in word:
-                self.wordlist_num_letters[i, ord(letter) - ord('a')] += 1
+        self.hard_mode_indices = self.hard_mode_indices[legal_mask]
 
     def suggest_random_guess(self):
         '''
-        Suggests a random word from the viable_wordlist attribute.
+        Suggests a random word from the viable_wordlist attribute. If the
+        answers are weighted, words are drawn by their weight.
         '''
-        number_of_words = len(self.viable_wordlist)
-        random_index = np.random.randint(number_of_words)
-        return self.viable_wordlist[random_index]
+        number_of_words = len(self.viable_indices)
+        viable_weights = self.viable_weights
+        if viable_weights is None:
+            random_index = np.random.randint(number_of_words)
+        else:
+            random_index = np.random.choice(
+                number_of_words, p=viable_weights / viable_weights.sum())
+        return self.master_wordlist[self.viable_indices[random_index]]
 
+    def _eliminator_letter_scores(self):
+        '''
+        Scores each letter by the number of viable words it appears in.
+        Letters with a known minimum number are scored down, and letters
+        with a known exact number are not scored at all.
+        '''
+        letter_freq_list = self.viable_letter_counts * np.power(
+            np.float32(0.01), self.minnum_letters, dtype=np.float64)
+        letter_freq_list[self.minnum_letters == self.maxnum_letters] = 0
+        return letter_freq_list.astype(np.float32)
+
+    @instrumentation.timed_phase('scoring')
     def suggest_eliminator_guess(self, force_viable=False):
         '''
         Suggest a guess to eliminate as many common letters as possible.
@@ -304,47 +674,341 @@ class WordleSolver():
             be the correct word.
         '''
 
-        # Count number of viable words in which each letter appears
-
-        wordlist_binary_letters = np.where(self.wordlist_num_letters > 0, 1, 0)
-        letter_freq_list = np.sum(wordlist_binary_letters, axis=0, dtype=float)
-        letter_freq_list *= 0.01 ** self.minnum_letters
-
-        letter_freq_list = np.where(self.minnum_letters == self.maxnum_letters,
-                                    0, letter_freq_list)
+        letter_freq_list = self._eliminator_letter_scores()
 
         # Score the wordlist by multiplying each of its letters by their
         # frequency. Double letters are only counted once.
         # This is done for both the viable and the master wordlists.
 
-        wordlist_scores = np.sum(
-            wordlist_binary_letters * letter_freq_list, axis=1)
+        presence_matrix = self.dictionary.presence_matrix
+        wordlist_scores = presence_matrix[self.viable_indices] \
+            @ letter_freq_list
         highest_scoring_index = np.argmax(wordlist_scores)
         highest_scoring = wordlist_scores[highest_scoring_index]
+        highest_scoring_word = \
+            self.master_wordlist[self.viable_indices[highest_scoring_index]]
 
-        master_wordlist_binary_letters = np.where(
-            self.master_wordlist_num_letters > 0, 1, 0)
+        # Force to choose from the viable wordlist if required,
+        # Otherwise choose from master unless a viable word has
+        # a very close score.
+        if force_viable:
+            return highest_scoring_word
 
-        master_wordlist_scores = np.sum(
-            master_wordlist_binary_letters * letter_freq_list, axis=1)
+        guess_indices = self._guess_pool(force_viable)
+        if self.hard_mode:
+            master_wordlist_scores = presence_matrix[guess_indices] \
+                @ letter_freq_list
+        else:
+            master_wordlist_scores = presence_matrix @ letter_freq_list
         highest_scoring_master_index = np.argmax(master_wordlist_scores)
         highest_scoring_master = \
             master_wordlist_scores[highest_scoring_master_index]
 
-        # Force to choose from the viable wordlist if required,
-        # Otherwise choose from master unless a viable word has
-        # a very close score.
+        if highest_scoring >= 0.99999 * highest_scoring_master:
+            return highest_scoring_word
+        return self.master_wordlist[
+            guess_indices[highest_scoring_master_index]]
+
+    @instrumentation.timed_phase('scoring')
+    def suggest_eliminator_guesses(self, num_guesses, force_viable=False):
+        '''
+        Suggest the highest scoring eliminator guesses, best first.
+        Only the top scores are sorted, so this is cheap for a few guesses.
+
+        parameters:
+        num_guesses: int
+            the number of guesses to suggest.
+        force_viable: boolean
+            Set to true in order to only select words that may still
+            be the correct word.
+        '''
+        guess_indices = self._guess_pool(force_viable)
+        scores = self.dictionary.presence_matrix[guess_indices] \
+            @ self._eliminator_letter_scores()
+
+        num_guesses = min(num_guesses, len(scores))
+        if num_guesses < len(scores):
+            top = np.argpartition(-scores, num_guesses - 1)[:num_guesses]
+        else:
+            top = np.arange(len(scores))
+        # Sort by score, then by position in the wordlist.
+        top = top[np.lexsort((top, -scores[top]))]
+        return [self.master_wordlist[i] for i in guess_indices[top]]
+
+    def compute_guess_patterns(self, guess_indices):
+        '''
+        Computes the feedback pattern for each of the given guesses against
+        each of the viable words. The patterns are read from the
+        pattern_matrix attribute if it is set, otherwise they are computed.
+
+        Parameters
+        ----------
+        guess_indices: numpy.ndarray
+            the indices of the guesses in the master wordlist.
+
+        Returns
+        ----------
+        numpy.ndarray
+            array of shape (len(guess_indices), number of viable words)
+            holding the base-3 pattern codes.
+        '''
+        if self.pattern_matrix is None:
+            return patterns.compute_patterns(
+                self.master_wordlist_codes[guess_indices],
+                self.master_wordlist_codes[self.viable_indices])
+
+        guess_rows = self.pattern_matrix[guess_indices]
+        if len(self.viable_indices) == len(self.master_wordlist):
+            return guess_rows
+        return guess_rows[:, self.viable_indices]
+
+    @instrumentation.timed_phase('scoring')
+    def score_guess_patterns(self, guess_indices, block_size=128):
+        '''
+        Scores guesses by the distribution of feedback patterns they would
+        produce over the viable words. The guesses are processed in blocks,
+        counting the patterns of a whole block with
+        kernels.pattern_histograms. If
+        the answers are weighted, each viable word counts by its weight.
+
+        Parameters
+        ----------
+        guess_indices: numpy.ndarray
+            the indices of the guesses in the master wordlist.
+        block_size: int
+            the number of guesses scored at once. bounds the memory used.
+
+        Returns
+        ----------
+        entropy: numpy.ndarray
+            the expected information, in bits, gained from each guess.
+        expected_remaining: numpy.ndarray
+            the expected number of viable words left after each guess.
+        '''
+        if self.answers is not None and self.answers.word_weights is not None:
+            return self._score_weighted_guess_patterns(guess_indices,
+                                                       block_size)
+
+        num_guesses = len(guess_indices)
+        num_viable = len(self.viable_indices)
+        num_patterns = self.dictionary.num_patterns
+
+        entropy = np.empty(num_guesses)
+        expected_remaining = np.empty(num_guesses)
+
+        for start in range(0, num_guesses, block_size):
+            block = guess_indices[start:start + block_size]
+            pattern_block = self.compute_guess_patterns(block)
+
+            counts = kernels.pattern_histograms(pattern_block, num_patterns)
+
+            stop = start + len(block)
+            entropy[start:stop] = kernels.histogram_entropy(counts,
+                                                            num_viable)
+            expected_remaining[start:stop] = \
+                np.sum(counts.astype(float) ** 2, axis=1) / num_viable
+
+        return entropy, expected_remaining
+
+    def _score_weighted_guess_patterns(self, guess_indices, block_size):
+        '''
+        Scores guesses as score_guess_patterns does, with the patterns of
+        each viable word counted by its weight.
+        '''
+        num_guesses = len(guess_indices)
+        num_patterns = self.dictionary.num_patterns
+        weights = self.viable_weights
+        total_weight = weights.sum()
+
+        entropy = np.empty(num_guesses)
+        expected_remaining = np.empty(num_guesses)
+
+        for start in range(0, num_guesses, block_size):
+            block = guess_indices[start:start + block_size]
+            pattern_block = self.compute_guess_patterns(block)
+
+            counts = kernels.pattern_histograms(pattern_block, num_patterns)
+            pattern_weights = kernels.pattern_histograms(
+                pattern_block, num_patterns, weights)
+
+            stop = start + len(block)
+            entropy[start:stop] = kernels.histogram_entropy(pattern_weights,
+                                                            total_weight)
+            # The number of words left when the true word is drawn by
+            # weight.
+            expected_remaining[start:stop] = \
+                np.sum(pattern_weights * counts, axis=1) / total_weight
+
+        return entropy, expected_remaining
+
+    def _best_scoring_guess(self, scores, guess_indices):
+        '''
+        Returns the guess with the highest score. Ties are broken in
+        favour of words which may still be the true word.
+        '''
+        best_mask = scores >= scores.max() - 1e-9
+        best_indices = guess_indices[best_mask]
+        viable_best = np.isin(best_indices, self.viable_indices,
+                              assume_unique=True)
+        if np.any(viable_best):
+            return self.master_wordlist[best_indices[np.argmax(viable_best)]]
+        return self.master_wordlist[best_indices[0]]
+
+    def _guess_pool(self, force_viable):
+        '''
+        Returns the indices of the words that may be suggested. In hard
+        mode, these are the words which use every revealed hint.
+        '''
         if force_viable:
-            return self.viable_wordlist[highest_scoring_index]
-        elif not force_viable:
-            if highest_scoring >= 0.99999 * highest_scoring_master:
-                return self.viable_wordlist[highest_scoring_index]
-            return self.master_wordlist[highest_scoring_master_index]
+            return self.viable_indices
+        if self.hard_mode:
+            return self.hard_mode_indices
+        return self.dictionary.all_indices
+
+    def suggest_entropy_guess(self, force_viable=False):
+        '''
+        Suggest the guess which gives the most information about the true
+        word, measured by the entropy of its feedback patterns over the
+        viable words. This is fastest if the pattern_matrix attribute is set.
+
+        parameters:
+        force_viable: boolean
+            Set to true in order to only select words that may still
+            be the correct word.
+        '''
+        guess_indices = self._guess_pool(force_viable)
+        entropy, expected_remaining = self.score_guess_patterns(
+            guess_indices)
+        return self._best_scoring_guess(entropy, guess_indices)
+
+    def suggest_min_expected_remaining_guess(self, force_viable=False):
+        '''
+        Suggest the guess which leaves the fewest viable words on average,
+        given the distribution of its feedback patterns over the viable
+        words. This is fastest if the pattern_matrix attribute is set.
+
+        parameters:
+        force_viable: boolean
+            Set to true in order to only select words that may still
+            be the correct word.
+        '''
+        guess_indices = self._guess_pool(force_viable)
+        entropy, expected_remaining = self.score_guess_patterns(
+            guess_indices)
+        return self._best_scoring_guess(-expected_remaining, guess_indices)
+
+    def suggest_flagship_guess(self):
+        '''
+        Suggest a guess using the flagship method. This is the default
+        first guess, followed by eliminator guesses which are forced to
+        be viable once there are only a few viable words left.
+        '''
+        if self.num_attempts == 0:
+            return self.suggest_default_first_guess()
+        if len(self.viable_indices) <= 3:
+            return self.suggest_eliminator_guess(force_viable=True)
+        return self.suggest_eliminator_guess()
+
+    def state_fingerprint(self):
+        '''
+        Returns a key for the state the suggestions depend on: a hash of
+        the dictionary, whether any guess has been made, and the hashes of
+        the answers and the opening book if the solver has them, followed
+        by the key of the solver's constraints.ConstraintState. The viable
+        words are the answers which satisfy the constraints, so they are
+        not part of the key. In hard mode, the known letters are included
+        too, since they limit the guesses.
+        '''
+        context = hashlib.blake2b(digest_size=8)
+        context.update(self.dictionary.hash.encode('ascii'))
+        if self.answers is not None:
+            context.update(self.answers.hash.encode('ascii'))
+        if self.opening_book is not None:
+            context.update(self.opening_book.hash.encode('ascii'))
+        context.update(bytes([self.num_attempts == 0, self.hard_mode]))
+        if self.hard_mode:
+            context.update(''.join(self.known_letters).encode('utf-8'))
+        state = constraints.ConstraintState.from_solver(self)
+        return f'{context.hexdigest()}:{state.key()}'
+
+    @instrumentation.timed_phase('suggestion')
+    def suggest_guess(self, strategy='flagship'):
+        '''
+        Suggest a guess using the named strategy. If the solver has an
+        opening book for the strategy, the first two guesses are read from
+        it. Otherwise, if the solver has a suggestion_cache, the guess is
+        looked up by the state fingerprint first, and only computed if it
+        is not cached. Random guesses are never cached.
+
+        parameters:
+        strategy: str
+            one of 'flagship', 'eliminator', 'entropy' or 'random'. the
+            eliminator strategy only suggests viable words.
+        '''
+        guess = self._opening_book_guess(strategy)
+        if guess is not None:
+            source = 'book'
+        elif self.suggestion_cache is None or strategy == 'random':
+            guess = self._compute_suggestion(strategy)
+            source = 'uncached'
+        else:
+            key = f'{strategy}:{self.state_fingerprint()}'
+            guess = self.suggestion_cache.get(key)
+            source = 'cache_hit'
+            if guess is None:
+                guess = self._compute_suggestion(strategy)
+                self.suggestion_cache.put(key, guess)
+                source = 'cache_miss'
+
+        if self.stats is not None:
+            self.stats.record_suggestion(source, guess)
+        return guess
+
+    def _opening_book_guess(self, strategy):
+        '''
+        Returns the opening book's guess for the guesses made so far, or
+        None if there is no book for the strategy or the game has left
+        it. The book's guesses assume every word is an equally likely
+        answer and that any word may be guessed.
+        '''
+        book = self.opening_book
+        if (book is None or book.strategy != strategy or self.hard_mode
+                or self.answers is not None
+                or len(self.guess_history) != self.num_attempts):
+            return None
+        guess_index = book.guess(self.guess_history, self.master_index)
+        if guess_index is None:
+            return None
+        return self.master_wordlist[guess_index]
+
+    def _compute_suggestion(self, strategy):
+        '''
+        Computes a guess using the named strategy, without the cache.
+        '''
+        if strategy == 'flagship':
+            return self.suggest_flagship_guess()
+        elif strategy == 'eliminator':
+            return self.suggest_eliminator_guess(force_viable=True)
+        elif strategy == 'entropy':
+            return self.suggest_entropy_guess()
+        elif strategy == 'random':
+            return self.suggest_random_guess()
+        raise ValueError(f'Unknown strategy \'{strategy}\'.')
 
     def suggest_default_first_guess(self):
         '''
-        Suggest a default first guess. This is a word that is known to
-        be good at eliminating many possibilities, and better than
-        the first guess suggested by suggest_eliminator_guess.
+        Suggest a default first guess. This is the first guess of the
+        opening book, if the solver has a flagship opening book, which is
+        chosen for the wordlist when the book is built. Otherwise it is
+        DEFAULT_FIRST_GUESS, a word that is known to be good at
+        eliminating many possibilities, and better than the first guess
+        suggested by suggest_eliminator_guess. For dictionaries without
+        this word, e.g. of other word lengths, the eliminator guess is used
+        instead.
         '''
-        return 'salet'
+        if (self.opening_book is not None
+                and self.opening_book.strategy == 'flagship'):
+            return self.master_wordlist[self.opening_book.first_guess]
+        if DEFAULT_FIRST_GUESS in self.master_index:
+            return DEFAULT_FIRST_GUESS
+        return self.suggest_eliminator_guess()
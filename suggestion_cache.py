@@ -0,0 +1,172 @@
+'''
+This module contains a cache of the guesses suggested for each game
+state. Many games reach the same state, e.g. every game which opens
+with the same guess and is given the same feedback, so a suggestion
+only needs to be computed the first time the state is seen.
+
+States are keyed by the strategy and WordleSolver.state_fingerprint,
+which is made from the constraints.ConstraintState of the game. The cache
+holds a bounded number of suggestions, evicting the least recently used,
+is safe to share between threads, and can be saved to and loaded from a
+JSON file so that it stays warm between runs.
+
+Contains:
+----------------------------------------
+    SuggestionCache
+        A thread-safe LRU cache of suggested guesses with hit and miss
+        counters.
+    shared_suggestion_cache
+        Returns a cache which is kept for the life of the process.
+'''
+
+import collections
+import functools
+import json
+import os
+import threading
+
+import patterns
+import solver
+
+SUGGESTION_CACHE_VERSION = 2
+
+
+class SuggestionCache():
+
+    def __init__(self, maxsize=65536, path=None):
+        '''
+        Initialise the cache, loading the saved suggestions from path if
+        the file exists.
+
+        Parameters
+        ----------
+        maxsize: int
+            the number of suggestions which may be held.
+        path: str
+            the path of the JSON file the cache is saved to. if None, the
+            cache is not saved.
+        '''
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        '''
+        Returns the suggestion for a key, or None if it is not cached.
+        '''
+        with self.lock:
+            guess = self.entries.get(key)
+            if guess is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return guess
+
+    def put(self, key, guess):
+        '''
+        Caches the suggestion for a key, evicting the least recently used
+        suggestions if the cache is full.
+        '''
+        with self.lock:
+            self.entries[key] = guess
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        '''
+        Removes every suggestion and resets the counters.
+        '''
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        '''
+        Returns the number of hits, misses and evictions, the hit rate,
+        and the size of the cache.
+        '''
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'size': len(self.entries), 'maxsize': self.maxsize}
+
+    def save(self, path=None):
+        '''
+        Saves the suggestions to a JSON file, least recently used first.
+        The file is written to a temporary file and moved into place, so
+        a cache being loaded is never partly written.
+
+        Parameters
+        ----------
+        path: str
+            the path of the file. defaults to the path the cache was
+            created with.
+        '''
+        path = path or self.path
+        if path is None:
+            raise ValueError('No path was given to save the cache to.')
+
+        with self.lock:
+            contents = {'version': SUGGESTION_CACHE_VERSION,
+                        'strategy_version': solver.STRATEGY_VERSION,
+                        'entries': list(self.entries.items())}
+
+        with patterns.atomic_open(path, 'w') as file:
+            json.dump(contents, file)
+
+    def load(self, path):
+        '''
+        Adds the suggestions saved in a JSON file. Files saved by another
+        version of the cache or of the strategies are ignored, since their
+        suggestions may be out of date.
+
+        Parameters
+        ----------
+        path: str
+            the path of the file.
+
+        Returns
+        ----------
+        int
+            the number of suggestions loaded.
+        '''
+        try:
+            with open(path, 'r') as file:
+                contents = json.load(file)
+        except (OSError, ValueError):
+            return 0
+
+        if (not isinstance(contents, dict)
+                or contents.get('version') != SUGGESTION_CACHE_VERSION
+                or contents.get('strategy_version')
+                != solver.STRATEGY_VERSION):
+            return 0
+
+        entries = contents.get('entries', [])
+        for key, guess in entries:
+            self.put(key, guess)
+        return len(entries)
+
+
+@functools.lru_cache(maxsize=None)
+def shared_suggestion_cache(maxsize=65536, path=None):
+    '''
+    Returns a suggestion cache which is kept for the life of the process,
+    so that every game in the process shares its suggestions.
+    '''
+    return SuggestionCache(maxsize, path)
@@ -0,0 +1,44 @@
+"""
+Tests for batch.py
+"""
+
+import io
+import json
+
+import batch
+
+words = ['women', 'death', 'abyss', 'shoal', 'books']
+
+
+def test_solve_record():
+    """
+    Test that a record holds the guesses ending with the true word, and
+    that invalid words give an error record.
+    """
+    record = batch.solve_record('W O M E N')
+    assert (record['word'] == 'women')
+    assert (record['guesses'][-1] == 'women')
+    assert (record['attempts'] == len(record['guesses']))
+    assert (record['elapsed'] > 0)
+
+    record = batch.solve_record('greip')
+    assert (record['word'] == 'greip')
+    assert ('error' in record)
+
+
+def test_stream_solve():
+    """
+    Test that one JSON record is written per word, in input order, with
+    and without workers.
+    """
+    lines = [f'{word}\n' for word in words] + ['\n']
+
+    for workers in [1, 2]:
+        output = io.StringIO()
+        batch.stream_solve(iter(lines), output, 'eliminator',
+                           workers=workers, max_pending=2)
+        records = [json.loads(line)
+                   for line in output.getvalue().splitlines()]
+        assert ([record['word'] for record in records] == words)
+        assert (records[0] == {**batch.solve_record('women', 'eliminator'),
+                               'elapsed': records[0]['elapsed']})
@@ -0,0 +1,75 @@
+"""
+Tests for bench.py
+"""
+
+import json
+
+import bench
+
+
+def test_summarise():
+    """
+    Test that timings are summarised in milliseconds.
+    """
+    summary = bench.summarise([0.001] * 99 + [0.1])
+    assert (summary['count'] == 100)
+    assert (summary['p50_ms'] == 1.0)
+    assert (summary['p99_ms'] > summary['p95_ms'])
+
+
+def test_run_benchmarks():
+    """
+    Test that every phase is timed and the answers are repeatable.
+    """
+    results = bench.run_benchmarks(num_games=3, seed=1, load_repeats=1)
+    for name in ['fetch_word_list', 'load_binary', 'process_guess',
+                 'eliminate_nonviable_words', 'suggest_eliminator_guess',
+                 'flagship_batch_solve']:
+        assert (results['phases'][name]['count'] > 0)
+    assert (results['phases']['flagship_batch_solve']['count'] == 3)
+    assert (results['games_per_second'] > 0)
+    assert (results['peak_rss_kb'] > 0)
+    assert (0 < results['game_memory']['mean_bytes']
+            <= results['game_memory']['max_bytes'])
+    json.dumps(results)
+
+
+def test_measure_game_memory():
+    """
+    Test that the memory kept by each game fits in the budget.
+    """
+    answers = ['shoal', 'tiger', 'vivid', 'fuzzy', 'crane', 'jazzy']
+    game_memory = bench.measure_game_memory(answers)
+    assert (game_memory['budget_bytes'] == bench.GAME_MEMORY_BUDGET)
+    assert (game_memory['max_bytes'] <= bench.GAME_MEMORY_BUDGET)
+
+
+def test_find_regressions():
+    """
+    Test that only phases slower than the threshold are reported.
+    """
+    baseline = {'phases': {'process_guess': {'p50_ms': 1.0},
+                           'flagship_batch_solve': {'p50_ms': 10.0}},
+                'games_per_second': 100.0}
+    results = {'phases': {'process_guess': {'p50_ms': 1.05},
+                          'flagship_batch_solve': {'p50_ms': 20.0}},
+               'games_per_second': 50.0}
+
+    regressions = bench.find_regressions(results, baseline, threshold=0.1)
+    assert (len(regressions) == 2)
+    assert (regressions[0].startswith('flagship_batch_solve'))
+    assert (bench.find_regressions(results, baseline, threshold=2.0) == [])
+
+
+def test_main(tmp_path):
+    """
+    Test that the results are written as JSON and compared to a baseline.
+    """
+    output = str(tmp_path / 'bench.json')
+    assert (bench.main(['--games', '2', '--output', output]) == 0)
+    with open(output, 'r') as file:
+        results = json.load(file)
+    assert (results['settings']['num_games'] == 2)
+
+    assert (bench.main(['--games', '2', '--baseline', output,
+                        '--threshold', '1000']) == 0)
@@ -0,0 +1,73 @@
+"""
+Tests for constraints.py
+"""
+
+import numpy as np
+
+import constraints
+import solver
+
+guesses = ['salet', 'books', 'speed']
+
+
+def test_from_solver():
+    '''
+    Test that the constraints are small, hashable and equal for equal
+    knowledge.
+    '''
+    first_solver = solver.WordleSolver(true_word='shoal', suppress_info=True)
+    second_solver = solver.WordleSolver(true_word='shoal', suppress_info=True)
+    initial_state = constraints.ConstraintState.from_solver(first_solver)
+    assert (initial_state.allowed == (constraints.ALL_LETTERS,) * 5)
+
+    for guess in guesses:
+        first_solver.process_guess(guess)
+    for guess in reversed(guesses):
+        second_solver.process_guess(guess)
+
+    state = constraints.ConstraintState.from_solver(first_solver)
+    assert (state == constraints.ConstraintState.from_solver(second_solver))
+    assert (hash(state) != hash(initial_state))
+    assert (len({state: 1, initial_state: 2}) == 2)
+    assert (len(state.counts) == 26)
+    assert (np.array_equal(state.minnum_letters, first_solver.minnum_letters))
+    assert (np.array_equal(state.maxnum_letters, first_solver.maxnum_letters))
+
+
+def test_filter():
+    '''
+    Test that filtering with bitwise operations gives the same viable words
+    as the solver.
+    '''
+    for true_word in ['shoal', 'women', 'abyss', 'eerie']:
+        solver_instance = solver.WordleSolver(true_word=true_word,
+                                              suppress_info=True)
+        for guess in guesses:
+            solver_instance.process_guess(guess)
+            state = constraints.ConstraintState.from_solver(solver_instance)
+            assert (np.array_equal(state.filter(solver_instance.dictionary),
+                                   solver_instance.viable_indices))
+
+        # Filtering a subset only keeps words from that subset.
+        subset = solver_instance.dictionary.all_indices[::2]
+        assert (set(state.filter(solver_instance.dictionary, subset))
+                <= set(subset))
+
+
+def test_apply_to():
+    '''
+    Test that the constraints round trip through the solver attributes.
+    '''
+    solver_instance = solver.WordleSolver(true_word='shoal',
+                                          suppress_info=True)
+    for guess in guesses:
+        solver_instance.process_guess(guess)
+    state = constraints.ConstraintState.from_solver(solver_instance)
+
+    new_solver = solver.WordleSolver(true_word='shoal', suppress_info=True)
+    state.apply_to(new_solver)
+    new_solver.eliminate_nonviable_words()
+
+    assert (constraints.ConstraintState.from_solver(new_solver) == state)
+    assert (np.array_equal(new_solver.viable_indices,
+                           solver_instance.viable_indices))
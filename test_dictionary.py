@@ -0,0 +1,266 @@
+"""
+Tests for dictionary.py
+"""
+
+import os
+
+import numpy as np
+
+import dictionary
+import solver
+
+
+def test_dictionary():
+    """
+    Test that the derived arrays agree with the words and are read-only.
+    """
+    word_dictionary = dictionary.Dictionary(['abbey', 'shoal'])
+
+    assert (len(word_dictionary) == 2)
+    assert ('shoal' in word_dictionary)
+    assert ('books' not in word_dictionary)
+    assert (word_dictionary.index['shoal'] == 1)
+    assert (word_dictionary.codes[1].tolist() == [18, 7, 14, 0, 11])
+    assert (word_dictionary.num_letters[0, 1] == 2)
+    assert (word_dictionary.num_letters[0].sum() == 5)
+    assert (np.array_equal(word_dictionary.presence,
+                           word_dictionary.num_letters > 0))
+    assert (word_dictionary.index_dtype == np.uint16)
+    assert (word_dictionary.all_indices.dtype == np.uint16)
+
+    try:
+        word_dictionary.num_letters[0, 0] = 5
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_dictionary_other_alphabets():
+    """
+    Test that the word length, alphabet and pattern type are found from
+    the words.
+    """
+    word_dictionary = dictionary.Dictionary(['abbey', 'shoal'])
+    assert (word_dictionary.alphabet == 'abcdefghijklmnopqrstuvwxyz')
+    assert (word_dictionary.word_length == 5)
+    assert (word_dictionary.all_correct == 242)
+    assert (word_dictionary.pattern_dtype == np.uint8)
+
+    word_dictionary = dictionary.Dictionary(['straße', 'größer'])
+    assert (word_dictionary.alphabet == 'aegrstßö')
+    assert (word_dictionary.word_length == 6)
+    assert (word_dictionary.num_patterns == 3 ** 6)
+    assert (word_dictionary.pattern_dtype == np.uint16)
+    assert (word_dictionary.num_letters.shape == (2, 8))
+    assert (word_dictionary.codes[0].tolist() == [4, 5, 3, 0, 6, 1])
+
+    for words in [[], ['shoal', 'book']]:
+        try:
+            dictionary.Dictionary(words)
+            raise AssertionError
+        except ValueError:
+            pass
+
+
+def test_load_dictionary():
+    """
+    Test that the dictionary for a wordlist is only loaded once and is
+    shared by solver instances.
+    """
+    word_dictionary = dictionary.load_dictionary('all_words.txt')
+    assert (dictionary.load_dictionary('all_words.txt') is word_dictionary)
+
+    first_solver = solver.WordleSolver(suppress_info=True)
+    second_solver = solver.WordleSolver(suppress_info=True)
+    assert (first_solver.dictionary is word_dictionary)
+    assert (second_solver.master_wordlist_num_letters
+            is first_solver.master_wordlist_num_letters)
+
+
+def test_solver_with_dictionary():
+    """
+    Test that a solver can be given its own dictionary.
+    """
+    word_dictionary = dictionary.Dictionary(['abbey', 'shoal', 'books'])
+    solver_instance = solver.WordleSolver(true_word='shoal',
+                                          suppress_info=True,
+                                          word_dictionary=word_dictionary)
+    assert (solver_instance.master_wordlist == word_dictionary.words)
+
+    solver_instance.process_guess('books')
+    assert (solver_instance.viable_wordlist == ['shoal'])
+
+
+def assert_same_dictionary(first, second):
+    """
+    Asserts that two dictionaries have the same words and arrays.
+    """
+    assert (first.words == second.words)
+    assert (first.index == second.index)
+    assert (first.hash == second.hash)
+    assert (first.alphabet == second.alphabet)
+    assert (first.word_length == second.word_length)
+    for name in ['codes', 'num_letters', 'presence', 'presence_matrix',
+                 'letter_counts', 'letter_bits', 'all_indices']:
+        first_array = getattr(first, name)
+        second_array = getattr(second, name)
+        assert (first_array.dtype == second_array.dtype)
+        assert (np.array_equal(first_array, second_array))
+        assert (not second_array.flags.writeable)
+
+
+def test_binary_dictionary(tmp_path):
+    """
+    Test that a dictionary saved in the binary format is loaded with the
+    same words and arrays, and that damaged files are rejected.
+    """
+    for words in [['abbey', 'shoal', 'books'], ['straße', 'größer']]:
+        word_dictionary = dictionary.Dictionary(words)
+        path = str(tmp_path / 'words.bin')
+        word_dictionary.save_binary(path)
+        assert_same_dictionary(word_dictionary,
+                               dictionary.Dictionary.from_binary(path))
+
+    with open(path, 'rb') as file:
+        contents = file.read()
+    for damaged in [b'', contents[:20], b'XXXX' + contents[4:],
+                    contents[:-1],
+                    contents.replace('größer'.encode('utf-8'),
+                                     'grösser'.encode('utf-8')[:-1])]:
+        with open(path, 'wb') as file:
+            file.write(damaged)
+        try:
+            dictionary.Dictionary.from_binary(path)
+            raise AssertionError
+        except ValueError:
+            pass
+
+
+def test_load_binary(tmp_path):
+    """
+    Test that the binary file is built from the text file, and rebuilt
+    when the text file changes or the binary file is damaged.
+    """
+    wordlist_path = str(tmp_path / 'words.txt')
+    cache_dir = str(tmp_path / 'cache')
+    with open(wordlist_path, 'w') as file:
+        file.write('abbey\nshoal\nbooks\n')
+
+    word_dictionary = dictionary.load_binary(wordlist_path, cache_dir)
+    path = dictionary.binary_path(wordlist_path, cache_dir)
+    assert (os.path.exists(path))
+    assert (word_dictionary.words == ('abbey', 'shoal', 'books'))
+    assert (isinstance(dictionary.load_binary(wordlist_path,
+                                              cache_dir).codes, np.memmap))
+
+    with open(wordlist_path, 'w') as file:
+        file.write('abbey\nshoal\nbooks\ngreen\n')
+    built = os.path.getmtime(wordlist_path) - 10
+    os.utime(path, (built, built))
+    assert ('green' in dictionary.load_binary(wordlist_path, cache_dir))
+    assert (os.path.getmtime(path) > built)
+
+    # A text file with the same size but a new modification time.
+    with open(wordlist_path, 'w') as file:
+        file.write('abbey\nshoal\nbooks\ngreet\n')
+    os.utime(wordlist_path, (built, built))
+    assert ('greet' in dictionary.load_binary(wordlist_path, cache_dir))
+
+    with open(path, 'r+b') as file:
+        file.write(b'XXXX')
+    assert_same_dictionary(dictionary.Dictionary.from_file(wordlist_path),
+                           dictionary.load_binary(wordlist_path, cache_dir))
+
+
+def test_load_binary_shared_cache(tmp_path):
+    """
+    Test that wordlists with the same name in different directories do
+    not share a binary file in a shared cache directory.
+    """
+    cache_dir = str(tmp_path / 'cache')
+    wordlist_paths = []
+    for directory, words in [('a', 'abbey\nshoal\n'),
+                             ('b', 'green\nbooks\n')]:
+        os.makedirs(tmp_path / directory)
+        wordlist_path = str(tmp_path / directory / 'words.txt')
+        with open(wordlist_path, 'w') as file:
+            file.write(words)
+        wordlist_paths.append(wordlist_path)
+
+    assert (dictionary.binary_path(wordlist_paths[0], cache_dir)
+            != dictionary.binary_path(wordlist_paths[1], cache_dir))
+    for repeat in range(2):
+        assert (dictionary.load_binary(wordlist_paths[0], cache_dir).words
+                == ('abbey', 'shoal'))
+        assert (dictionary.load_binary(wordlist_paths[1], cache_dir).words
+                == ('green', 'books'))
+
+    path = dictionary.binary_path(wordlist_paths[0], cache_dir)
+    try:
+        dictionary.Dictionary.from_binary(
+            path, dictionary.source_stamp(wordlist_paths[1]))
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_binary_dictionary_solver():
+    """
+    Test that solvers using the binary and text dictionaries make the
+    same guesses.
+    """
+    text_dictionary = dictionary.Dictionary.from_file('all_words.txt')
+    binary_dictionary = dictionary.load_binary('all_words.txt')
+    assert_same_dictionary(text_dictionary, binary_dictionary)
+
+    for word in ['women', 'abyss', 'fuzzy', 'kayak']:
+        histories = []
+        for word_dictionary in [text_dictionary, binary_dictionary]:
+            solver_instance = solver.WordleSolver(
+                true_word=word, suppress_info=True,
+                word_dictionary=word_dictionary)
+            success = False
+            while not success:
+                success = solver_instance.process_guess(
+                    solver_instance.suggest_guess('flagship'))
+            histories.append(solver_instance.guess_history)
+        assert (histories[0] == histories[1])
+
+
+def test_answer_list(tmp_path):
+    """
+    Test that answer lists and their weights are read and checked.
+    """
+    word_dictionary = dictionary.Dictionary(['abbey', 'shoal', 'books',
+                                             'green'])
+    answers_path = str(tmp_path / 'answers.txt')
+    weights_path = str(tmp_path / 'weights.txt')
+    with open(answers_path, 'w') as file:
+        file.write('green\nshoal\n\n')
+    with open(weights_path, 'w') as file:
+        file.write('shoal 4.5\nabbey 2\nheader\n')
+
+    answers = dictionary.AnswerList.from_file(word_dictionary, answers_path)
+    assert (answers.words == ('shoal', 'green'))
+    assert (answers.indices.tolist() == [1, 3])
+    assert (len(answers) == 2 and 'green' in answers)
+    assert ('abbey' not in answers)
+    assert (answers.word_weights is None)
+    assert (np.array_equal(answers.letter_counts,
+                           word_dictionary.presence_matrix[[1, 3]].sum(
+                               axis=0)))
+
+    weighted_answers = dictionary.AnswerList.from_file(
+        word_dictionary, answers_path, weights_path)
+    # Answers without a weight are given the smallest weight.
+    assert (weighted_answers.word_weights.tolist() == [0, 4.5, 0, 4.5])
+    assert (weighted_answers.hash != answers.hash)
+
+    for words, weights in [(['grape'], None), ([], None),
+                           (['shoal'], {'shoal': 0.0}),
+                           (['shoal'], {'abbey': 1.0})]:
+        try:
+            dictionary.AnswerList(word_dictionary, words, weights)
+            raise AssertionError
+        except ValueError:
+            pass
@@ -0,0 +1,119 @@
+"""
+Tests for evaluation.py
+"""
+
+import numpy as np
+
+import dictionary
+import evaluation
+import opening
+import userfunctions
+
+words = ['women', 'death', 'abyss', 'shoal', 'books', 'green']
+
+
+def test_evaluate():
+    """
+    Test that every word is solved and the attempts are returned in order.
+    """
+    num_attempts = evaluation.evaluate('flagship', words, workers=1,
+                                       chunk_size=4)
+    assert (num_attempts.dtype == np.uint8)
+    assert (len(num_attempts) == len(words))
+    assert (np.all(num_attempts >= 1))
+
+    # Solving a word with the opening book's first guess takes one
+    # attempt.
+    first_guess = dictionary.load_dictionary().words[
+        opening.load_opening_book().first_guess]
+    num_attempts = evaluation.evaluate('flagship', [first_guess, 'women'],
+                                       workers=1)
+    assert (num_attempts[0] == 1)
+
+
+def test_evaluate_deterministic():
+    """
+    Test that the results do not depend on the number of workers or the
+    chunk size for a given seed.
+    """
+    in_process = evaluation.evaluate('random', words, workers=1, seed=7)
+    pooled = evaluation.evaluate('random', words, workers=2, chunk_size=2,
+                                 seed=7)
+    assert (np.array_equal(in_process, pooled))
+
+
+def test_evaluate_hard_mode():
+    """
+    Test that hard mode gives the same attempts as the hard mode batch
+    solve functions, with and without workers.
+    """
+    expected = [userfunctions.flagship_batch_solve(word, True, True)[1]
+                for word in words]
+    for workers in [1, 2]:
+        num_attempts = evaluation.evaluate('flagship', words,
+                                           workers=workers, chunk_size=4,
+                                           hard_mode=True)
+        assert (list(num_attempts) == expected)
+
+
+def test_evaluate_answer_list():
+    """
+    Test that the words of an answer list are solved by default, and that
+    the answer list is used with and without workers.
+    """
+    word_dictionary = dictionary.load_dictionary()
+    answer_list = dictionary.AnswerList(word_dictionary,
+                                        word_dictionary.words[::500])
+    in_process = evaluation.evaluate('flagship', workers=1,
+                                     answer_list=answer_list)
+    pooled = evaluation.evaluate('flagship', workers=2, chunk_size=8,
+                                 answer_list=answer_list)
+    assert (len(in_process) == len(answer_list))
+    assert (np.array_equal(in_process, pooled))
+
+    expected = [userfunctions.flagship_batch_solve(word, True,
+                                                   answers=answer_list)[1]
+                for word in answer_list.words]
+    assert (list(in_process) == expected)
+
+
+def test_evaluate_unknown_strategy():
+    """
+    Test that an unknown strategy is rejected.
+    """
+    try:
+        evaluation.evaluate('unknown', words, workers=1)
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_solve_batch():
+    """
+    Test that solving in lockstep gives the same results as solving each
+    word on its own.
+    """
+    for strategy in ['flagship', 'eliminator']:
+        num_attempts, guesses = evaluation.solve_batch(words, strategy,
+                                                       batch_size=4)
+        assert (np.array_equal(
+            num_attempts, evaluation.evaluate(strategy, words, workers=1)))
+
+        for word, attempts, word_guesses in zip(words, num_attempts,
+                                                guesses):
+            assert (len(word_guesses) == attempts)
+            assert (word_guesses[-1] == word)
+
+
+def test_solve_batch_hard_mode():
+    """
+    Test that solving in lockstep in hard mode gives the same results as
+    solving each word on its own in hard mode.
+    """
+    for strategy in ['flagship', 'eliminator']:
+        num_attempts, guesses = evaluation.solve_batch(words, strategy,
+                                                       batch_size=4,
+                                                       hard_mode=True)
+        assert (np.array_equal(
+            num_attempts, evaluation.evaluate(strategy, words, workers=1,
+                                              hard_mode=True)))
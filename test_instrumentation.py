@@ -0,0 +1,189 @@
+"""
+Tests for instrumentation.py
+"""
+
+import pickle
+import tracemalloc
+
+import numpy as np
+
+import evaluation
+import instrumentation
+import opening
+import solver
+import suggestion_cache
+import userfunctions
+
+
+def play(stats=None, cache=None, true_word='shoal'):
+    '''
+    Plays a flagship game with the opening book, recording it to stats.
+    '''
+    solver_instance = solver.WordleSolver(
+        true_word=true_word, suppress_info=True, suggestion_cache=cache,
+        opening_book=opening.load_opening_book('flagship'), stats=stats)
+    success = False
+    while not success:
+        success = solver_instance.process_guess(
+            solver_instance.suggest_guess())
+    return solver_instance
+
+
+def test_solver_stats():
+    '''
+    Test that a game records every turn, its phases and the viable words
+    left, and passes each event to the callback, without changing the
+    guesses.
+    '''
+    events = []
+    stats = instrumentation.SolverStats(callback=events.append)
+    solver_instance = play(stats)
+    assert (solver_instance.guess_history == play().guess_history)
+
+    assert (stats.num_games == 1)
+    assert (len(stats.turns) == solver_instance.num_attempts)
+    assert ([turn['guess'] for turn in stats.turns]
+            == [guess for guess, pattern in solver_instance.guess_history])
+    assert (stats.turns[0]['num_viable_before']
+            == len(solver_instance.dictionary.words))
+    assert (stats.turns[-1]['num_viable'] == 1)
+    for turn, next_turn in zip(stats.turns, stats.turns[1:]):
+        assert (next_turn['num_viable_before'] == turn['num_viable'])
+        assert (turn['num_viable'] < turn['num_viable_before'])
+    for turn in stats.turns:
+        assert (turn['times']['suggestion'] > 0)
+    assert (stats.turns[1]['times']['filter'] > 0)
+
+    assert ({event['event'] for event in events}
+            == {'phase', 'suggestion', 'guess'})
+    guesses = [event for event in events if event['event'] == 'guess']
+    assert ([(event['turn'], event['guess']) for event in guesses]
+            == [(turn['turn'], turn['guess']) for turn in stats.turns])
+    assert (sum(stats.suggestion_sources.values())
+            == solver_instance.num_attempts)
+    assert (stats.suggestion_sources['book'] == 2)
+    assert (stats.cache_hit_rate is None)
+
+
+def test_copy_stats():
+    '''
+    Test that feedback explored on a copy of a solver is not recorded.
+    '''
+    stats = instrumentation.SolverStats()
+    solver_instance = solver.WordleSolver(true_word='shoal',
+                                          suppress_info=True, stats=stats)
+    solver_copy = solver_instance.copy()
+    assert (solver_copy.stats is None)
+    solver_copy.process_guess('green')
+    assert (stats.turns == [])
+
+    solver_instance.process_guess('green')
+    assert (len(stats.turns) == 1)
+
+
+def test_solve_function_stats():
+    '''
+    Test that the policy and optimal solve functions record one turn for
+    each attempt.
+    '''
+    stats = instrumentation.SolverStats()
+    word, attempts = userfunctions.policy_batch_solve('shoal', True,
+                                                      stats=stats)
+    assert (len(stats.turns) == attempts)
+    assert (stats.suggestion_sources['book'] == attempts)
+
+    stats = instrumentation.SolverStats()
+    word, attempts = userfunctions.optimal_batch_solve('shoal', True,
+                                                       max_nodes=20,
+                                                       stats=stats)
+    assert (len(stats.turns) == attempts)
+    assert (stats.suggestion_sources['uncached'] == attempts)
+    for turn in stats.turns:
+        assert (turn['times']['suggestion'] > 0)
+
+
+def check_phase():
+    '''
+    Times nested phases with allocations and checks the recorded turn.
+    '''
+    stats = instrumentation.SolverStats(track_allocations=True)
+    stats.start_game(10)
+    with stats.phase('filter'):
+        with stats.phase('filter'):
+            pass
+        with stats.phase('scoring'):
+            array = np.ones(1 << 16)
+        del array
+    stats.record_guess('crane', 0, 4)
+
+    turn = stats.turns[0]
+    assert (turn['times']['filter'] >= turn['times']['scoring'] > 0)
+    assert (turn['times']['suggestion'] == 0)
+    assert (turn['allocated']['scoring'] >= 8 << 16)
+    assert (turn['allocated']['filter'] >= turn['allocated']['scoring'])
+    assert (turn['allocated']['suggestion'] == 0)
+
+
+def test_phase(monkeypatch):
+    '''
+    Test that a phase entered again before it exits is timed once, and
+    that allocations are recorded in the phase which made them, also
+    without tracemalloc.reset_peak as before Python 3.9.
+    '''
+    check_phase()
+    monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    check_phase()
+
+
+def test_merge_and_summary():
+    '''
+    Test that stats survive pickling without their callback, that merged
+    stats number their games in order, and the per-turn summary.
+    '''
+    cache = suggestion_cache.SuggestionCache()
+    first = instrumentation.SolverStats(callback=print)
+    play(first, cache)
+    second = pickle.loads(pickle.dumps(first))
+    assert (second.callback is None)
+    play(second, cache, 'tiger')
+
+    stats = instrumentation.SolverStats()
+    stats.merge(first)
+    stats.merge(second)
+    assert (stats.num_games == 3)
+    assert ([turn['game'] for turn in stats.turns]
+            == sorted(turn['game'] for turn in stats.turns))
+    assert (stats.suggestion_sources['cache_miss'] > 0)
+    assert (0 <= stats.cache_hit_rate <= 1)
+
+    summary = stats.turn_summary()
+    assert ([row['turn'] for row in summary]
+            == list(range(1, len(summary) + 1)))
+    assert (summary[0]['games'] == 3)
+    turns = [turn for turn in stats.turns if turn['turn'] == 2]
+    assert (summary[1]['games'] == len(turns))
+    assert (summary[1]['viable_after']
+            == np.mean([turn['num_viable'] for turn in turns]))
+    assert (summary[1]['shrinkage'] == np.median(
+        [turn['num_viable'] / turn['num_viable_before'] for turn in turns]))
+    for row in summary:
+        assert (row['filter_p95_ms'] >= row['filter_p50_ms'] >= 0)
+
+
+def test_evaluate_stats():
+    '''
+    Test that evaluate records the same games in the same order with one
+    worker or several.
+    '''
+    answers = ['shoal', 'tiger', 'crane', 'vivid', 'fuzzy']
+    recorded = []
+    for workers in [1, 2]:
+        stats = instrumentation.SolverStats()
+        num_attempts = evaluation.evaluate('flagship', answers,
+                                           workers=workers, chunk_size=2,
+                                           stats=stats)
+        assert (stats.num_games == len(answers))
+        assert (len(stats.turns) == np.sum(num_attempts))
+        recorded.append([(turn['game'], turn['turn'], turn['guess'],
+                          turn['num_viable']) for turn in stats.turns])
+    assert (recorded[0] == recorded[1])
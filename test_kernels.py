@@ -0,0 +1,165 @@
+"""
+Tests for kernels.py
+"""
+
+import os
+
+import numpy as np
+
+import kernels
+import patterns
+import solver
+
+# The compiled kernels are only tested if Numba is installed. The Numba
+# CI job sets WORDLE_REQUIRE_NUMBA so that they are never skipped there.
+backends = ['numpy'] + (['numba'] if kernels.NUMBA_AVAILABLE else [])
+
+
+def test_numba_available():
+    '''
+    Test that Numba can be used if it is required.
+    '''
+    if os.environ.get('WORDLE_REQUIRE_NUMBA'):
+        assert (kernels.NUMBA_AVAILABLE)
+
+
+def random_codes(rng, num_words, word_length, alphabet_size=6):
+    '''
+    Returns random letter codes from a small alphabet, so that most
+    words repeat letters.
+    '''
+    return rng.integers(0, alphabet_size, size=(num_words, word_length),
+                        dtype=np.uint8)
+
+
+def test_compute_patterns():
+    '''
+    Test that every backend, with and without threads, gives the
+    pattern of score_pattern for words with repeated letters, including
+    words longer than five letters.
+    '''
+    rng = np.random.default_rng(0)
+    for word_length in [5, 6]:
+        guesses = random_codes(rng, 70, word_length)
+        answers = random_codes(rng, 90, word_length)
+        expected = np.array([[patterns.score_pattern(guess, answer)
+                              for answer in answers] for guess in guesses])
+        for backend in backends:
+            kernels_backend = kernels.load_kernels(backend)
+            for parallel in [False, True]:
+                out = np.empty((70, 90),
+                               dtype=patterns.pattern_dtype(word_length))
+                kernels_backend.compute_patterns(guesses, answers, out, 6,
+                                                 32, parallel)
+                assert (np.array_equal(out, expected))
+
+
+def test_filters():
+    '''
+    Test that every backend finds the same words for a pattern and for
+    the known letters.
+    '''
+    rng = np.random.default_rng(1)
+    codes = random_codes(rng, 400, 5)
+    num_letters = np.zeros((400, 6), dtype=np.uint8)
+    for j in range(5):
+        np.add.at(num_letters, (np.arange(400), codes[:, j]), 1)
+    indices = np.sort(rng.choice(400, size=250, replace=False))
+
+    minnum_letters = np.array([0, 1, 0, 0, 1, 0])
+    maxnum_letters = np.array([5, 5, 1, 0, 5, 5])
+    known_codes = np.array([-1, 4, -1, -1, -1])
+    false_letters = np.zeros((5, 6), dtype=bool)
+    false_letters[0, 1] = True
+    false_letters[3, 4] = True
+
+    results = []
+    for backend in backends:
+        kernels_backend = kernels.load_kernels(backend)
+        by_pattern = kernels_backend.filter_by_pattern(
+            codes[7], codes, indices, patterns.score_pattern(codes[7],
+                                                             codes[9]), 6)
+        by_letters = kernels_backend.filter_by_letters(
+            codes, num_letters, indices, minnum_letters, maxnum_letters,
+            known_codes, false_letters)
+        assert (by_pattern.dtype == bool and by_letters.dtype == bool)
+        results.append((by_pattern, by_letters))
+
+    expected_by_letters = np.array([
+        np.all(num_letters[word] >= minnum_letters)
+        and np.all(num_letters[word] <= maxnum_letters)
+        and codes[word, 1] == 4
+        and not any(false_letters[j, codes[word, j]] for j in range(5))
+        for word in indices])
+    for by_pattern, by_letters in results:
+        assert (np.array_equal(by_pattern, results[0][0]))
+        assert (np.array_equal(by_letters, expected_by_letters))
+    assert (np.any(expected_by_letters))
+
+
+def test_pattern_histograms():
+    '''
+    Test that every backend gives the same counts and bit-identical
+    weighted totals.
+    '''
+    rng = np.random.default_rng(2)
+    pattern_block = rng.integers(0, 243, size=(20, 500)).astype(np.uint8)
+    weights = rng.random(500)
+
+    expected_counts = np.array([np.bincount(row, minlength=243)
+                                for row in pattern_block])
+    for backend in backends:
+        histograms = kernels.load_kernels(backend).pattern_histograms
+        counts = histograms(pattern_block, 243)
+        totals = histograms(pattern_block, 243, weights)
+        assert (counts.shape == (20, 243))
+        assert (np.array_equal(counts, expected_counts))
+        assert (np.array_equal(totals, kernels.load_kernels(
+            'numpy').pattern_histograms(pattern_block, 243, weights)))
+
+
+def test_histogram_entropy():
+    '''
+    Test the entropy of counted and weighted histograms, and of a batch
+    of histograms with a total for each.
+    '''
+    counts = np.array([[4, 0, 0], [2, 2, 0], [1, 1, 2]])
+    assert (np.allclose(kernels.histogram_entropy(counts, 4),
+                        [0.0, 1.0, 1.5]))
+    assert (np.allclose(kernels.histogram_entropy(counts / 4, 1.0),
+                        [0.0, 1.0, 1.5]))
+
+    boards = np.array([[[4, 0], [1, 1]], [[2, 2], [2, 0]]])
+    assert (np.allclose(kernels.histogram_entropy(boards, np.array([4, 2])),
+                        [[0.0, 1.0], [1.0, 0.0]]))
+
+
+def test_set_backend():
+    '''
+    Test that the solver gives the same game with every backend, and
+    that unknown backends are rejected.
+    '''
+    backend = kernels.BACKEND
+    try:
+        histories = []
+        for name in backends:
+            kernels.set_backend(name)
+            solver_instance = solver.WordleSolver(true_word='shoal',
+                                                  suppress_info=True)
+            success = False
+            while not success:
+                success = solver_instance.process_guess(
+                    solver_instance.suggest_guess())
+            histories.append(solver_instance.guess_history)
+        assert (all(history == histories[0] for history in histories))
+    finally:
+        kernels.set_backend(backend)
+
+    for name in ['fortran', 'numba' if not kernels.NUMBA_AVAILABLE
+                 else 'cython']:
+        try:
+            kernels.set_backend(name)
+            raise AssertionError
+        except ValueError:
+            pass
+    assert (kernels.BACKEND == backend)
@@ -0,0 +1,140 @@
+"""
+Tests for multiboard.py
+"""
+
+import numpy as np
+
+import multiboard
+import patterns
+import solver
+
+words = ['women', 'death', 'abyss', 'shoal']
+
+
+def test_multiboard_solve():
+    """
+    Test that every board is solved and each true word is guessed.
+    """
+    solver_instance = multiboard.MultiBoardSolver(true_words=words,
+                                                  suppress_info=True)
+    success = False
+    while not success:
+        success = solver_instance.process_guess(
+            solver_instance.suggest_guess())
+
+    guesses = [guess for guess, board_patterns
+               in solver_instance.guess_history]
+    assert (set(words) <= set(guesses))
+    assert (solver_instance.num_attempts == len(guesses))
+    assert (np.all(solver_instance.solved))
+    assert (np.array_equal(solver_instance.viable_counts(), [1, 1, 1, 1]))
+    assert (multiboard.multiboard_batch_solve(words, True)
+            == solver_instance.num_attempts)
+
+    # Solved boards give no more feedback.
+    for board, word in enumerate(words):
+        turn = guesses.index(word)
+        assert (solver_instance.guess_history[turn][1][board]
+                == patterns.ALL_CORRECT)
+        assert (all(board_patterns[board] is None for guess, board_patterns
+                    in solver_instance.guess_history[turn + 1:]))
+
+
+def test_multiboard_feedback():
+    """
+    Test that feedback from a game played elsewhere gives the same viable
+    words as processing the guess, and that inconsistent feedback is
+    rejected without changing the state.
+    """
+    played = multiboard.MultiBoardSolver(true_words=words,
+                                         suppress_info=True)
+    played.process_guess('salet')
+    board_patterns = played.guess_history[0][1]
+
+    assisted = multiboard.MultiBoardSolver(num_boards=4, suppress_info=True)
+    assisted.process_feedback(
+        'salet', [patterns.pattern_to_string(pattern)
+                  for pattern in board_patterns])
+    assert (np.array_equal(played.viable, assisted.viable))
+    assert (played.suggest_guess() == assisted.suggest_guess())
+
+    viable = assisted.viable.copy()
+    for feedback in [['GGGGG', 'GGGGG', 'GGGGG', 'QQQQQ'],
+                     ['GGGGG', 'GGGGG', 'GGGGG'],
+                     ['.....', '.....', '.....', 'GGGG.']]:
+        try:
+            assisted.process_feedback('salet', feedback)
+            raise AssertionError
+        except ValueError:
+            pass
+    assert (np.array_equal(assisted.viable, viable))
+    assert (assisted.num_attempts == 1)
+
+    try:
+        assisted.process_guess('salet')
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_multiboard_scores():
+    """
+    Test that the joint entropy of a guess is the sum of its entropy on
+    each board, as scored by WordleSolver.
+    """
+    multi = multiboard.MultiBoardSolver(true_words=words[:2],
+                                        suppress_info=True)
+    multi.process_guess('salet')
+
+    guess_indices = np.arange(0, 12000, 37)
+    entropy, expected_solved = multi.score_guesses(guess_indices,
+                                                   block_size=64)
+
+    expected_entropy = np.zeros(len(guess_indices))
+    expected_expected_solved = np.zeros(len(guess_indices))
+    for word in words[:2]:
+        solver_instance = solver.WordleSolver(true_word=word,
+                                              suppress_info=True)
+        solver_instance.process_guess('salet')
+        board_entropy, expected_remaining = \
+            solver_instance.score_guess_patterns(guess_indices)
+        expected_entropy += board_entropy
+        expected_expected_solved += np.isin(
+            guess_indices, solver_instance.viable_indices) / len(
+                solver_instance.viable_indices)
+
+    assert (np.allclose(entropy, expected_entropy))
+    assert (np.allclose(expected_solved, expected_expected_solved))
+
+
+def test_multiboard_pattern_matrix():
+    """
+    Test that the pattern matrix gives the same guesses.
+    """
+    pattern_matrix = patterns.shared_pattern_matrix()
+    without_matrix = multiboard.MultiBoardSolver(true_words=words,
+                                                 suppress_info=True)
+    with_matrix = multiboard.MultiBoardSolver(true_words=words,
+                                              suppress_info=True,
+                                              pattern_matrix=pattern_matrix)
+    success = False
+    while not success:
+        guess = without_matrix.suggest_guess()
+        assert (guess == with_matrix.suggest_guess())
+        success = without_matrix.process_guess(guess)
+        with_matrix.process_guess(guess)
+    assert (without_matrix.guess_history == with_matrix.guess_history)
+
+
+def test_evaluate_boards():
+    """
+    Test that the results do not depend on the number of workers or the
+    chunk size for a given seed.
+    """
+    in_process = multiboard.evaluate_boards(2, 6, workers=1, seed=3)
+    pooled = multiboard.evaluate_boards(2, 6, workers=2, chunk_size=4,
+                                        seed=3)
+    assert (in_process.dtype == np.uint8)
+    assert (len(in_process) == 6)
+    assert (np.all(in_process >= 2))
+    assert (np.array_equal(in_process, pooled))
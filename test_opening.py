@@ -0,0 +1,160 @@
+"""
+Tests for opening.py
+"""
+
+import os
+
+import numpy as np
+
+import dictionary
+import opening
+import patterns
+import solver
+
+
+def small_wordlist(tmp_path):
+    '''
+    Writes the first 300 words of the Wordle dictionary to a temporary
+    file and returns its path and the dictionary of its words.
+    '''
+    with open('all_words.txt', 'r') as file:
+        word_list = [line.rstrip() for line in file][:300]
+    path = tmp_path / 'small_words.txt'
+    path.write_text('\n'.join(word_list))
+    return str(path), dictionary.Dictionary(word_list)
+
+
+def play(word_dictionary, true_word, strategy, book=None):
+    '''
+    Plays a game with the strategy, with or without an opening book.
+    '''
+    solver_instance = solver.WordleSolver(true_word=true_word,
+                                          suppress_info=True,
+                                          word_dictionary=word_dictionary,
+                                          opening_book=book)
+    success = False
+    while not success:
+        success = solver_instance.process_guess(
+            solver_instance.suggest_guess(strategy))
+    return solver_instance.guess_history
+
+
+def test_build_opening_book(tmp_path):
+    '''
+    Test that the book records the strategy's second guesses and the
+    patterns of its first guess, and that games played with the book only
+    differ from the strategy in the flagship strategy's first guess.
+    '''
+    wordlist_path, word_dictionary = small_wordlist(tmp_path)
+    path = str(tmp_path / 'book.bin')
+
+    for strategy in ['flagship', 'eliminator']:
+        first_guess = opening.build_opening_book(path, strategy,
+                                                 word_dictionary)
+        book = opening.OpeningBook(path)
+        assert (book.strategy == strategy)
+        assert (book.wordlist_hash == word_dictionary.hash)
+        assert (word_dictionary.words[book.first_guess] == first_guess)
+        assert (len(book.second_guesses) == word_dictionary.num_patterns)
+        assert (np.array_equal(
+            book.first_patterns,
+            patterns.compute_patterns(word_dictionary.codes[book.first_guess],
+                                      word_dictionary.codes)))
+
+        root = solver.WordleSolver(suppress_info=True,
+                                   word_dictionary=word_dictionary)
+        if strategy == 'eliminator':
+            assert (first_guess == root.suggest_guess(strategy))
+        for pattern in np.flatnonzero(book.second_guesses
+                                      != opening.NO_GUESS):
+            child = root.copy()
+            child.process_feedback(first_guess, int(pattern))
+            assert (word_dictionary.index[child.suggest_guess(strategy)]
+                    == book.second_guesses[pattern])
+
+        for true_word in word_dictionary.words[::37]:
+            history = play(word_dictionary, true_word, strategy, book)
+            assert (history[0][0] == first_guess)
+            if strategy == 'eliminator':
+                assert (history == play(word_dictionary, true_word,
+                                        strategy))
+
+    try:
+        opening.build_opening_book(path, 'random', word_dictionary)
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_choose_opener(tmp_path):
+    '''
+    Test that the opener leaves the fewest viable words after the second
+    guess of any of the candidates.
+    '''
+    wordlist_path, word_dictionary = small_wordlist(tmp_path)
+    root = solver.WordleSolver(suppress_info=True,
+                               word_dictionary=word_dictionary)
+    opener, second_guesses = opening.choose_opener(root, num_candidates=4,
+                                                   shortlist_size=8)
+
+    shortlist = root.suggest_eliminator_guesses(8)
+    entropy, expected_remaining = root.score_guess_patterns(
+        np.array([word_dictionary.index[word] for word in shortlist]))
+    candidates = [shortlist[i] for i in np.argsort(-entropy,
+                                                   kind='stable')[:4]]
+    sums = [opening._second_guesses(root, candidate, 'flagship')[1]
+            for candidate in candidates]
+    assert (opener == candidates[int(np.argmin(sums))])
+    assert (np.array_equal(second_guesses, opening._second_guesses(
+        root, opener, 'flagship')[0]))
+
+
+def test_load_opening_book(tmp_path):
+    '''
+    Test that the book is built once, rebuilt if the file cannot be read,
+    and rejected by solvers for other wordlists.
+    '''
+    wordlist_path, word_dictionary = small_wordlist(tmp_path)
+    cache_dir = str(tmp_path / 'cache')
+
+    book = opening.load_opening_book('eliminator', wordlist_path, cache_dir)
+    assert (os.path.exists(book.path))
+    assert (f's{solver.STRATEGY_VERSION}_' in os.path.basename(book.path))
+    assert (opening.load_opening_book('eliminator', wordlist_path,
+                                      cache_dir) is book)
+    assert (opening.load_opening_book('random', wordlist_path,
+                                      cache_dir) is None)
+
+    with open(book.path, 'r+b') as file:
+        file.write(b'XXXX')
+    opening.load_opening_book.cache_clear()
+    rebuilt = opening.load_opening_book('eliminator', wordlist_path,
+                                        cache_dir)
+    assert (rebuilt.first_guess == book.first_guess)
+    assert (rebuilt.hash == book.hash)
+
+    try:
+        solver.WordleSolver(suppress_info=True, opening_book=book)
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_load_opening_book_read_only(tmp_path, capsys):
+    '''
+    Test that a book which cannot be saved is built in memory, with a
+    message while it is built.
+    '''
+    wordlist_path, word_dictionary = small_wordlist(tmp_path)
+    (tmp_path / 'file').write_text('')
+    cache_dir = str(tmp_path / 'file' / 'cache')
+
+    book = opening.load_opening_book('eliminator', wordlist_path, cache_dir)
+    assert (book.path is None)
+    assert ('Building the eliminator opening book' in capsys.readouterr().err)
+    saved = opening.load_opening_book('eliminator', wordlist_path,
+                                      str(tmp_path / 'cache'))
+    assert (book.hash == saved.hash)
+    true_word = word_dictionary.words[5]
+    assert (play(word_dictionary, true_word, 'eliminator', book)
+            == play(word_dictionary, true_word, 'eliminator', saved))
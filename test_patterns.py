@@ -0,0 +1,249 @@
+"""
+Tests for patterns.py
+"""
+
+import os
+
+import numpy as np
+
+import patterns
+import solver
+
+
+def write_small_wordlist(tmp_path, num_words=300):
+    '''
+    Writes the first num_words of the Wordle dictionary to a temporary
+    file and returns its path and the words.
+    '''
+    with open('all_words.txt', 'r') as file:
+        words = [line.rstrip() for line in file][:num_words]
+    path = tmp_path / 'small_words.txt'
+    path.write_text('\n'.join(words))
+    return str(path), words
+
+
+def test_encode_words():
+    '''
+    Test that words are encoded to one letter code per position.
+    '''
+    codes = patterns.encode_words(['abcde', 'zzzzz'])
+    assert (codes.dtype == np.uint8)
+    assert (codes.tolist() == [[0, 1, 2, 3, 4], [25, 25, 25, 25, 25]])
+
+
+def test_compute_patterns():
+    '''
+    Test that patterns follow the green-first rule for repeated letters.
+    '''
+    guesses = patterns.encode_words(['books', 'shoal', 'speed'])
+    answers = patterns.encode_words(['shoal', 'abide'])
+    result = patterns.compute_patterns(guesses, answers)
+
+    # books -> shoal: B, O absent, O correct, K absent, S present
+    assert (result[0, 0] == 2 * 3 ** 2 + 1 * 3 ** 4)
+    assert (result[1, 0] == patterns.ALL_CORRECT)
+    # speed -> abide: only one of the e's is present, d is present
+    assert (result[2, 1] == 1 * 3 ** 2 + 1 * 3 ** 4)
+
+
+def test_compute_patterns_matches_output_word():
+    '''
+    Test that the vectorised patterns agree with the colours given by
+    the solver for every pair of a small set of words.
+    '''
+    words = ['books', 'shoal', 'speed', 'abide', 'eerie', 'geese', 'salet']
+    codes = patterns.encode_words(words)
+    result = patterns.compute_patterns(codes, codes, block_size=3)
+
+    solver_instance = solver.WordleSolver(suppress_info=True)
+    colour_values = {'\x1b[36m': 2, '\x1b[33m': 1, '\x1b[31m': 0}
+    for j, answer in enumerate(words):
+        solver_instance.set_true_word(answer)
+        for i, guess in enumerate(words):
+            output = solver_instance.output_word(guess)
+            colours = [output[k:k + 5] for k in range(len(output))
+                       if output[k:k + 5] in colour_values]
+            expected = sum(colour_values[colour] * 3 ** position
+                           for position, colour in enumerate(colours))
+            assert (result[i, j] == expected)
+
+
+def reference_pattern(guess, answer):
+    '''
+    Computes the pattern for one guess with the green-first rule, one
+    letter at a time.
+    '''
+    feedback = [patterns.ABSENT] * len(guess)
+    unused = list(answer)
+    for i, letter in enumerate(guess):
+        if answer[i] == letter:
+            feedback[i] = patterns.CORRECT
+            unused.remove(letter)
+    for i, letter in enumerate(guess):
+        if feedback[i] != patterns.CORRECT and letter in unused:
+            feedback[i] = patterns.PRESENT
+            unused.remove(letter)
+    return sum(value * 3 ** i for i, value in enumerate(feedback))
+
+
+def test_score_pattern():
+    '''
+    Test that the single pair kernel gives the same patterns as the
+    vectorised kernel, for words and for letter codes with many repeated
+    letters, and that one guess can be scored against many answers.
+    '''
+    words = ['books', 'shoal', 'speed', 'abide', 'eerie', 'geese', 'salet']
+    codes = patterns.encode_words(words)
+    result = patterns.compute_patterns(codes, codes)
+    for i, guess in enumerate(words):
+        assert (np.array_equal(patterns.compute_patterns(codes[i], codes),
+                               result[i]))
+        for j, answer in enumerate(words):
+            assert (patterns.score_pattern(guess, answer) == result[i, j])
+
+    random_state = np.random.default_rng(0)
+    codes = random_state.integers(0, 3, (200, 5)).astype(np.uint8)
+    result = patterns.compute_patterns(codes, codes, block_size=16)
+    for i in range(len(codes)):
+        for j in range(0, len(codes), 7):
+            assert (patterns.score_pattern(codes[i].tolist(),
+                                           codes[j].tolist())
+                    == result[i, j])
+
+
+def test_format_pattern():
+    '''
+    Test that each letter is marked by its feedback.
+    '''
+    code = patterns.parse_pattern('..G.Y')
+    assert (patterns.format_pattern('books', code) == 'BOOKS')
+    assert (patterns.format_pattern('books', code, ('-', '?', '+'), '|')
+            == '-B|-O|+O|-K|?S|')
+
+
+def test_compute_patterns_other_lengths():
+    '''
+    Test that patterns are correct for words of other lengths and
+    alphabets, and use uint16 once they do not fit in uint8.
+    '''
+    rng = np.random.default_rng(0)
+    alphabet = 'aeiouäöüß'
+    for word_length in [3, 5, 6, 7]:
+        words = [''.join(rng.choice(list(alphabet), word_length))
+                 for i in range(40)]
+        codes = patterns.encode_words(words, alphabet)
+        result = patterns.compute_patterns(codes, codes, block_size=7)
+
+        assert (result.dtype == patterns.pattern_dtype(word_length))
+        assert (result.dtype == (np.uint8 if word_length <= 5
+                                 else np.uint16))
+        for i, guess in enumerate(words):
+            for j, answer in enumerate(words):
+                assert (result[i, j] == reference_pattern(guess, answer))
+        assert (result[0, 0] == patterns.all_correct(word_length))
+
+
+def test_encode_words_alphabet():
+    '''
+    Test that words are coded by their position in the alphabet, and that
+    words of different lengths or with unknown letters are rejected.
+    '''
+    assert (patterns.encode_words(['shoal'])[0].tolist()
+            == [18, 7, 14, 0, 11])
+    assert (patterns.encode_words(['ßäa', 'aaß'], 'aäß').tolist()
+            == [[2, 1, 0], [0, 0, 2]])
+    assert (patterns.infer_alphabet(['ßäa', 'aaß']) == 'aßä')
+
+    for words, alphabet in [(['shoal', 'book'], patterns.ALPHABET),
+                            (['Shoal'], patterns.ALPHABET),
+                            (['straße'], patterns.ALPHABET),
+                            (['abc'], 'ab')]:
+        try:
+            patterns.encode_words(words, alphabet)
+            raise AssertionError
+        except ValueError:
+            pass
+
+
+def test_parse_pattern():
+    '''
+    Test that patterns can be given as colours or codes, and converted
+    back to colours.
+    '''
+    # books -> shoal
+    code = 2 * 3 ** 2 + 1 * 3 ** 4
+    for pattern in ['..G.Y', 'bbgby', '-xG-y', '00201', code]:
+        assert (patterns.parse_pattern(pattern) == code)
+    assert (patterns.parse_pattern('GGGGG') == patterns.ALL_CORRECT)
+    assert (patterns.pattern_to_string(code) == '..G.Y')
+
+    for pattern in ['..G.', '..G.Q', -1, 243, None]:
+        try:
+            patterns.parse_pattern(pattern)
+            raise AssertionError
+        except ValueError:
+            pass
+
+    assert (patterns.parse_pattern('GGGGGGG', 7) == patterns.all_correct(7))
+    assert (patterns.pattern_to_string(patterns.parse_pattern('.Y.G', 4), 4)
+            == '.Y.G')
+
+
+def test_load_pattern_matrix(tmp_path):
+    '''
+    Test that the pattern matrix is cached on disk and memory mapped.
+    '''
+    wordlist_path, words = write_small_wordlist(tmp_path)
+    cache_dir = str(tmp_path / 'cache')
+
+    matrix = patterns.load_pattern_matrix(wordlist_path, cache_dir)
+    assert (matrix.shape == (len(words), len(words)))
+    assert (os.path.exists(patterns.pattern_cache_path(words, cache_dir)))
+    assert (isinstance(matrix, np.memmap))
+    assert (np.all(np.diag(matrix) == patterns.ALL_CORRECT))
+
+    cached_matrix = patterns.load_pattern_matrix(wordlist_path, cache_dir)
+    assert (np.array_equal(matrix, cached_matrix))
+    assert (np.array_equal(matrix, patterns.build_pattern_matrix(words)))
+
+
+def test_solver_with_pattern_matrix(tmp_path):
+    '''
+    Test that filtering by pattern gives the same viable words as
+    filtering by the known letters.
+    '''
+    wordlist_path, words = write_small_wordlist(tmp_path)
+    matrix = patterns.load_pattern_matrix(wordlist_path,
+                                          str(tmp_path / 'cache'))
+
+    for true_word in words[:20]:
+        letter_solver = solver.WordleSolver(wordlist_path, true_word, True)
+        pattern_solver = solver.WordleSolver(wordlist_path, true_word, True,
+                                             pattern_matrix=matrix)
+        for guess in words[100:103]:
+            letter_solver.process_guess(guess)
+            pattern_solver.process_guess(guess)
+            assert (letter_solver.viable_wordlist
+                    == pattern_solver.viable_wordlist)
+
+
+def test_atomic_open(tmp_path):
+    '''
+    Test that a file is only moved into place once it has been written,
+    and that the temporary file is removed if writing fails.
+    '''
+    path = str(tmp_path / 'cache' / 'file.json')
+    with patterns.atomic_open(path, 'w') as file:
+        file.write('first')
+        assert (not os.path.exists(path))
+    try:
+        with patterns.atomic_open(path, 'w') as file:
+            file.write('second')
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    with open(path, 'r') as file:
+        assert (file.read() == 'first')
+    assert (os.listdir(tmp_path / 'cache') == ['file.json'])
+    assert (patterns.default_cache_dir(path)
+            == str(tmp_path / 'cache' / patterns.CACHE_DIRNAME))
@@ -0,0 +1,211 @@
+"""
+Tests for policy.py
+"""
+
+import dictionary
+import opening
+import patterns
+import policy
+import solver
+
+
+def small_dictionary():
+    '''
+    Returns a dictionary of the first 300 words of the Wordle dictionary
+    and the default first guess.
+    '''
+    with open('all_words.txt', 'r') as file:
+        word_list = [line.rstrip() for line in file][:300]
+    return dictionary.Dictionary(word_list + ['salet'])
+
+
+def play_live(word_dictionary, true_word, strategy, hard_mode=False,
+              opening_book=None):
+    '''
+    Plays a game by computing the strategy's guesses every turn.
+    '''
+    solver_instance = solver.WordleSolver(true_word=true_word,
+                                          suppress_info=True,
+                                          word_dictionary=word_dictionary,
+                                          hard_mode=hard_mode,
+                                          opening_book=opening_book)
+    success = False
+    while not success:
+        success = solver_instance.process_guess(
+            solver_instance.suggest_guess(strategy))
+    return solver_instance.guess_history
+
+
+def play_book(book, word_dictionary, true_word, opening_book=None):
+    '''
+    Plays a game by following a policy book.
+    '''
+    policy_solver = policy.PolicySolver(book, true_word=true_word,
+                                        suppress_info=True,
+                                        word_dictionary=word_dictionary,
+                                        opening_book=opening_book)
+    success = False
+    while not success:
+        success = policy_solver.process_guess(policy_solver.suggest_guess())
+    return policy_solver
+
+
+def test_build_policy_book(tmp_path):
+    '''
+    Test that following the book makes the same guesses as the strategy.
+    '''
+    word_dictionary = small_dictionary()
+    path = str(tmp_path / 'book.bin')
+
+    for strategy in ['flagship', 'eliminator']:
+        num_nodes = policy.build_policy_book(path, strategy, word_dictionary)
+        book = policy.PolicyBook(path)
+        assert (book.num_nodes == num_nodes)
+        assert (book.strategy == strategy)
+        assert (book.wordlist_hash == word_dictionary.hash)
+
+        for true_word in word_dictionary.words[::7]:
+            policy_solver = play_book(book, word_dictionary, true_word)
+            assert (policy_solver.node != policy.NO_NODE)
+            assert (policy_solver.solver.guess_history
+                    == play_live(word_dictionary, true_word, strategy))
+
+
+def test_policy_book_hard_mode(tmp_path):
+    '''
+    Test that a hard mode book is marked as hard mode, is cached
+    separately, and makes the same guesses as the strategy in hard mode.
+    '''
+    word_dictionary = small_dictionary()
+    path = str(tmp_path / 'book.bin')
+    policy.build_policy_book(path, 'flagship', word_dictionary,
+                             hard_mode=True)
+    book = policy.PolicyBook(path)
+    assert (book.hard_mode)
+
+    for true_word in word_dictionary.words[::7]:
+        policy_solver = play_book(book, word_dictionary, true_word)
+        assert (policy_solver.solver.hard_mode)
+        assert (policy_solver.solver.guess_history
+                == play_live(word_dictionary, true_word, 'flagship', True))
+
+    assert (policy.policy_book_path('flagship', word_dictionary.words,
+                                    str(tmp_path))
+            != policy.policy_book_path('flagship', word_dictionary.words,
+                                       str(tmp_path), hard_mode=True))
+
+
+def test_policy_book_opening(tmp_path):
+    '''
+    Test that a book built with an opening book records the guesses the
+    strategy makes with the opening book, and is only followed with it.
+    '''
+    word_dictionary = small_dictionary()
+    opening_path = str(tmp_path / 'opening.bin')
+    for strategy in ['flagship', 'eliminator']:
+        opening.build_opening_book(opening_path, strategy, word_dictionary,
+                                   num_candidates=4)
+        opening_book = opening.OpeningBook(opening_path)
+        path = str(tmp_path / 'book.bin')
+        policy.build_policy_book(path, strategy, word_dictionary,
+                                 opening_book=opening_book)
+        book = policy.PolicyBook(path)
+        assert (book.opening_hash == opening_book.hash)
+        assert (book.guess(0) == opening_book.first_guess)
+
+        for true_word in word_dictionary.words[::7]:
+            policy_solver = play_book(book, word_dictionary, true_word,
+                                      opening_book)
+            assert (policy_solver.node != policy.NO_NODE)
+            assert (policy_solver.solver.guess_history
+                    == play_live(word_dictionary, true_word, strategy,
+                                 opening_book=opening_book))
+
+        try:
+            policy.PolicySolver(book, suppress_info=True,
+                                word_dictionary=word_dictionary)
+            raise AssertionError
+        except ValueError:
+            pass
+
+    assert (policy.policy_book_path('flagship', word_dictionary.words,
+                                    str(tmp_path))
+            != policy.policy_book_path('flagship', word_dictionary.words,
+                                       str(tmp_path),
+                                       opening_book=opening_book))
+
+
+def test_policy_book_long_words(tmp_path):
+    '''
+    Test that a book for six letter words stores its patterns in two
+    bytes and gives the same guesses as the strategy.
+    '''
+    with open('all_words.txt', 'r') as file:
+        word_list = [line.rstrip() + 's' for line in file][::60]
+    word_dictionary = dictionary.Dictionary(word_list)
+    path = str(tmp_path / 'book.bin')
+    policy.build_policy_book(path, 'flagship', word_dictionary)
+    book = policy.PolicyBook(path)
+    assert (book.edge_patterns.dtype.itemsize == 2)
+
+    for true_word in word_dictionary.words[::11]:
+        policy_solver = play_book(book, word_dictionary, true_word)
+        assert (policy_solver.solver.guess_history
+                == play_live(word_dictionary, true_word, 'flagship'))
+
+
+def test_policy_book_fallback(tmp_path):
+    '''
+    Test that a game which leaves the book is still solved.
+    '''
+    word_dictionary = small_dictionary()
+    path = str(tmp_path / 'book.bin')
+    policy.build_policy_book(path, 'flagship', word_dictionary)
+    book = policy.PolicyBook(path)
+
+    assert (book.child(0, patterns.ALL_CORRECT) == policy.NO_NODE)
+
+    true_word = word_dictionary.words[10]
+    policy_solver = policy.PolicySolver(book, true_word=true_word,
+                                        suppress_info=True,
+                                        word_dictionary=word_dictionary)
+    policy_solver.process_guess(word_dictionary.words[20])
+    assert (policy_solver.node == policy.NO_NODE)
+
+    success = False
+    while not success:
+        success = policy_solver.process_guess(policy_solver.suggest_guess())
+    assert (policy_solver.solver.guess_history[-1][0] == true_word)
+
+
+def test_policy_book_validation(tmp_path):
+    '''
+    Test that invalid files, mismatched wordlists and strategies which
+    are not deterministic are rejected.
+    '''
+    path = tmp_path / 'book.bin'
+    path.write_bytes(b'not a policy book' * 10)
+    try:
+        policy.PolicyBook(str(path))
+        raise AssertionError
+    except ValueError:
+        pass
+
+    policy.build_policy_book(str(path), 'flagship', small_dictionary())
+    try:
+        policy.PolicySolver(policy.PolicyBook(str(path)), suppress_info=True)
+        raise AssertionError
+    except ValueError:
+        pass
+
+    # Random guesses cannot be recorded.
+    try:
+        policy.build_policy_book(str(path), 'random', small_dictionary())
+        raise AssertionError
+    except ValueError:
+        pass
+    try:
+        policy.load_policy_book('random')
+        raise AssertionError
+    except ValueError:
+        pass
@@ -0,0 +1,176 @@
+"""
+Tests for search.py
+"""
+
+import numpy as np
+
+import patterns
+import search
+
+
+def small_pattern_matrix(num_words=40):
+    '''
+    Returns the pattern matrix for the first words of the Wordle
+    dictionary.
+    '''
+    with open('all_words.txt', 'r') as file:
+        word_list = [line.rstrip() for line in file][:num_words]
+    return patterns.build_pattern_matrix(word_list)
+
+
+def brute_force_total(pattern_matrix, answers):
+    '''
+    Finds the smallest total number of guesses by trying every guess.
+    '''
+    if len(answers) == 1:
+        return 1
+    best_total = None
+    for guess in range(pattern_matrix.shape[0]):
+        row = pattern_matrix[guess][answers]
+        if len(np.unique(row)) == 1 and guess not in answers:
+            continue
+        total = len(answers)
+        for pattern in np.unique(row):
+            if pattern != patterns.ALL_CORRECT:
+                total += brute_force_total(pattern_matrix,
+                                           answers[row == pattern])
+        if best_total is None or total < best_total:
+            best_total = total
+    return best_total
+
+
+def test_score_guesses():
+    '''
+    Test that the lower bound is never above the true total.
+    '''
+    pattern_matrix = small_pattern_matrix()
+    answers = np.arange(0, 40, 3)
+    entropy, lower_bound = search.score_guesses(pattern_matrix, answers,
+                                                block_size=7)
+    assert (entropy.shape == lower_bound.shape == (40,))
+    assert (np.all(entropy >= 0))
+    assert (lower_bound.min() <= brute_force_total(pattern_matrix, answers))
+
+
+def test_search_is_optimal():
+    '''
+    Test that the search finds the optimal total when every guess is
+    tried.
+    '''
+    pattern_matrix = small_pattern_matrix(12)
+    answers = np.arange(12)
+    expected_search = search.ExpectedGuessSearch(pattern_matrix, top_k=12)
+    result = expected_search.search(answers)
+
+    assert (result.complete)
+    assert (result.expected_guesses * 12
+            == brute_force_total(pattern_matrix, answers))
+    assert (result.lower_bound <= result.expected_guesses)
+    assert (result.gap == result.expected_guesses - result.lower_bound)
+
+    # The second search is answered from the memo.
+    assert (expected_search.search(answers).nodes == 0)
+
+
+def test_search_guesses():
+    '''
+    Test that a search limited to some guesses only chooses one of them,
+    and does not share its memo with the unlimited search.
+    '''
+    pattern_matrix = small_pattern_matrix(12)
+    answers = np.arange(12)
+    guesses = np.arange(0, 12, 4)
+
+    entropy, lower_bound = search.score_guesses(pattern_matrix, answers)
+    guess_entropy, guess_lower_bound = search.score_guesses(
+        pattern_matrix, answers, guesses=guesses)
+    assert (np.allclose(guess_entropy, entropy[guesses]))
+    assert (np.array_equal(guess_lower_bound, lower_bound[guesses]))
+
+    expected_search = search.ExpectedGuessSearch(pattern_matrix, top_k=12)
+    result = expected_search.search(answers, guesses)
+    assert (result.guess in guesses)
+    assert (result.complete)
+
+    unlimited = expected_search.search(answers)
+    assert (unlimited.nodes > 0)
+    assert (unlimited.expected_guesses * 12
+            == brute_force_total(pattern_matrix, answers))
+    assert (unlimited.expected_guesses <= result.expected_guesses)
+
+
+def test_search_budget():
+    '''
+    Test that a search which runs out of budget reports it.
+    '''
+    pattern_matrix = small_pattern_matrix()
+    answers = np.arange(40)
+    result = search.ExpectedGuessSearch(pattern_matrix, top_k=4,
+                                        max_nodes=1).search(answers)
+    assert (not result.complete)
+    assert (0 <= result.guess < 40)
+
+
+def test_search_memo_limit():
+    '''
+    Test that a full memo is cleared before the next search, and that
+    the shared search has a limited memo and budget.
+    '''
+    pattern_matrix = small_pattern_matrix(12)
+    answers = np.arange(12)
+    expected_search = search.ExpectedGuessSearch(pattern_matrix, top_k=12,
+                                                 max_memo=0)
+    first = expected_search.search(answers)
+    assert (len(expected_search.memo) > 0)
+
+    second = expected_search.search(answers)
+    assert (second.nodes > 0)
+    assert (second.expected_guesses == first.expected_guesses)
+
+    shared_search = search.shared_search()
+    assert (shared_search.max_memo is not None)
+    assert (shared_search.time_limit is not None)
+
+
+def test_search_parallel():
+    '''
+    Test that searching the first guesses in parallel gives the same
+    result as searching them in one process.
+    '''
+    pattern_matrix = small_pattern_matrix()
+    answers = np.arange(40)
+    serial = search.ExpectedGuessSearch(pattern_matrix,
+                                        top_k=3).search(answers)
+    parallel = search.ExpectedGuessSearch(pattern_matrix, top_k=3,
+                                          workers=2).search(answers)
+    assert (parallel.expected_guesses == serial.expected_guesses)
+    assert (parallel.complete)
+
+
+def test_search_parallel_no_information():
+    '''
+    Test that guesses which give no information are skipped by the
+    parallel search as by the serial search, and that a search where
+    no allowed guess gives information still returns one of them.
+    '''
+    pattern_matrix = small_pattern_matrix()
+    answers = np.array([0, 2, 3])
+    # Guess 24 gives the same pattern for every answer, guess 4 does not.
+    assert (len(np.unique(pattern_matrix[24][answers])) == 1)
+    assert (len(np.unique(pattern_matrix[4][answers])) == 3)
+
+    for guesses, expected_guess in [([4, 24], 4), ([24], 24)]:
+        results = [search.ExpectedGuessSearch(
+                       pattern_matrix, workers=workers).search(answers,
+                                                               guesses)
+                   for workers in [1, 2]]
+        assert (results[0].guess == results[1].guess == expected_guess)
+        assert (results[0].expected_guesses
+                == results[1].expected_guesses)
+    assert (not results[1].complete)
+
+    try:
+        search.ExpectedGuessSearch(pattern_matrix).search(answers, [])
+        raise AssertionError
+    except ValueError:
+        pass
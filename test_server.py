@@ -0,0 +1,176 @@
+"""
+Tests for server.py
+"""
+
+import asyncio
+import json
+
+import batch
+import opening
+import server
+import solver
+
+
+async def _request(port, method, path, payload=None, length=None):
+    """
+    Sends one request to the server and returns the status and JSON body.
+    The Content-Length header is the length of the body unless given.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+    if length is None:
+        length = len(body)
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n'
+                 f'Content-Length: {length}\r\n'
+                 f'Connection: close\r\n\r\n'.encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split()[1])
+    return status, json.loads(body)
+
+
+def test_suggest_from_history():
+    """
+    Test that replaying a history gives the same suggestion as a solver
+    which played the same guesses.
+    """
+    solver_instance = solver.WordleSolver(true_word='shoal',
+                                          suppress_info=True)
+    solver_instance.process_guess('salet')
+    history = [[guess, pattern]
+               for guess, pattern in solver_instance.guess_history]
+
+    result = server.suggest_from_history(history)
+    assert (result == {'guess': solver_instance.suggest_guess(),
+                       'num_viable': len(solver_instance.viable_indices),
+                       'solved': False})
+
+    result = server.suggest_from_history([['shoal', 'GGGGG']])
+    assert (result['guess'] == 'shoal' and result['solved'])
+
+    for history in [[['salet', 'GGGG.'], ['salet', 'GGGGY']], 5,
+                    [[1, '.....']], [['salet', 1.5]], [['salet']]]:
+        try:
+            server.suggest_from_history(history)
+            raise AssertionError
+        except ValueError:
+            pass
+
+
+def test_server():
+    """
+    Test the endpoints of a running server, including its errors and the
+    latency metrics.
+    """
+    async def run():
+        suggestion_server = server.SuggestionServer(workers=1)
+        await suggestion_server.start(port=0)
+        port = suggestion_server.port
+        try:
+            status, body = await _request(port, 'POST', '/suggest',
+                                          {'history': []})
+            first_guess = solver.WordleSolver(
+                suppress_info=True,
+                opening_book=opening.load_opening_book()
+            ).suggest_default_first_guess()
+            assert (status == 200 and body['guess'] == first_guess)
+
+            status, body = await _request(
+                port, 'POST', '/suggest',
+                {'history': [['salet', '.Y...']], 'strategy': 'eliminator'})
+            assert (status == 200)
+            assert (body == server.suggest_from_history([['salet', 3]],
+                                                        'eliminator'))
+
+            status, body = await _request(port, 'POST', '/solve',
+                                          {'word': 'shoal'})
+            record = batch.solve_record('shoal')
+            assert (status == 200)
+            assert (body['guesses'] == record['guesses'])
+
+            for method, path, payload, expected_status in [
+                    ('POST', '/solve', {'word': 'greip'}, 400),
+                    ('POST', '/suggest', {'strategy': 'unknown'}, 400),
+                    ('POST', '/suggest', {'history': [['salet', 'QQQQQ']]},
+                     400),
+                    ('POST', '/suggest', {'history': 5}, 400),
+                    ('POST', '/suggest', {'history': [[1, '.....']]}, 400),
+                    ('POST', '/suggest', {'history': [['salet', None]]},
+                     400),
+                    ('GET', '/suggest', None, 405),
+                    ('GET', '/unknown', None, 404)]:
+                status, body = await _request(port, method, path, payload)
+                assert (status == expected_status)
+                assert ('error' in body)
+
+            status, body = await _request(port, 'GET', '/metrics')
+            assert (status == 200)
+            assert (body['/suggest']['requests'] == 8)
+            assert (body['/suggest']['errors'] == 6)
+            assert (body['/solve']['requests'] == 2)
+            assert (body['/solve']['p99_ms'] > 0)
+        finally:
+            await suggestion_server.close()
+
+    asyncio.run(run())
+
+
+def test_keep_alive():
+    """
+    Test that several requests can be sent on one connection.
+    """
+    async def run():
+        suggestion_server = server.SuggestionServer(workers=1)
+        await suggestion_server.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection(
+                '127.0.0.1', suggestion_server.port)
+            for i in range(3):
+                writer.write(b'GET /health HTTP/1.1\r\n\r\n')
+                await writer.drain()
+                head = await reader.readuntil(b'\r\n\r\n')
+                assert (head.startswith(b'HTTP/1.1 200'))
+                length = int(head.split(b'Content-Length: ')[1].split()[0])
+                assert (json.loads(await reader.readexactly(length))
+                        == {'status': 'ok'})
+            writer.close()
+        finally:
+            await suggestion_server.close()
+
+    asyncio.run(run())
+
+
+def test_bad_requests(capsys):
+    """
+    Test that an invalid Content-Length is answered with 400, and that an
+    unexpected error is logged but not sent to the client.
+    """
+    async def run():
+        suggestion_server = server.SuggestionServer(workers=1)
+        await suggestion_server.start(port=0)
+        port = suggestion_server.port
+        try:
+            for length in ['abc', '-5', '1.5', '\xb2']:
+                status, body = await _request(port, 'POST', '/suggest',
+                                              {'history': []}, length)
+                assert (status == 400)
+                assert ('Content-Length' in body['error'])
+
+            status, body = await _request(port, 'POST', '/suggest',
+                                          length=server.MAX_BODY_SIZE + 1)
+            assert (status == 413)
+
+            async def fail(method, path, body):
+                raise RuntimeError('secret detail')
+            suggestion_server.handle_request = fail
+            status, body = await _request(port, 'GET', '/health')
+            assert (status == 500)
+            assert ('secret detail' not in json.dumps(body))
+        finally:
+            await suggestion_server.close()
+
+    asyncio.run(run())
+    assert ('secret detail' in capsys.readouterr().err)
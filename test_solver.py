@@ -2,6 +2,10 @@
 Tests for solver.py
 """
 
+import numpy as np
+
+import dictionary
+import patterns
 import solver
 from colorama import init as colorama_init
 from colorama import Fore
@@ -192,3 +196,417 @@ def test_suggest_default_first_guess():
     solver_instance = solver.WordleSolver()
     guess = solver_instance.suggest_default_first_guess()
     assert(guess == solver_instance.sanitise_word(guess))
+
+
+def test_eliminate_nonviable_words():
+    '''
+    Test that the true word stays viable and that every remaining viable
+    word agrees with the known letters.
+    '''
+    solver_instance = solver.WordleSolver(true_word='shoal',
+                                          suppress_info=True)
+    for guess in ['books', 'speed']:
+        solver_instance.process_guess(guess)
+        assert ('shoal' in solver_instance.viable_wordlist)
+
+        for word in solver_instance.viable_wordlist:
+            for j, letter in enumerate(word):
+                assert (solver_instance.known_letters[j] in ('*', letter))
+                assert (letter not in solver_instance.known_falseletters[j])
+            for letter in set(word):
+                index = ord(letter) - ord('a')
+                assert (solver_instance.minnum_letters[index]
+                        <= word.count(letter)
+                        <= solver_instance.maxnum_letters[index])
+
+    assert (len(solver_instance.viable_wordlist)
+            == len(solver_instance.viable_indices)
+            == len(solver_instance.wordlist_num_letters))
+
+
+def small_dictionary():
+    '''
+    Returns a dictionary of the first 500 words of the Wordle dictionary,
+    plus the words used in the tests.
+    '''
+    with open('all_words.txt', 'r') as file:
+        word_list = [line.rstrip() for line in file][:500]
+    word_list += [word for word in ['green', 'grape'] + words
+                  if word not in word_list]
+    return dictionary.Dictionary(word_list)
+
+
+def test_suggest_entropy_guess():
+    '''
+    Test that entropy guesses are valid, and viable if forced to be.
+    '''
+    word_dictionary = small_dictionary()
+    solver_instance = solver.WordleSolver(true_word='green',
+                                          suppress_info=True,
+                                          word_dictionary=word_dictionary)
+    matrix_instance = solver.WordleSolver(
+        true_word='green', suppress_info=True,
+        word_dictionary=word_dictionary,
+        pattern_matrix=patterns.build_pattern_matrix(word_dictionary.words))
+
+    guess = solver_instance.suggest_entropy_guess()
+    assert (guess in solver_instance.master_wordlist)
+    assert (guess == matrix_instance.suggest_entropy_guess())
+
+    solver_instance.process_guess('grape')
+    matrix_instance.process_guess('grape')
+    guess = solver_instance.suggest_entropy_guess(force_viable=True)
+    assert (guess in solver_instance.viable_wordlist)
+    assert (guess == matrix_instance.suggest_entropy_guess(force_viable=True))
+
+
+def test_suggest_min_expected_remaining_guess():
+    '''
+    Test that the guess leaving the fewest expected words is suggested,
+    and that it is viable if forced to be.
+    '''
+    solver_instance = solver.WordleSolver(true_word='green',
+                                          suppress_info=True,
+                                          word_dictionary=small_dictionary())
+    guess = solver_instance.suggest_min_expected_remaining_guess()
+    guess_index = solver_instance.master_index[guess]
+
+    entropy, expected_remaining = solver_instance.score_guess_patterns(
+        solver_instance.dictionary.all_indices, block_size=100)
+    assert (expected_remaining[guess_index] == expected_remaining.min())
+    assert (abs(entropy.max() - entropy.min()) > 0)
+
+    solver_instance.process_guess('grape')
+    guess = solver_instance.suggest_min_expected_remaining_guess(
+        force_viable=True)
+    assert (guess in solver_instance.viable_wordlist)
+
+    # With only one viable word left, it must be suggested.
+    solver_instance.process_guess(
+        solver_instance.suggest_min_expected_remaining_guess())
+    while len(solver_instance.viable_indices) > 1:
+        solver_instance.process_guess(
+            [word for word in solver_instance.viable_wordlist
+             if word != 'green'][0])
+    assert (solver_instance.suggest_entropy_guess() == 'green')
+
+
+def test_suggest_guess():
+    '''
+    Test that each strategy suggests a valid guess, and that unknown
+    strategies are rejected.
+    '''
+    solver_instance = solver.WordleSolver(true_word='green',
+                                          suppress_info=True,
+                                          word_dictionary=small_dictionary())
+    assert (solver_instance.suggest_guess('flagship')
+            == solver_instance.suggest_default_first_guess())
+
+    solver_instance.process_guess('grape')
+    for strategy in ['flagship', 'eliminator', 'entropy', 'random']:
+        guess = solver_instance.suggest_guess(strategy)
+        assert (guess in solver_instance.master_wordlist)
+    assert (solver_instance.suggest_guess('eliminator')
+            in solver_instance.viable_wordlist)
+
+    try:
+        solver_instance.suggest_guess('unknown')
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_copy():
+    '''
+    Test that a copied solver can be updated independently.
+    '''
+    solver_instance = solver.WordleSolver(true_word='green',
+                                          suppress_info=True)
+    solver_instance.process_guess('grape')
+    solver_copy = solver_instance.copy()
+    solver_copy.process_guess('women')
+
+    assert (solver_instance.num_attempts == 1)
+    assert (len(solver_instance.guess_history) == 1)
+    assert ('w' in solver_copy.known_falseletters[0])
+    assert ('w' not in solver_instance.known_falseletters[0])
+    assert (len(solver_copy.viable_indices)
+            <= len(solver_instance.viable_indices))
+
+
+def test_compact_state():
+    '''
+    Test that games share the dictionary's arrays and only keep compact
+    arrays of their own.
+    '''
+    first = solver.WordleSolver(true_word='green', suppress_info=True)
+    second = solver.WordleSolver(true_word='shoal', suppress_info=True)
+    assert (first.viable_indices is second.viable_indices)
+    assert (first.master_wordlist_num_letters
+            is second.master_wordlist_num_letters)
+
+    for solver_instance, guesses in [(first, ['grape', 'women']),
+                                     (second, ['tares', 'clonk'])]:
+        for guess in guesses:
+            solver_instance.process_guess(guess)
+        assert (solver_instance.viable_indices.dtype == np.uint16)
+        assert (solver_instance.minnum_letters.dtype == np.uint8)
+        assert (solver_instance.maxnum_letters.dtype == np.uint8)
+        assert (solver_instance.viable_weights is None)
+    assert (first.viable_wordlist == ['green'])
+    assert ('shoal' in second.viable_wordlist)
+
+    # Viable indices set from another array are stored compactly.
+    first.viable_indices = np.array([3, 1, 4])
+    assert (first.viable_indices.dtype == np.uint16)
+    assert (first.viable_wordlist == [first.master_wordlist[i]
+                                      for i in [3, 1, 4]])
+
+
+def test_suggest_eliminator_guesses():
+    '''
+    Test that the ranked eliminator guesses start with the best guess.
+    '''
+    solver_instance = solver.WordleSolver(true_word='green',
+                                          suppress_info=True)
+    solver_instance.process_guess('grape')
+
+    guesses = solver_instance.suggest_eliminator_guesses(5)
+    assert (len(guesses) == 5)
+    assert (len(set(guesses)) == 5)
+
+    viable_guesses = solver_instance.suggest_eliminator_guesses(
+        5, force_viable=True)
+    assert (viable_guesses[0]
+            == solver_instance.suggest_eliminator_guess(force_viable=True))
+    for guess in viable_guesses:
+        assert (guess in solver_instance.viable_wordlist)
+
+    all_guesses = solver_instance.suggest_eliminator_guesses(
+        100000, force_viable=True)
+    assert (sorted(all_guesses) == sorted(solver_instance.viable_wordlist))
+
+
+def test_process_feedback():
+    '''
+    Test that entering the feedback for guesses gives the same state as
+    processing the guesses against the true word, without using it.
+    '''
+    solver_instance = solver.WordleSolver(true_word='shoal',
+                                          suppress_info=True)
+    feedback_solver = solver.WordleSolver(suppress_info=True)
+
+    for guess in ['salet', 'W O M E N']:
+        solver_instance.process_guess(guess)
+        pattern = solver_instance.guess_history[-1][1]
+        assert (not feedback_solver.process_feedback(
+            guess, patterns.pattern_to_string(pattern)))
+
+    assert (feedback_solver.guess_history == solver_instance.guess_history)
+    assert (feedback_solver.known_letters == solver_instance.known_letters)
+    assert (feedback_solver.viable_wordlist
+            == solver_instance.viable_wordlist)
+    assert (feedback_solver.suggest_guess() == solver_instance.suggest_guess())
+
+    # Feedback which no viable word gives is not processed.
+    for guess, pattern in [('salet', 'GGGGG'), ('greip', 'GGGGG'),
+                           ('women', 'GGGG')]:
+        try:
+            feedback_solver.process_feedback(guess, pattern)
+            raise AssertionError
+        except ValueError:
+            pass
+    assert (feedback_solver.num_attempts == 2)
+
+    assert (feedback_solver.process_feedback('shoal', patterns.ALL_CORRECT))
+    assert (feedback_solver.num_attempts == 3)
+
+
+def test_hard_mode():
+    '''
+    Test that in hard mode every suggested guess uses the hints revealed
+    so far, and that guesses which do not are rejected.
+    '''
+    for true_word in ['shoal', 'books', 'eerie', 'women']:
+        solver_instance = solver.WordleSolver(true_word=true_word,
+                                              suppress_info=True,
+                                              hard_mode=True)
+        success = False
+        while not success:
+            guess = solver_instance.suggest_guess('flagship')
+            for previous_guess, pattern in solver_instance.guess_history:
+                hinted = []
+                for i, letter in enumerate(previous_guess):
+                    feedback = (pattern // 3 ** i) % 3
+                    if feedback == patterns.CORRECT:
+                        assert (guess[i] == letter)
+                    if feedback != patterns.ABSENT:
+                        hinted.append(letter)
+                for letter in set(hinted):
+                    assert (guess.count(letter) >= hinted.count(letter))
+            success = solver_instance.process_guess(guess)
+        assert (solver_instance.guess_history[-1][0] == true_word)
+
+    solver_instance = solver.WordleSolver(true_word='shoal',
+                                          suppress_info=True, hard_mode=True)
+    solver_instance.process_guess('salet')
+    for guess in ['women', 'tales']:
+        try:
+            solver_instance.process_guess(guess)
+            raise AssertionError
+        except ValueError:
+            pass
+    assert (solver_instance.num_attempts == 1)
+    assert (not solver_instance.process_feedback('sabal', 'G..GG'))
+    assert (len(solver_instance.hard_mode_indices)
+            < len(solver_instance.master_wordlist))
+
+
+def other_dictionary(word_length, alphabet, num_words=300):
+    '''
+    Returns a dictionary of random words with a word length and alphabet.
+    '''
+    rng = np.random.default_rng(word_length)
+    words = sorted({''.join(rng.choice(list(alphabet), word_length))
+                    for i in range(num_words)})
+    return dictionary.Dictionary(words)
+
+
+def test_other_word_lengths():
+    '''
+    Test that games can be played with other word lengths and alphabets,
+    with and without a pattern matrix, and with feedback.
+    '''
+    for word_length, alphabet in [(4, 'abcdefghijklmnop'), (6, 'aeiouäöüß'),
+                                  (7, 'abcdefghij')]:
+        word_dictionary = other_dictionary(word_length, alphabet)
+        pattern_matrix = patterns.build_pattern_matrix(word_dictionary.words)
+        assert (pattern_matrix.dtype == word_dictionary.pattern_dtype)
+
+        for true_word in word_dictionary.words[::37]:
+            histories = []
+            for matrix in [None, pattern_matrix]:
+                for strategy in ['flagship', 'entropy']:
+                    solver_instance = solver.WordleSolver(
+                        true_word=true_word, suppress_info=True,
+                        pattern_matrix=matrix,
+                        word_dictionary=word_dictionary)
+                    assert (solver_instance.true_word == true_word)
+                    success = False
+                    while not success:
+                        success = solver_instance.process_guess(
+                            solver_instance.suggest_guess(strategy))
+                    histories.append(solver_instance.guess_history)
+            assert (histories[0] == histories[2])
+            assert (histories[1] == histories[3])
+
+            feedback_solver = solver.WordleSolver(
+                suppress_info=True, word_dictionary=word_dictionary)
+            for guess, pattern in histories[0]:
+                feedback_solver.process_feedback(
+                    guess, patterns.pattern_to_string(pattern, word_length))
+            assert (feedback_solver.guess_history == histories[0])
+
+        try:
+            solver_instance.sanitise_word('shoal')
+            raise AssertionError
+        except ValueError:
+            pass
+
+
+def test_answers():
+    '''
+    Test that only the answers may be the true word, while any word may
+    be guessed, and that equal weights score guesses as no weights do.
+    '''
+    word_dictionary = small_dictionary()
+    answer_words = list(word_dictionary.words[::10]) + ['green']
+    answers = dictionary.AnswerList(word_dictionary, answer_words)
+    weighted_answers = dictionary.AnswerList(
+        word_dictionary, answer_words,
+        {word: 3.0 for word in answer_words})
+
+    solver_instance = solver.WordleSolver(true_word='green',
+                                          suppress_info=True,
+                                          word_dictionary=word_dictionary,
+                                          answers=answers)
+    assert (np.array_equal(solver_instance.viable_indices, answers.indices))
+    assert (set(solver_instance.viable_wordlist) == set(answer_words))
+
+    # Words which are not answers are set to a random answer.
+    for true_word in [None, 'grape']:
+        solver_instance.set_true_word(true_word)
+        assert (solver_instance.true_word in answers)
+
+    weighted_instance = solver.WordleSolver(
+        true_word='green', suppress_info=True,
+        word_dictionary=word_dictionary, answers=weighted_answers)
+    plain_instance = solver.WordleSolver(true_word='green',
+                                         suppress_info=True,
+                                         word_dictionary=word_dictionary,
+                                         answers=answers)
+    for instance in [weighted_instance, plain_instance]:
+        instance.process_guess('grape')
+    assert (np.array_equal(weighted_instance.viable_indices,
+                           plain_instance.viable_indices))
+    assert (np.allclose(weighted_instance.viable_letter_counts,
+                        3 * plain_instance.viable_letter_counts))
+    weighted_scores = weighted_instance.score_guess_patterns(
+        word_dictionary.all_indices)
+    plain_scores = plain_instance.score_guess_patterns(
+        word_dictionary.all_indices)
+    for weighted_score, plain_score in zip(weighted_scores, plain_scores):
+        assert (np.allclose(weighted_score, plain_score))
+    assert (weighted_instance.state_fingerprint()
+            != plain_instance.state_fingerprint())
+
+    for strategy in ['flagship', 'entropy', 'random']:
+        solver_instance = solver.WordleSolver(
+            true_word='green', suppress_info=True,
+            word_dictionary=word_dictionary, answers=weighted_answers)
+        success = False
+        while not success:
+            success = solver_instance.process_guess(
+                solver_instance.suggest_guess(strategy))
+        assert (solver_instance.guess_history[-1][0] == 'green')
+
+    try:
+        solver.WordleSolver(suppress_info=True, answers=answers)
+        raise AssertionError
+    except ValueError:
+        pass
+
+
+def test_weighted_scores():
+    '''
+    Test that the weighted entropy of a guess matches the entropy of its
+    pattern distribution computed word by word.
+    '''
+    word_dictionary = small_dictionary()
+    weights = {word: float(i % 7 + 1)
+               for i, word in enumerate(word_dictionary.words)}
+    answers = dictionary.AnswerList(word_dictionary, word_dictionary.words,
+                                    weights)
+    solver_instance = solver.WordleSolver(true_word='green',
+                                          suppress_info=True,
+                                          word_dictionary=word_dictionary,
+                                          answers=answers)
+    solver_instance.process_guess('grape')
+
+    guess_indices = np.arange(0, len(word_dictionary), 25)
+    entropy, expected_remaining = solver_instance.score_guess_patterns(
+        guess_indices, block_size=4)
+    viable_weights = np.array([weights[word] for word
+                               in solver_instance.viable_wordlist])
+    for i, guess_index in enumerate(guess_indices):
+        guess_patterns = solver_instance.compute_guess_patterns(
+            np.array([guess_index]))[0]
+        probabilities = np.array([
+            viable_weights[guess_patterns == pattern].sum()
+            for pattern in np.unique(guess_patterns)]) / viable_weights.sum()
+        sizes = np.array([np.count_nonzero(guess_patterns == pattern)
+                          for pattern in np.unique(guess_patterns)])
+        assert (np.isclose(entropy[i],
+                           -np.sum(probabilities * np.log2(probabilities))))
+        assert (np.isclose(expected_remaining[i],
+                           np.sum(probabilities * sizes)))
@@ -0,0 +1,135 @@
+"""
+Tests for suggestion_cache.py
+"""
+
+import json
+import threading
+
+import numpy as np
+
+import constraints
+import solver
+import suggestion_cache
+
+
+def test_lru_eviction():
+    """
+    Test that the least recently used suggestion is evicted and that hits
+    and misses are counted.
+    """
+    cache = suggestion_cache.SuggestionCache(maxsize=2)
+    cache.put('a', 'salet')
+    cache.put('b', 'women')
+    assert (cache.get('a') == 'salet')
+    cache.put('c', 'death')
+
+    assert (cache.get('b') is None)
+    assert (cache.get('a') == 'salet')
+    assert (cache.get('c') == 'death')
+    assert (cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1,
+                              'hit_rate': 0.75, 'size': 2, 'maxsize': 2})
+
+    cache.clear()
+    assert (len(cache) == 0 and cache.stats()['hits'] == 0)
+
+
+def test_thread_safety():
+    """
+    Test that many threads can use one cache without losing updates.
+    """
+    cache = suggestion_cache.SuggestionCache(maxsize=100)
+
+    def worker(offset):
+        for i in range(1000):
+            key = str((offset + i) % 150)
+            if cache.get(key) is None:
+                cache.put(key, key)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert (stats['hits'] + stats['misses'] == 8000)
+    assert (len(cache) == 100)
+
+
+def test_cached_suggestions():
+    """
+    Test that solvers sharing a cache reuse suggestions for the same state
+    and give the same guesses as a solver without a cache.
+    """
+    cache = suggestion_cache.SuggestionCache()
+    for true_word in ['shoal', 'shoal', 'books']:
+        cached_solver = solver.WordleSolver(true_word=true_word,
+                                            suppress_info=True,
+                                            suggestion_cache=cache)
+        solver_instance = solver.WordleSolver(true_word=true_word,
+                                              suppress_info=True)
+        success = False
+        while not success:
+            guess = cached_solver.suggest_guess('flagship')
+            assert (guess == solver_instance.suggest_guess('flagship'))
+            success = cached_solver.process_guess(guess)
+            solver_instance.process_guess(guess)
+
+    # The second game for shoal only hits the cache.
+    stats = cache.stats()
+    assert (stats['hits'] >= cached_solver.num_attempts)
+    assert (stats['size'] == stats['misses'])
+
+    # Random guesses are not cached.
+    cached_solver = solver.WordleSolver(suppress_info=True,
+                                        suggestion_cache=cache)
+    cached_solver.suggest_guess('random')
+    assert (cache.stats()['size'] == stats['size'])
+
+
+def test_state_fingerprint():
+    """
+    Test that states with the same constraints have the same fingerprint,
+    that different states do not, and that the fingerprint is keyed on
+    the solver's ConstraintState.
+    """
+    first = solver.WordleSolver(true_word='shoal', suppress_info=True)
+    second = solver.WordleSolver(true_word='shoal', suppress_info=True)
+    assert (first.state_fingerprint() == second.state_fingerprint())
+
+    first.process_guess('salet')
+    assert (first.state_fingerprint() != second.state_fingerprint())
+    second.process_feedback('salet', first.guess_history[-1][1])
+    assert (first.state_fingerprint() == second.state_fingerprint())
+
+    state = constraints.ConstraintState.from_solver(first)
+    assert (first.state_fingerprint().endswith(':' + state.key()))
+    assert (np.array_equal(state.filter(first.dictionary),
+                           first.viable_indices))
+
+    # Guessing the same word again changes nothing but the attempts.
+    first.process_guess('salet')
+    assert (first.state_fingerprint() == second.state_fingerprint())
+
+
+def test_save_and_load(tmp_path):
+    """
+    Test that a saved cache is loaded in recency order, and that caches
+    saved by other strategy versions are ignored.
+    """
+    path = str(tmp_path / 'cache' / 'suggestions.json')
+    cache = suggestion_cache.SuggestionCache(path=path)
+    cache.put('a', 'salet')
+    cache.put('b', 'women')
+    cache.get('a')
+    cache.save()
+
+    loaded = suggestion_cache.SuggestionCache(maxsize=1, path=path)
+    assert (len(loaded) == 1 and loaded.get('a') == 'salet')
+
+    with open(path, 'r') as file:
+        contents = json.load(file)
+    contents['strategy_version'] = solver.STRATEGY_VERSION - 1
+    with open(path, 'w') as file:
+        json.dump(contents, file)
+    assert (len(suggestion_cache.SuggestionCache(path=path)) == 0)
@@ -2,6 +2,10 @@
 Tests for userfunctions.py
 """
 
+import dictionary
+import opening
+import policy
+import solver
 import userfunctions
 
 words = ['women', 'death', 'abyss']
@@ -32,6 +36,17 @@ def test_random_batch_solve():
         assert (userfunctions.random_batch_solve(word)[0] != word)
 
 
+def test_hard_mode_batch_solve():
+    """
+    Test that the batch solvers can solve in hard mode.
+    """
+    for batch_solve in [userfunctions.random_batch_solve,
+                        userfunctions.eliminator_batch_solve,
+                        userfunctions.flagship_batch_solve]:
+        for word in words:
+            assert (batch_solve(word, True, hard_mode=True)[0] == word)
+
+
 def test_eliminator_batch_solve():
     """
     Test eliminator batch solver works correctly.
@@ -72,3 +87,69 @@ def test_flagship_batch_solve():
 
     for word in fake_spaceandcase_words:
         assert (userfunctions.flagship_batch_solve(word)[0] != word)
+
+
+def test_policy_batch_solve():
+    """
+    Test policy batch solver works correctly and makes the same guesses
+    as the flagship batch solver.
+    """
+    # Normal inputs.
+    for word in words:
+        assert (userfunctions.policy_batch_solve(word)
+                == userfunctions.flagship_batch_solve(word))
+
+    # The same guesses as the flagship strategy with its opening book,
+    # over a sample of the dictionary.
+    book = policy.load_policy_book('flagship')
+    opening_book = opening.load_opening_book('flagship')
+    for word in dictionary.load_dictionary().words[::400]:
+        policy_solver = policy.PolicySolver(book, true_word=word,
+                                            suppress_info=True,
+                                            opening_book=opening_book)
+        solver_instance = solver.WordleSolver(true_word=word,
+                                              suppress_info=True,
+                                              opening_book=opening_book)
+        success = False
+        while not success:
+            success = policy_solver.process_guess(
+                policy_solver.suggest_guess())
+        success = False
+        while not success:
+            success = solver_instance.process_guess(
+                solver_instance.suggest_guess('flagship'))
+        assert (policy_solver.node != policy.NO_NODE)
+        assert (policy_solver.solver.guess_history
+                == solver_instance.guess_history)
+
+    for word, test_word in zip(words, mixedcase_words):
+        assert (userfunctions.policy_batch_solve(test_word)[0] == word)
+
+    for word in fake_words:
+        assert (userfunctions.policy_batch_solve(word)[0] != word)
+
+    # Hard mode, which follows the hard mode book.
+    for word in words:
+        assert (userfunctions.policy_batch_solve(word, True,
+                                                 hard_mode=True)[0] == word)
+
+
+def test_optimal_batch_solve():
+    """
+    Test optimal batch solver works correctly.
+    """
+    # Normal inputs, with a small search budget to keep the test quick.
+    for word in words:
+        assert (userfunctions.optimal_batch_solve(word, max_nodes=20)[0]
+                == word)
+
+    assert (userfunctions.optimal_batch_solve('salet') == ('salet', 1))
+
+    for word in fake_words:
+        assert (userfunctions.optimal_batch_solve(word, max_nodes=20)[0]
+                != word)
+
+    # Hard mode, where only the guesses allowed by the hints are searched.
+    for word in words:
+        assert (userfunctions.optimal_batch_solve(word, True, hard_mode=True,
+                                                  max_nodes=20)[0] == word)
@@ -16,14 +16,28 @@ Contains:
         Solves Wordle for a given true word by guessing mainly using the
         eliminator method, however some tweaks are used to improve
         performance.
+    optimal_batch_solve
+        Solves Wordle for a given true word by searching for the guesses
+        which minimise the expected number of guesses.
+    policy_batch_solve
+        Solves Wordle for a given true word by following the policy book
+        for a strategy, which records the strategy's guesses in advance.
     interactive_solve
         This function is used to play Wordle interactively.
+    assisted_solve
+        This function suggests guesses for a game of Wordle being played
+        elsewhere, using the feedback entered for each guess.
 '''
 
+import opening
+import policy
+import search
 import solver
+import suggestion_cache
 
 
-def random_batch_solve(true_word, suppress_info=False):
+def random_batch_solve(true_word, suppress_info=False, hard_mode=False,
+                       answers=None, stats=None):
     '''
     Function to solve for a given true word using the random method.
 
@@ -36,6 +50,14 @@ def random_batch_solve(true_word, suppress_info=False):
     suppress_info: boolean
         if set to true, will stop most information from being printed.
         can be useful if solving many words in batch.
+    hard_mode: boolean
+        if set to true, every guess uses the hints revealed so far.
+    answers: dictionary.AnswerList
+        the words which may be the true word, and their prior weights.
+        if None, every word in the dictionary may be the true word.
+    stats: instrumentation.SolverStats
+        if given, the phases, guesses and suggestions of the game are
+        recorded to it.
 
     Returns
     ----------
@@ -47,7 +69,9 @@ def random_batch_solve(true_word, suppress_info=False):
     '''
 
     solver_instance = solver.WordleSolver(true_word=true_word,
-                                          suppress_info=suppress_info)
+                                          suppress_info=suppress_info,
+                                          hard_mode=hard_mode,
+                                          answers=answers, stats=stats)
 
     success = False
     while not success:
@@ -60,7 +84,8 @@ def random_batch_solve(true_word, suppress_info=False):
         raise ValueError('Unable to solve correctly...')
 
 
-def eliminator_batch_solve(true_word, suppress_info=False):
+def eliminator_batch_solve(true_word, suppress_info=False, hard_mode=False,
+                           answers=None, stats=None):
     '''
     Function to solve for a given true word using the eliminator method.
 
@@ -73,6 +98,14 @@ def eliminator_batch_solve(true_word, suppress_info=False):
     suppress_info: boolean
         if set to true, will stop most information from being printed.
         can be useful if solving many words in batch.
+    hard_mode: boolean
+        if set to true, every guess uses the hints revealed so far.
+    answers: dictionary.AnswerList
+        the words which may be the true word, and their prior weights.
+        if None, every word in the dictionary may be the true word.
+    stats: instrumentation.SolverStats
+        if given, the phases, guesses and suggestions of the game are
+        recorded to it.
 
     Returns
     ----------
@@ -82,13 +115,15 @@ def eliminator_batch_solve(true_word, suppress_info=False):
     int
         the number of attempts taken to solve the Wordle.
     '''
-    solver_instance = solver.WordleSolver(true_word=true_word,
-                                          suppress_info=suppress_info)
+    solver_instance = solver.WordleSolver(
+        true_word=true_word, suppress_info=suppress_info,
+        suggestion_cache=suggestion_cache.shared_suggestion_cache(),
+        hard_mode=hard_mode, answers=answers,
+        opening_book=opening.load_opening_book('eliminator'), stats=stats)
 
     success = False
     while not success:
-        guess = solver_instance.suggest_eliminator_guess(
-            force_viable=True)
+        guess = solver_instance.suggest_guess('eliminator')
         success = solver_instance.process_guess(guess)
 
     if guess == solver_instance.true_word:
@@ -97,7 +132,8 @@ def eliminator_batch_solve(true_word, suppress_info=False):
         raise ValueError('Unable to solve correctly...')
 
 
-def flagship_batch_solve(true_word, suppress_info=False):
+def flagship_batch_solve(true_word, suppress_info=False, hard_mode=False,
+                         answers=None, stats=None):
     '''
     Function to solve for a given true word using the best method.
 
@@ -110,6 +146,14 @@ def flagship_batch_solve(true_word, suppress_info=False):
     suppress_info: boolean
         if set to true, will stop most information from being printed.
         can be useful if solving many words in batch.
+    hard_mode: boolean
+        if set to true, every guess uses the hints revealed so far.
+    answers: dictionary.AnswerList
+        the words which may be the true word, and their prior weights.
+        if None, every word in the dictionary may be the true word.
+    stats: instrumentation.SolverStats
+        if given, the phases, guesses and suggestions of the game are
+        recorded to it.
 
     Returns
     ----------
@@ -119,17 +163,80 @@ def flagship_batch_solve(true_word, suppress_info=False):
     int
         the number of attempts taken to solve the Wordle.
     '''
-    solver_instance = solver.WordleSolver(true_word=true_word,
-                                          suppress_info=suppress_info)
+    solver_instance = solver.WordleSolver(
+        true_word=true_word, suppress_info=suppress_info,
+        suggestion_cache=suggestion_cache.shared_suggestion_cache(),
+        hard_mode=hard_mode, answers=answers,
+        opening_book=opening.load_opening_book('flagship'), stats=stats)
+
+    success = False
+    while not success:
+        guess = solver_instance.suggest_guess('flagship')
+        success = solver_instance.process_guess(guess)
+
+    if guess == solver_instance.true_word:
+        return guess, solver_instance.num_attempts
+    else:
+        raise ValueError('Unable to solve correctly...')
+
+
+def optimal_batch_solve(true_word, suppress_info=False, hard_mode=False,
+                        top_k=8, max_nodes=500, time_limit=1.0,
+                        stats=None):
+    '''
+    Function to solve for a given true word using the expected guess
+    search. The default first guess is used, after which each guess is
+    chosen by searching for the guess which minimises the expected number
+    of guesses. The search memo is shared by every game in the process,
+    and is cleared when it is full.
+
+    Parameters
+    ----------
+    true_word: str
+        the input word to be set as the answer for the Wordle.
+        must be a word in the dictionary, otherwise a random word
+        is set.
+    suppress_info: boolean
+        if set to true, will stop most information from being printed.
+        can be useful if solving many words in batch.
+    hard_mode: boolean
+        if set to true, every guess uses the hints revealed so far. the
+        search only tries the guesses allowed by the hints of the game.
+    top_k: int
+        the number of guesses tried for each set of possible words.
+    max_nodes: int
+        the number of sets which may be searched for each guess. if None,
+        there is no limit.
+    time_limit: float
+        the number of seconds which may be spent searching for each guess,
+        after which the rest of the search is estimated. if None, there
+        is no limit.
+    stats: instrumentation.SolverStats
+        if given, the phases, guesses and suggestions of the game are
+        recorded to it. each search is recorded as a suggestion phase.
 
-    guess = solver_instance.suggest_default_first_guess()
-    success = solver_instance.process_guess(guess)
+    Returns
+    ----------
+    str
+        the actual true word used by the Wordle solver. Can be useful
+        in can a random true word was set due to an invalid input.
+    int
+        the number of attempts taken to solve the Wordle.
+    '''
+    expected_search = search.shared_search(top_k, max_nodes, time_limit)
+    solver_instance = solver.WordleSolver(
+        true_word=true_word, suppress_info=suppress_info,
+        hard_mode=hard_mode, pattern_matrix=expected_search.pattern_matrix,
+        stats=stats)
 
+    success = False
     while not success:
-        if len(solver_instance.viable_wordlist) <= 3:
-            guess = solver_instance.suggest_eliminator_guess(force_viable=True)
+        if stats is None:
+            guess = _search_guess(expected_search, solver_instance)
         else:
-            guess = solver_instance.suggest_eliminator_guess()
+            with stats.phase('suggestion'):
+                guess = _search_guess(expected_search, solver_instance)
+            stats.record_suggestion('uncached', guess)
         success = solver_instance.process_guess(guess)
 
     if guess == solver_instance.true_word:
@@ -138,19 +245,47 @@ def flagship_batch_solve(true_word, suppress_info=False):
         raise ValueError('Unable to solve correctly...')
 
 
-def interactive_solve(true_word=None, suggest=True):
+def _search_guess(expected_search, solver_instance):
     '''
-    Function to allow the user to solve interactively.
+    Returns the next guess of a game played by optimal_batch_solve: the
+    default first guess, then the result of the expected guess search.
+    '''
+    if solver_instance.num_attempts == 0:
+        return solver_instance.suggest_default_first_guess()
+    guesses = None
+    if solver_instance.hard_mode:
+        guesses = solver_instance.hard_mode_indices
+    result = expected_search.search(solver_instance.viable_indices, guesses)
+    return solver_instance.master_wordlist[result.guess]
+
+
+def policy_batch_solve(true_word, suppress_info=False, hard_mode=False,
+                       strategy='flagship', stats=None):
+    '''
+    Function to solve for a given true word by following a policy book.
+    The book is built the first time it is needed and is then loaded from
+    the cache, so each guess is a lookup rather than a computation. The
+    book is built with the strategy's opening book, so the guesses are
+    the same as those of the strategy's batch solve function.
 
     Parameters
     ----------
     true_word: str
         the input word to be set as the answer for the Wordle.
-        must be a valid 5 letter word, otherwise a random word
+        must be a word in the dictionary, otherwise a random word
         is set.
     suppress_info: boolean
         if set to true, will stop most information from being printed.
         can be useful if solving many words in batch.
+    hard_mode: boolean
+        if set to true, every guess uses the hints revealed so far, and
+        the hard mode policy book for the strategy is followed.
+    strategy: str
+        the strategy recorded in the policy book, one of
+        policy.POLICY_STRATEGIES.
+    stats: instrumentation.SolverStats
+        if given, the phases, guesses and suggestions of the game are
+        recorded to it.
 
     Returns
     ----------
@@ -160,8 +295,49 @@ def interactive_solve(true_word=None, suggest=True):
     int
         the number of attempts taken to solve the Wordle.
     '''
-    solver_instance = solver.WordleSolver(true_word=true_word,
-                                          suppress_info=False)
+    policy_solver = policy.PolicySolver(
+        policy.load_policy_book(strategy, hard_mode), true_word=true_word,
+        suppress_info=suppress_info, stats=stats,
+        opening_book=opening.load_opening_book(strategy))
+    solver_instance = policy_solver.solver
+
+    success = False
+    while not success:
+        guess = policy_solver.suggest_guess()
+        success = policy_solver.process_guess(guess)
+
+    if guess == solver_instance.true_word:
+        return guess, solver_instance.num_attempts
+    else:
+        raise ValueError('Unable to solve correctly...')
+
+
+def interactive_solve(true_word=None, suggest=True, hard_mode=False):
+    '''
+    Function to allow the user to solve interactively.
+
+    Parameters
+    ----------
+    true_word: str
+        the input word to be set as the answer for the Wordle.
+        must be a valid 5 letter word, otherwise a random word
+        is set.
+    suggest: boolean
+        if set to true, suggests a guess before each attempt.
+    hard_mode: boolean
+        if set to true, every guess must use the hints revealed so far.
+
+    Returns
+    ----------
+    str
+        the actual true word used by the Wordle solver. Can be useful
+        in can a random true word was set due to an invalid input.
+    int
+        the number of attempts taken to solve the Wordle.
+    '''
+    solver_instance = solver.WordleSolver(
+        true_word=true_word, suppress_info=False, hard_mode=hard_mode,
+        opening_book=opening.load_opening_book() if suggest else None)
 
     if suggest:
         suggested_guess = solver_instance.suggest_default_first_guess()
@@ -176,9 +352,8 @@ def interactive_solve(true_word=None, suggest=True):
                 guess = input()
                 success = solver_instance.process_guess(guess)
                 valid_guess = True
-            except ValueError:
-                print('Guess was not a valid five letter word that appears in '
-                      'the Wordle dictionary.')
+            except ValueError as error:
+                print(error)
         if suggest and not success:
             suggested_guess = solver_instance.suggest_eliminator_guess()
             print(f'Suggested  guess: {suggested_guess}')
@@ -187,3 +362,45 @@ def interactive_solve(true_word=None, suggest=True):
         return guess, solver_instance.num_attempts
     else:
         raise ValueError('Unable to solve correctly...')
+
+
+def assisted_solve(strategy='flagship', hard_mode=False):
+    '''
+    Function to suggest guesses for a game of Wordle being played
+    elsewhere. The true word is not known, so the feedback for each guess
+    is entered as five characters: 'G' for a correct letter, 'Y' for a
+    present letter and '.' for an absent letter.
+
+    Parameters
+    ----------
+    strategy: str
+        the strategy used to suggest guesses, as for
+        WordleSolver.suggest_guess.
+    hard_mode: boolean
+        if set to true, every guess must use the hints revealed so far.
+
+    Returns
+    ----------
+    str
+        the final guess, which the feedback showed to be correct.
+    int
+        the number of attempts taken to solve the Wordle.
+    '''
+    solver_instance = solver.WordleSolver(
+        suppress_info=False, hard_mode=hard_mode,
+        opening_book=opening.load_opening_book(strategy))
+
+    success = False
+    while not success:
+        suggested_guess = solver_instance.suggest_guess(strategy)
+        print(f'Suggested guess: {suggested_guess}')
+        try:
+            print('Please enter your guess, or press enter to use the '
+                  'suggestion.')
+            guess = input() or suggested_guess
+            print('Please enter the feedback, e.g. GY..Y.')
+            success = solver_instance.process_feedback(guess, input())
+        except ValueError as error:
+            print(error)
+
+    return solver_instance.guess_history[-1][0], solver_instance.num_attempts